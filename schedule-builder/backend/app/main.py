@@ -1,11 +1,12 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any, Optional
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 import os
+import logging
 import uuid
-import sqlite3
 from datetime import datetime
 from app.models.lecture import Lecture
 from app.models.department import Department
@@ -13,7 +14,7 @@ from app.models.group import Group
 from app.models.subgroup import Subgroup
 from app.models.classroom import Classroom
 from app.models.time_slot import TimeSlot, TimeSlotConfiguration
-from app.models.schedule import Schedule
+from app.models.schedule import Schedule, ScheduleMove, ScheduleSwap
 from app.services.excel_parser import ExcelParserService
 from app.services.data_validator import DataValidatorService
 from app.services.classroom_service import ClassroomService
@@ -25,8 +26,19 @@ from app.services.data_visualization import DataVisualizationService
 from app.services.database_service import DatabaseService
 from app.services.export_service import ExportService
 from app.services.conflict_detector import ConflictDetector
+from app.services.conflict_index import ConflictIndex
+from app.services.result_cache import ResultCache
+from app.services.move_evaluator import MoveEvaluator
+from app.services.placement_advisor import PlacementAdvisor
+from app.services.score_tracker import ScoreTracker
+from app.services.schedule_editor import ScheduleEditor
+from app.services.version_diff import VersionDiffService
+from app.services.write_behind import WriteBehindQueue
+from app.services.state_loader import StateLoader
+from app.services.async_database import AsyncDatabaseService
 
 app = FastAPI(title="Lecture Schedule Preparation System", version="1.0.0")
+logger = logging.getLogger(__name__)
 
 # Add CORS middleware
 app.add_middleware(
@@ -46,23 +58,101 @@ combination_generator = CombinationGenerator(classroom_service, time_slot_servic
 schedule_generator = ScheduleGenerator(classroom_service, time_slot_service)
 schedule_optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
 data_visualization = DataVisualizationService()
-database_service = DatabaseService()
+database_service = DatabaseService(os.environ.get("SCHEDULE_DB_PATH", "schedule.db"))
+schedule_writes = WriteBehindQueue(database_service)  # schedule saves persisted in the background
+async_database = AsyncDatabaseService(database_service)  # database calls for async endpoints, off the event loop
 export_service = ExportService(time_slot_service)
-conflict_detector = ConflictDetector(time_slot_service)
-
-# Create standard time slots on startup if none exist
-if len(time_slot_service.get_all_time_slots()) == 0:
-    time_slot_service.create_standard_time_slots()
+conflict_detector = ConflictDetector(time_slot_service, classroom_service)
+conflict_index = ConflictIndex(conflict_detector)
+result_cache = ResultCache()  # conflict reports and dashboards keyed by the schedule fingerprint
+move_evaluator = MoveEvaluator(conflict_index, schedule_optimizer)
+placement_advisor = PlacementAdvisor(classroom_service, time_slot_service)
+score_tracker = ScoreTracker(schedule_optimizer)
+schedule_editor = ScheduleEditor(conflict_index, score_tracker, schedule_writes)
+version_diff_service = VersionDiffService(database_service, schedule_optimizer)
+state_loader = StateLoader(database_service, classroom_service, time_slot_service, conflict_index, score_tracker)
 
 # In-memory storage for parsed data
 parsed_data_storage = {}
 generated_schedules = []
 conflicts_storage = []
+# "archive" -> ParetoArchive, "base_schedules" -> schedules its assignments apply to,
+# "base_state" -> schedule_state() of those schedules
+pareto_storage = {}
+MAX_PAGE_SIZE = 1000  # largest page of the paginated query endpoints
+WRITE_FLUSH_TIMEOUT = 10  # seconds to wait for queued schedule writes to reach the database
+startup_report = {}  # what restore_state() loaded, and how long it took
+
+def refresh_conflict_index():
+    """
+    Rebuild the live conflict index and score counters from the current schedule and
+    session lectures (under the editor's lock, so no move or swap runs meanwhile)
+    """
+    parsed_data = parsed_data_storage[list(parsed_data_storage.keys())[0]] if parsed_data_storage else {}
+    with schedule_editor.lock:
+        conflict_index.rebuild(
+            generated_schedules,
+            parsed_data.get("lectures", []),
+            parsed_data.get("groups", []),
+            parsed_data.get("subgroups", [])
+        )
+        score_tracker.rebuild(generated_schedules, parsed_data.get("lectures", []))
+
+def schedule_state() -> Tuple:
+    """
+    Identity of the current schedule: the conflict index fingerprint (which
+    changes with every assignment or rebuild) and the pinned items
+    """
+    return (conflict_index.get_fingerprint(), frozenset(schedule.id for schedule in generated_schedules if schedule.pinned))
+
+def store_schedules(previous_schedules: List[Schedule], schedules: List[Schedule]):
+    """
+    Queue the writes that make the stored schedule match a new one: its items are
+    saved and the items of the previous schedule it no longer has are deleted
+    """
+    kept_ids = {schedule.id for schedule in schedules}
+    schedule_writes.delete_schedules([schedule.id for schedule in previous_schedules if schedule.id not in kept_ids])
+    schedule_writes.save_schedules(schedules)
+
+@app.on_event("startup")
+def restore_state():
+    """
+    Restore classrooms, time slots, configuration and the stored schedule
+    (standard time slots are created on a fresh database)
+    """
+    restored_state = state_loader.restore()
+    generated_schedules.extend(restored_state["schedules"])
+    startup_report.update(restored_state["report"])
+    logger.info("Restored %d classrooms, %d time slots and %d schedule items in %s ms",
+                startup_report["classrooms"], startup_report["time_slots"],
+                startup_report["schedules"], startup_report["timings_ms"]["total"])
+
+@app.on_event("shutdown")
+def shutdown():
+    """
+    Persist queued schedule writes before the server exits
+    """
+    if not schedule_writes.close(timeout=WRITE_FLUSH_TIMEOUT):
+        logger.warning("Queued schedule writes were still being written after %s s and may be lost "
+                       "(pending items: %d, last error: %s)", WRITE_FLUSH_TIMEOUT,
+                       schedule_writes.get_pending_count(), schedule_writes.last_error)
+    if schedule_writes.batches_dropped:
+        logger.warning("%d schedule write batches were dropped after failing (last error: %s)",
+                       schedule_writes.batches_dropped, schedule_writes.last_error)
+    async_database.close()
+    database_service.close()
 
 @app.get("/")
 def read_root():
     return {"message": "Lecture Schedule Preparation System API"}
 
+@app.get("/api/system/startup")
+def get_startup_report():
+    """
+    Get what was restored from the database at startup and how long each step took
+    """
+    return startup_report
+
 @app.post("/api/schedule/upload")
 async def upload_schedule_file(file: UploadFile = File(...)):
     """
@@ -100,11 +190,11 @@ async def upload_schedule_file(file: UploadFile = File(...)):
         # Store parsed data
         session_id = str(uuid.uuid4())
         parsed_data_storage[session_id] = parse_result["data"]
+        refresh_conflict_index()
         
         # Save lectures to database
         lectures = parse_result["data"].get("lectures", [])
-        for lecture in lectures:
-            database_service.save_lecture(lecture)
+        await async_database.save_lectures(lectures)
         
         # Generate data summary
         summary = data_validator.get_data_summary(parse_result["data"])
@@ -151,6 +241,7 @@ def create_classroom(classroom: Classroom):
     created_classroom = classroom_service.add_classroom(classroom)
     # Save to database
     database_service.save_classroom(classroom)
+    refresh_conflict_index()
     return created_classroom
 
 @app.put("/api/classrooms/{classroom_id}")
@@ -163,6 +254,7 @@ def update_classroom(classroom_id: str, classroom: Classroom):
         raise HTTPException(status_code=404, detail="Classroom not found")
     # Update in database
     database_service.save_classroom(classroom)
+    refresh_conflict_index()
     return updated_classroom
 
 @app.delete("/api/classrooms/{classroom_id}")
@@ -173,6 +265,8 @@ def delete_classroom(classroom_id: str):
     deleted = classroom_service.delete_classroom(classroom_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Classroom not found")
+    database_service.delete_classroom(classroom_id)
+    refresh_conflict_index()
     return {"message": "Classroom deleted successfully"}
 
 @app.get("/api/timeslots")
@@ -191,6 +285,7 @@ def create_time_slot(time_slot: TimeSlot):
     created_time_slot = time_slot_service.add_time_slot(time_slot)
     # Save to database
     database_service.save_time_slot(time_slot)
+    refresh_conflict_index()
     return created_time_slot
 
 @app.put("/api/timeslots/{time_slot_id}")
@@ -203,6 +298,7 @@ def update_time_slot(time_slot_id: str, time_slot: TimeSlot):
         raise HTTPException(status_code=404, detail="Time slot not found")
     # Update in database
     database_service.save_time_slot(time_slot)
+    refresh_conflict_index()
     return updated_time_slot
 
 @app.delete("/api/timeslots/{time_slot_id}")
@@ -213,6 +309,8 @@ def delete_time_slot(time_slot_id: str):
     deleted = time_slot_service.delete_time_slot(time_slot_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Time slot not found")
+    database_service.delete_time_slot(time_slot_id)
+    refresh_conflict_index()
     return {"message": "Time slot deleted successfully"}
 
 # Add new API endpoints for lecture management
@@ -233,6 +331,7 @@ def update_lecture(lecture_id: str, lecture: Lecture):
             if existing_lecture.id == lecture_id:
                 lectures[i] = lecture
                 break
+    refresh_conflict_index()
     
     return {"message": "Lecture updated successfully", "lecture": lecture}
 
@@ -242,23 +341,21 @@ def delete_lecture(lecture_id: str):
     Delete a lecture
     """
     # Delete from database
-    conn = sqlite3.connect(database_service.db_path)
-    cursor = conn.cursor()
-    cursor.execute('DELETE FROM lectures WHERE id = ?', (lecture_id,))
-    conn.commit()
-    conn.close()
+    database_service.delete_lecture(lecture_id)
     
     # Delete from memory storage if it exists
     for session_id, session_data in parsed_data_storage.items():
         lectures = session_data.get("lectures", [])
         session_data["lectures"] = [l for l in lectures if l.id != lecture_id]
+    refresh_conflict_index()
     
     return {"message": "Lecture deleted successfully"}
 
 @app.post("/api/schedule/generate/{session_id}")
-def generate_schedule(session_id: str):
+def generate_schedule(session_id: str, base_version_id: Optional[int] = None):
     """
     Generate schedule for a session
+    (with base_version_id, placements of a saved version are kept wherever they still fit)
     """
     if session_id not in parsed_data_storage:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -269,28 +366,134 @@ def generate_schedule(session_id: str):
     subgroups = parsed_data.get("subgroups", [])
     
     # Generate schedule
-    schedules, conflicts = schedule_generator.generate_schedule(lectures, groups, subgroups)
+    seed_schedules = _version_seed_schedules(base_version_id, lectures) if base_version_id is not None else []
+    schedules, conflicts = schedule_generator.generate_schedule(
+        lectures, groups, subgroups, seed_schedules=seed_schedules
+    )
     
     # Store results
+    previous_schedules = list(generated_schedules)
     generated_schedules.clear()
     generated_schedules.extend(schedules)
     conflicts_storage.clear()
     conflicts_storage.extend(conflicts)
+    refresh_conflict_index()
     
-    # Save schedules to database
-    database_service.save_schedules(schedules)
+    # Save schedules to database (written in the background)
+    store_schedules(previous_schedules, schedules)
     
     return {
         "schedules": schedules,
         "conflicts": conflicts,
+        "reused": _count_reused(schedules, seed_schedules),
         "message": f"Generated {len(schedules)} schedule items with {len(conflicts)} conflicts"
     }
 
+def _version_seed_schedules(version_id: int, lectures: List[Lecture]) -> List[Schedule]:
+    """
+    Map a saved schedule version onto the current lectures for a warm start
+    """
+    base_schedules = database_service.get_schedule_version(version_id)
+    if base_schedules is None:
+        raise HTTPException(status_code=404, detail="Schedule version not found")
+    
+    base_lectures = database_service.get_schedule_version_lectures(version_id) or []
+    return schedule_generator.match_base_schedules(base_schedules, base_lectures, lectures)
+
+def _count_reused(schedules: List[Schedule], seed_schedules: List[Schedule]) -> int:
+    """
+    Number of schedule items placed exactly where their seed was
+    """
+    seed_placements = {(seed.lecture_id, seed.time_slot_id, seed.classroom_id) for seed in seed_schedules}
+    return sum(
+        (schedule.lecture_id, schedule.time_slot_id, schedule.classroom_id) in seed_placements
+        for schedule in schedules
+    )
+
+@app.patch("/api/schedule/pin/{schedule_id}")
+def pin_schedule_item(schedule_id: str, pinned: bool = True):
+    """
+    Pin a schedule item so re-solves and optimizations keep its placement (or unpin it)
+    """
+    schedule = next((item for item in generated_schedules if item.id == schedule_id), None)
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    schedule.pinned = pinned
+    schedule_writes.save_schedule(schedule)
+    
+    return {
+        "schedule": schedule,
+        "message": f"Schedule item {'pinned' if pinned else 'unpinned'}"
+    }
+
+@app.post("/api/schedule/resolve")
+def resolve_schedule(department: Optional[str] = None):
+    """
+    Re-generate only part of the current schedule: the unpinned items of one
+    department (or all unpinned items). Everything else stays where it is
+    """
+    if not generated_schedules:
+        raise HTTPException(status_code=400, detail="No schedule to re-solve")
+    
+    session_id = list(parsed_data_storage.keys())[0] if parsed_data_storage else None
+    if not session_id:
+        raise HTTPException(status_code=400, detail="No session data available")
+    
+    parsed_data = parsed_data_storage[session_id]
+    lectures = parsed_data.get("lectures", [])
+    groups = parsed_data.get("groups", [])
+    subgroups = parsed_data.get("subgroups", [])
+    
+    in_scope = {
+        lecture.id for lecture in lectures
+        if department is None or lecture.dep_reale_rreg == department
+    }
+    fixed_schedules = [
+        schedule for schedule in generated_schedules
+        if schedule.pinned or schedule.lecture_id not in in_scope
+    ]
+    fixed_ids = {schedule.id for schedule in fixed_schedules}
+    freed_schedules = [schedule for schedule in generated_schedules if schedule.id not in fixed_ids]
+    
+    # Lectures outside the scope only matter through their fixed schedule items
+    fixed_lecture_ids = {schedule.lecture_id for schedule in fixed_schedules}
+    resolve_lectures = [
+        lecture for lecture in lectures
+        if lecture.id in in_scope or lecture.id in fixed_lecture_ids
+    ]
+    schedules, conflicts = schedule_generator.generate_schedule(
+        resolve_lectures, groups, subgroups, pinned_schedules=fixed_schedules
+    )
+    
+    # Store results
+    generated_schedules.clear()
+    generated_schedules.extend(schedules)
+    conflicts_storage.clear()
+    conflicts_storage.extend(conflicts)
+    refresh_conflict_index()
+    
+    # Replace the freed items in the database
+    schedule_writes.delete_schedules([schedule.id for schedule in freed_schedules])
+    schedule_writes.save_schedules(schedules[len(fixed_schedules):])
+    
+    return {
+        "schedules": schedules,
+        "conflicts": conflicts,
+        "message": f"Re-solved {len(schedules) - len(fixed_schedules)} schedule items around {len(fixed_schedules)} fixed items with {len(conflicts)} conflicts"
+    }
+
 @app.post("/api/schedule/optimize")
-def optimize_schedule():
+def optimize_schedule(mode: str = "heuristic", base_version_id: Optional[int] = None):
     """
     Optimize the current schedule
+    (mode "heuristic" runs the optimization passes, "tempering" runs parallel tempering).
+    With base_version_id, the schedule is first moved back to the placements of a
+    saved version wherever they still fit
     """
+    if mode not in ("heuristic", "tempering"):
+        raise HTTPException(status_code=400, detail=f"Unknown optimization mode: {mode}")
+    
     if not generated_schedules:
         raise HTTPException(status_code=400, detail="No schedule to optimize")
     
@@ -304,17 +507,38 @@ def optimize_schedule():
     groups = parsed_data.get("groups", [])
     departments = parsed_data.get("departments", [])
     
+    # Warm start: seed from the saved version, falling back to the current placement
+    start_schedules = generated_schedules
+    if base_version_id is not None:
+        seed_schedules = _version_seed_schedules(base_version_id, lectures)
+        seeded_lecture_ids = {seed.lecture_id for seed in seed_schedules}
+        seed_schedules += [schedule for schedule in generated_schedules if schedule.lecture_id not in seeded_lecture_ids]
+        start_schedules, conflicts = schedule_generator.generate_schedule(
+            lectures, groups, parsed_data.get("subgroups", []),
+            pinned_schedules=[schedule for schedule in generated_schedules if schedule.pinned],
+            seed_schedules=seed_schedules
+        )
+        conflicts_storage.clear()
+        conflicts_storage.extend(conflicts)
+    
     # Optimize schedule
-    optimized_schedules = schedule_optimizer.optimize_schedule(
-        generated_schedules, lectures, groups, departments
-    )
+    if mode == "tempering":
+        optimized_schedules = schedule_optimizer.parallel_tempering(
+            start_schedules, lectures, groups, departments
+        )
+    else:
+        optimized_schedules = schedule_optimizer.optimize_schedule(
+            start_schedules, lectures, groups, departments
+        )
     
     # Update stored schedules
+    previous_schedules = list(generated_schedules)
     generated_schedules.clear()
     generated_schedules.extend(optimized_schedules)
+    refresh_conflict_index()
     
-    # Save optimized schedules to database
-    database_service.save_schedules(optimized_schedules)
+    # Save optimized schedules to database (written in the background)
+    store_schedules(previous_schedules, optimized_schedules)
     
     # Calculate optimization score
     score = schedule_optimizer.calculate_schedule_score(
@@ -327,6 +551,139 @@ def optimize_schedule():
         "message": "Schedule optimized successfully"
     }
 
+@app.post("/api/schedule/optimize/pareto")
+def optimize_schedule_pareto(max_iterations: int = 200):
+    """
+    Build a Pareto front of schedules over the six sub-scores
+    """
+    if not generated_schedules:
+        raise HTTPException(status_code=400, detail="No schedule to optimize")
+    
+    # Get parsed data for optimization
+    session_id = list(parsed_data_storage.keys())[0] if parsed_data_storage else None
+    if not session_id:
+        raise HTTPException(status_code=400, detail="No session data available")
+    
+    parsed_data = parsed_data_storage[session_id]
+    lectures = parsed_data.get("lectures", [])
+    groups = parsed_data.get("groups", [])
+    departments = parsed_data.get("departments", [])
+    
+    archive = schedule_optimizer.pareto_optimization(
+        generated_schedules, lectures, groups, departments, max_iterations=max_iterations
+    )
+    pareto_storage["archive"] = archive
+    pareto_storage["base_schedules"] = list(generated_schedules)
+    pareto_storage["base_state"] = schedule_state()
+    
+    return {
+        "solutions": archive.get_solutions(),
+        "message": f"Found {len(archive.entries)} non-dominated schedules"
+    }
+
+@app.post("/api/schedule/pareto/rank")
+def rank_pareto_solutions(weights: Dict[str, float]):
+    """
+    Rank the Pareto front with custom objective weights (no recomputation)
+    """
+    if "archive" not in pareto_storage:
+        raise HTTPException(status_code=400, detail="No Pareto front available")
+    
+    try:
+        return pareto_storage["archive"].get_solutions(weights)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/schedule/pareto/select/{solution_id}")
+def select_pareto_solution(solution_id: int):
+    """
+    Make a solution from the Pareto front the current schedule
+    """
+    if "archive" not in pareto_storage:
+        raise HTTPException(status_code=400, detail="No Pareto front available")
+    
+    assignment = pareto_storage["archive"].get_assignment(solution_id)
+    if assignment is None:
+        raise HTTPException(status_code=404, detail="Pareto solution not found")
+    # Applying the front to an outdated base would undo every edit made since
+    if pareto_storage["base_state"] != schedule_state():
+        raise HTTPException(status_code=409, detail=(
+            "The schedule changed since the Pareto front was computed; run the Pareto optimization again"
+        ))
+    
+    selected_schedules = schedule_optimizer.apply_assignment(pareto_storage["base_schedules"], assignment)
+    
+    # Update stored schedules
+    previous_schedules = list(generated_schedules)
+    generated_schedules.clear()
+    generated_schedules.extend(selected_schedules)
+    refresh_conflict_index()
+    
+    # Save selected schedules to database (written in the background)
+    store_schedules(previous_schedules, selected_schedules)
+    
+    return {
+        "schedules": selected_schedules,
+        "message": f"Pareto solution {solution_id} selected"
+    }
+
+@app.post("/api/schedule/what-if")
+def evaluate_schedule_moves(moves: List[ScheduleMove]):
+    """
+    Evaluate a batch of proposed moves against the current schedule without applying them
+    """
+    if not generated_schedules:
+        raise HTTPException(status_code=400, detail="No schedule to analyze")
+    
+    return move_evaluator.evaluate_moves(moves)
+
+@app.patch("/api/schedule/move")
+def move_schedule_item(move: ScheduleMove, force: bool = False):
+    """
+    Move a single schedule item to another time slot and classroom
+    """
+    result = schedule_editor.move_schedule(move.schedule_id, move.time_slot_id, move.classroom_id, force)
+    return _edit_response(result)
+
+@app.patch("/api/schedule/swap")
+def swap_schedule_items(swap: ScheduleSwap, force: bool = False):
+    """
+    Swap the time slots and classrooms of two schedule items
+    """
+    result = schedule_editor.swap_schedules(swap.first_schedule_id, swap.second_schedule_id, force)
+    return _edit_response(result)
+
+def _edit_response(result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Map a schedule edit result to an HTTP response
+    """
+    if result is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    if not result["applied"]:
+        raise HTTPException(status_code=409, detail={
+            "message": "Edit would introduce conflicts (use force=true to apply anyway)",
+            "conflicts": result["blocking_conflicts"]
+        })
+    return result
+
+@app.get("/api/schedule/suggestions/{lecture_id}")
+def suggest_lecture_placements(lecture_id: str, k: int = 5, max_bumps: int = 5):
+    """
+    Suggest the best free placements for a lecture and the cheapest moves that would free a blocked one
+    """
+    session_id = list(parsed_data_storage.keys())[0] if parsed_data_storage else None
+    if not session_id:
+        raise HTTPException(status_code=400, detail="No session data available")
+    
+    lectures = parsed_data_storage[session_id].get("lectures", [])
+    lecture = next((item for item in lectures if item.id == lecture_id), None)
+    if not lecture:
+        raise HTTPException(status_code=404, detail="Lecture not found")
+    
+    return placement_advisor.suggest_placements(lecture, generated_schedules, lectures, k, max_bumps)
+
 @app.get("/api/schedule/dashboard/{session_id}")
 def get_schedule_dashboard(session_id: str):
     """
@@ -337,23 +694,29 @@ def get_schedule_dashboard(session_id: str):
     
     parsed_data = parsed_data_storage[session_id]
     
-    # Generate dashboard data
-    dashboard_data = data_visualization.generate_summary_dashboard(
-        parsed_data, generated_schedules, conflicts_storage, time_slot_service
+    # Generate dashboard data (memoized until the schedule fingerprint changes)
+    dashboard_data = result_cache.get(
+        ("dashboard", session_id),
+        conflict_index.get_fingerprint(),
+        lambda: data_visualization.generate_summary_dashboard(
+            parsed_data, generated_schedules, conflicts_storage, time_slot_service
+        )
     )
     
     return dashboard_data
 
 @app.post("/api/schedule/save-version")
-def save_schedule_version(version_name: Optional[str] = None):
+async def save_schedule_version(version_name: Optional[str] = None):
     """
     Save current schedule as a version
     """
     if not generated_schedules:
         raise HTTPException(status_code=400, detail="No schedule to save")
     
-    # Save to database
-    success = database_service.save_schedule_version(generated_schedules, version_name or "")
+    # Save to database, with the lectures so later terms can warm-start from it
+    session_id = list(parsed_data_storage.keys())[0] if parsed_data_storage else None
+    lectures = parsed_data_storage[session_id].get("lectures", []) if session_id else None
+    success = await async_database.save_schedule_version(list(generated_schedules), version_name or "", lectures)
     
     if success:
         return {"message": "Schedule version saved successfully"}
@@ -361,23 +724,86 @@ def save_schedule_version(version_name: Optional[str] = None):
         raise HTTPException(status_code=500, detail="Failed to save schedule version")
 
 @app.get("/api/schedule/versions")
-def get_schedule_versions():
+async def get_schedule_versions(limit: Optional[int] = None, before_id: Optional[int] = None):
     """
-    Get all saved schedule versions
+    Get saved schedule versions, newest first
+    (pass limit for one page, and the last id of a page as before_id for the next)
     """
-    versions = database_service.get_schedule_versions()
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    
+    versions = await async_database.get_schedule_versions(limit, before_id)
     return versions
 
+@app.get("/api/schedule/items")
+async def query_schedule_items(professor: Optional[str] = None, classroom_id: Optional[str] = None,
+                               day: Optional[str] = None, department: Optional[str] = None,
+                               version_id: Optional[int] = None, after_id: Optional[str] = None, limit: int = 100):
+    """
+    Browse stored schedule items (or those of a saved version) one page at a time, in id order
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    
+    time_slot_ids = None
+    if day is not None:
+        time_slot_ids = [
+            time_slot.id for time_slot in time_slot_service.get_all_time_slots()
+            if time_slot.day.lower() == day.lower()
+        ]
+    
+    # Stored items must include every schedule write queued so far
+    if version_id is None:
+        if not await run_in_threadpool(schedule_writes.flush, WRITE_FLUSH_TIMEOUT):
+            raise HTTPException(status_code=503, detail=(
+                f"Schedule changes could not be saved: {schedule_writes.last_error or 'timed out'}"
+            ))
+    
+    items = await async_database.query_schedules(
+        professor, classroom_id, time_slot_ids, department, version_id, after_id, limit
+    )
+    if items is None:
+        raise HTTPException(status_code=404, detail="Schedule version not found")
+    
+    return {
+        "items": items,
+        "next_after_id": items[-1].id if len(items) == limit else None
+    }
+
 @app.get("/api/schedule/version/{version_id}")
-def get_schedule_version(version_id: int):
+async def get_schedule_version(version_id: int):
     """
     Get a specific schedule version
     """
-    schedules = database_service.get_schedule_version(version_id)
+    schedules = await async_database.get_schedule_version(version_id)
     if schedules is None:
         raise HTTPException(status_code=404, detail="Schedule version not found")
     return schedules
 
+@app.get("/api/schedule/versions/{base_version_id}/diff/{target_version_id}")
+def diff_schedule_versions(base_version_id: int, target_version_id: int):
+    """
+    Compare two saved versions: moved, added and removed assignments and the score of each side
+    """
+    for version_id in (base_version_id, target_version_id):
+        if database_service.get_schedule_version_info(version_id) is None:
+            raise HTTPException(status_code=404, detail="Schedule version not found")
+    
+    session_id = list(parsed_data_storage.keys())[0] if parsed_data_storage else None
+    parsed_data = parsed_data_storage[session_id] if session_id else {}
+    
+    # Versions never change, but their scores depend on the current rooms, time slots and session
+    diff = result_cache.get(
+        ("version_diff", base_version_id, target_version_id),
+        conflict_index.get_fingerprint(),
+        lambda: version_diff_service.diff_versions(
+            base_version_id, target_version_id, parsed_data.get("lectures", []),
+            parsed_data.get("groups", []), parsed_data.get("departments", [])
+        )
+    )
+    
+    return diff
+
 @app.get("/api/export/excel")
 def export_schedule_excel():
     """
@@ -487,14 +913,12 @@ def detect_conflicts():
     if not session_id:
         raise HTTPException(status_code=400, detail="No session data available")
     
-    parsed_data = parsed_data_storage[session_id]
-    lectures = parsed_data.get("lectures", [])
-    
-    # Detect conflicts
-    conflicts = conflict_detector.detect_all_conflicts(generated_schedules, lectures)
-    
-    # Generate report
-    report = conflict_detector.generate_conflict_report(conflicts)
+    # Build the report from the live index (memoized until the schedule fingerprint changes)
+    report = result_cache.get(
+        "conflict_report",
+        conflict_index.get_fingerprint(),
+        lambda: conflict_detector.generate_conflict_report(conflict_index.get_conflicts())
+    )
     
     return report
 
@@ -511,14 +935,12 @@ def get_conflict_report():
     if not session_id:
         raise HTTPException(status_code=400, detail="No session data available")
     
-    parsed_data = parsed_data_storage[session_id]
-    lectures = parsed_data.get("lectures", [])
-    
-    # Detect conflicts
-    conflicts = conflict_detector.detect_all_conflicts(generated_schedules, lectures)
-    
-    # Generate detailed report
-    report = conflict_detector.generate_conflict_report(conflicts)
+    # Build the detailed report from the live index (shared with /api/conflicts/detect)
+    report = result_cache.get(
+        "conflict_report",
+        conflict_index.get_fingerprint(),
+        lambda: conflict_detector.generate_conflict_report(conflict_index.get_conflicts())
+    )
     
     return report
 
@@ -536,6 +958,7 @@ def update_time_slot_configuration(config: TimeSlotConfiguration):
     Update time slot configuration
     """
     updated_config = time_slot_service.update_configuration(config)
+    database_service.save_time_slot_configuration(config)
     return updated_config
 
 if __name__ == "__main__":
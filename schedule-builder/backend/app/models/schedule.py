@@ -8,5 +8,15 @@ class Schedule(BaseModel):
     time_slot_id: str  # Reference to time slot
     classroom_id: str  # Assigned classroom
     professor: str  # Assigned professor
+    pinned: bool = False  # Pinned items keep their placement when the schedule is re-solved
     created_at: Optional[datetime] = None
-    updated_at: Optional[datetime] = None
\ No newline at end of file
+    updated_at: Optional[datetime] = None
+
+class ScheduleMove(BaseModel):
+    schedule_id: str  # Schedule item to move
+    time_slot_id: str  # Target time slot
+    classroom_id: str  # Target classroom
+
+class ScheduleSwap(BaseModel):
+    first_schedule_id: str  # Schedule item taking the second item's placement
+    second_schedule_id: str  # Schedule item taking the first item's placement
@@ -5,4 +5,5 @@ class Subgroup(BaseModel):
     id: str  # Subgroup identifier (e.g., Gr. 1.1, Gr. 1.2)
     parent_group: str  # Parent group identifier
     lecture_count: int = 0  # Number of lectures for subgroup
-    daily_limit: int = 3  # Maximum lectures per day for subgroup
\ No newline at end of file
+    daily_limit: int = 3  # Maximum lectures per day for subgroup
+    student_count: Optional[int] = None  # Expected number of students in subgroup
\ No newline at end of file
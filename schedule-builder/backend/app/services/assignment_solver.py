@@ -0,0 +1,76 @@
+from typing import List, Tuple
+
+def solve_assignment(cost_matrix: List[List[float]]) -> List[Tuple[int, int]]:
+    """
+    Solve a min-cost assignment problem with the Hungarian algorithm.
+    Rows are assigned to distinct columns; when there are more rows than
+    columns only as many rows as there are columns get an assignment.
+    Returns a list of (row, column) pairs. Runs in O(n^2 * m).
+    """
+    if not cost_matrix or not cost_matrix[0]:
+        return []
+
+    transposed = len(cost_matrix) > len(cost_matrix[0])
+    if transposed:
+        cost_matrix = [list(column) for column in zip(*cost_matrix)]
+
+    n = len(cost_matrix)
+    m = len(cost_matrix[0])
+    inf = float('inf')
+
+    # Potentials and matching are 1-indexed; column 0 is a virtual start column
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    match = [0] * (m + 1)  # column -> matched row
+    way = [0] * (m + 1)
+
+    for row in range(1, n + 1):
+        match[0] = row
+        current_column = 0
+        min_values = [inf] * (m + 1)
+        used = [False] * (m + 1)
+
+        while True:
+            used[current_column] = True
+            current_row = match[current_column]
+            delta = inf
+            next_column = 0
+
+            for column in range(1, m + 1):
+                if used[column]:
+                    continue
+                reduced = cost_matrix[current_row - 1][column - 1] - u[current_row] - v[column]
+                if reduced < min_values[column]:
+                    min_values[column] = reduced
+                    way[column] = current_column
+                if min_values[column] < delta:
+                    delta = min_values[column]
+                    next_column = column
+
+            for column in range(m + 1):
+                if used[column]:
+                    u[match[column]] += delta
+                    v[column] -= delta
+                else:
+                    min_values[column] -= delta
+
+            current_column = next_column
+            if match[current_column] == 0:
+                break
+
+        # Walk back along the augmenting path
+        while current_column:
+            previous_column = way[current_column]
+            match[current_column] = match[previous_column]
+            current_column = previous_column
+
+    assignment = []
+    for column in range(1, m + 1):
+        if match[column]:
+            if transposed:
+                assignment.append((column - 1, match[column] - 1))
+            else:
+                assignment.append((match[column] - 1, column - 1))
+
+    assignment.sort()
+    return assignment
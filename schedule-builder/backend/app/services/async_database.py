@@ -0,0 +1,94 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Dict
+from app.models.schedule import Schedule
+from app.models.lecture import Lecture
+from app.models.classroom import Classroom
+from app.services.database_service import DatabaseService
+
+# Awaitable front end of a DatabaseService for async endpoints. Calls run off
+# the event loop: writes one at a time on a dedicated writer thread (SQLite
+# allows one writer), reads on a pool of reader threads. WAL mode lets readers
+# proceed while a write is in progress, so a slow write does not hold up
+# unrelated reads. Each thread uses its own pooled connection. Other
+# DatabaseService calls can be made with run_read() or run_write()
+class AsyncDatabaseService:
+    def __init__(self, database_service: DatabaseService, read_workers: int = 4):
+        self.database_service = database_service
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="db-reader")
+
+    async def save_lectures(self, lectures: List[Lecture]) -> bool:
+        """
+        Save multiple lectures in one transaction (writer thread)
+        """
+        return await self.run_write(self.database_service.save_lectures, lectures)
+
+    async def save_classroom(self, classroom: Classroom) -> bool:
+        """
+        Save a classroom (writer thread)
+        """
+        return await self.run_write(self.database_service.save_classroom, classroom)
+
+    async def get_classroom(self, classroom_id: str) -> Optional[Classroom]:
+        """
+        Retrieve a classroom by ID (reader pool)
+        """
+        return await self.run_read(self.database_service.get_classroom, classroom_id)
+
+    async def get_classrooms(self, min_capacity: Optional[int] = None, status: Optional[str] = None) -> List[Classroom]:
+        """
+        Retrieve classrooms, optionally filtered by capacity and status (reader pool)
+        """
+        return await self.run_read(self.database_service.get_classrooms, min_capacity, status)
+
+    async def query_schedules(self, professor: Optional[str] = None, classroom_id: Optional[str] = None,
+                              time_slot_ids: Optional[List[str]] = None, department: Optional[str] = None,
+                              version_id: Optional[int] = None, after_id: Optional[str] = None,
+                              limit: int = 100) -> Optional[List[Schedule]]:
+        """
+        Retrieve one filtered page of schedules (reader pool)
+        """
+        return await self.run_read(self.database_service.query_schedules, professor, classroom_id,
+                                   time_slot_ids, department, version_id, after_id, limit)
+
+    async def save_schedule_version(self, schedules: List[Schedule], version_name: str = None,
+                                    lectures: Optional[List[Lecture]] = None) -> bool:
+        """
+        Save a schedule version (writer thread, so versions are numbered in submission order)
+        """
+        return await self.run_write(self.database_service.save_schedule_version, schedules, version_name, lectures)
+
+    async def get_schedule_versions(self, limit: Optional[int] = None,
+                                    before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Retrieve schedule versions, newest first (reader pool)
+        """
+        return await self.run_read(self.database_service.get_schedule_versions, limit, before_id)
+
+    async def get_schedule_version(self, version_id: int) -> Optional[List[Schedule]]:
+        """
+        Retrieve a specific schedule version (reader pool)
+        """
+        return await self.run_read(self.database_service.get_schedule_version, version_id)
+
+    async def run_read(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking read on a reader thread
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._readers, partial(func, *args, **kwargs))
+
+    async def run_write(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run a blocking write on the writer thread, after the writes submitted before it
+        """
+        return await asyncio.get_running_loop().run_in_executor(self._writer, partial(func, *args, **kwargs))
+
+    def close(self):
+        """
+        Wait for submitted calls to finish and stop the worker threads
+        (the wrapped DatabaseService stays open)
+        """
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
@@ -0,0 +1,292 @@
+from typing import List, Dict, Tuple, Optional
+from app.models.lecture import Lecture
+from app.models.schedule import Schedule
+from app.services.classroom_service import ClassroomService
+from app.services.time_slot_service import TimeSlotService
+from app.services.interval_sweep import slot_interval, find_overlaps
+import numpy as np
+
+# Same weights as ScheduleOptimizer.calculate_schedule_score, in the same order
+SCORE_WEIGHTS = {
+    'conflict_score': 0.25,
+    'cohesion_score': 0.15,
+    'balance_score': 0.15,
+    'utilization_score': 0.15,
+    'distribution_score': 0.15,
+    'preference_score': 0.15
+}
+
+PREFERENCE_CODES = {'morning': 1, 'midday': 2, 'evening': 3}
+
+# Scores many candidate schedules at once. Every candidate is a row of time slot
+# indices and classroom indices, one column per base schedule item. Results match
+# ScheduleOptimizer.calculate_schedule_score exactly: sums over rooms, days and
+# departments run in the same order as in the scalar code
+class BatchScheduleScorer:
+    def __init__(self, classroom_service: ClassroomService, time_slot_service: TimeSlotService,
+                 schedules: List[Schedule], lectures: List[Lecture]):
+        self.schedules = schedules
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+
+        # Id tables: every known slot/room plus anything the base schedules reference
+        self.time_slot_ids: List[str] = [time_slot.id for time_slot in time_slot_service.get_all_time_slots()]
+        self.classroom_ids: List[str] = [classroom.id for classroom in classroom_service.get_all_classrooms()]
+        for schedule in schedules:
+            if schedule.time_slot_id not in self.time_slot_ids:
+                self.time_slot_ids.append(schedule.time_slot_id)
+            if schedule.classroom_id not in self.classroom_ids:
+                self.classroom_ids.append(schedule.classroom_id)
+        self.time_slot_index = {slot_id: i for i, slot_id in enumerate(self.time_slot_ids)}
+        self.classroom_index = {room_id: i for i, room_id in enumerate(self.classroom_ids)}
+
+        # Per time slot: day index (-1 for unknown slots) and matched preference code
+        day_index: Dict[str, int] = {}
+        slot_days = []
+        slot_periods = []
+        for slot_id in self.time_slot_ids:
+            time_slot = time_slot_service.get_time_slot(slot_id)
+            if time_slot:
+                slot_days.append(day_index.setdefault(time_slot.day, len(day_index)))
+                slot_periods.append(PREFERENCE_CODES.get(slot_id.split('_')[-1], 0) if '_' in slot_id else 0)
+            else:
+                slot_days.append(-1)
+                slot_periods.append(0)
+        self.slot_days = np.array(slot_days, dtype=np.int64)
+        self.day_count = len(day_index)
+
+        # Conflicts are counted on overlapping times; equal slot ids are enough
+        # unless two different slots overlap
+        self.slot_intervals = [slot_interval(slot_id, time_slot_service.get_time_slot(slot_id))
+                               for slot_id in self.time_slot_ids]
+        self.has_partial_overlaps = bool(find_overlaps([(0, interval, i) for i, interval in enumerate(self.slot_intervals)]))
+
+        # Preference code x slot -> match
+        slot_periods = np.array(slot_periods, dtype=np.int64)
+        self.preference_table = np.zeros((len(PREFERENCE_CODES) + 1, len(self.time_slot_ids)), dtype=bool)
+        for code in PREFERENCE_CODES.values():
+            self.preference_table[code] = slot_periods == code
+
+        # Per classroom: capacity (rooms unknown to the classroom service are excluded)
+        capacities = []
+        for room_id in self.classroom_ids:
+            classroom = classroom_service.get_classroom(room_id)
+            capacities.append(classroom.capacity if classroom else 0)
+        self.room_capacity = np.array(capacities, dtype=np.float64)
+        self.room_exists = np.array([classroom_service.get_classroom(room_id) is not None
+                                     for room_id in self.classroom_ids], dtype=bool)
+
+        # Per column: professor, department and preference
+        professor_index: Dict[str, int] = {}
+        department_index: Dict[str, int] = {}
+        professors = []
+        departments = []
+        preferences = []
+        has_preference = []
+        for schedule in schedules:
+            professors.append(professor_index.setdefault(schedule.professor, len(professor_index)))
+            lecture = lecture_dict.get(schedule.lecture_id)
+            if lecture:
+                departments.append(department_index.setdefault(lecture.dep_reale_rreg, len(department_index)))
+                has_preference.append(bool(lecture.time_preference))
+                preferences.append(PREFERENCE_CODES.get(lecture.time_preference.lower(), 0) if lecture.time_preference else 0)
+            else:
+                departments.append(-1)
+                has_preference.append(False)
+                preferences.append(0)
+        self.column_professors = np.array(professors, dtype=np.int64)
+        self.column_departments = np.array(departments, dtype=np.int64)
+        self.column_preferences = np.array(preferences, dtype=np.int64)
+        self.department_count = len(department_index)
+        self.department_lecture_counts = np.bincount(
+            self.column_departments[self.column_departments >= 0], minlength=self.department_count
+        ).astype(np.float64)
+        self.total_preferences = int(sum(has_preference))
+
+    def encode(self, assignments: List[List[Tuple[str, str]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Convert (time_slot_id, classroom_id) assignments into index arrays
+        """
+        try:
+            slot_indices = np.array([[self.time_slot_index[slot_id] for slot_id, _ in assignment]
+                                     for assignment in assignments], dtype=np.int64)
+            room_indices = np.array([[self.classroom_index[room_id] for _, room_id in assignment]
+                                     for assignment in assignments], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Unknown time slot or classroom id: {e}")
+        return slot_indices.reshape(len(assignments), len(self.schedules)), room_indices.reshape(len(assignments), len(self.schedules))
+
+    def score(self, slot_indices: np.ndarray, room_indices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Score every row of the (N_solutions x N_schedules) index arrays.
+        Returns one array of N scores per key of calculate_schedule_score
+        """
+        slot_indices = np.asarray(slot_indices, dtype=np.int64)
+        room_indices = np.asarray(room_indices, dtype=np.int64)
+        solution_count, column_count = slot_indices.shape
+
+        scores = {key: np.zeros(solution_count) for key in SCORE_WEIGHTS}
+        if column_count > 0:
+            scores['conflict_score'] = self._conflict_scores(slot_indices, room_indices)
+            scores['cohesion_score'] = self._cohesion_scores(slot_indices)
+            scores['balance_score'] = self._balance_scores(slot_indices)
+            scores['utilization_score'] = self._utilization_scores(room_indices)
+            scores['distribution_score'] = self._distribution_scores(slot_indices)
+            scores['preference_score'] = self._preference_scores(slot_indices)
+        elif solution_count:
+            scores['conflict_score'] = np.full(solution_count, 100.0)
+            scores['preference_score'] = np.full(solution_count, 100.0)
+
+        overall = np.zeros(solution_count)
+        for key, weight in SCORE_WEIGHTS.items():
+            overall = overall + scores[key] * weight
+        scores['overall_score'] = overall
+
+        return scores
+
+    def _conflict_scores(self, slot_indices: np.ndarray, room_indices: np.ndarray) -> np.ndarray:
+        """
+        100 - 10 per double-booked classroom or professor (same count as get_schedule_conflicts)
+        """
+        if self.has_partial_overlaps:
+            return self._overlap_conflict_scores(slot_indices, room_indices)
+
+        slot_total = len(self.time_slot_ids)
+        room_keys = room_indices * slot_total + slot_indices
+        professor_keys = self.column_professors[None, :] * slot_total + slot_indices
+        conflicts = (self._duplicate_counts(room_keys, len(self.classroom_ids) * slot_total) +
+                     self._duplicate_counts(professor_keys, (int(self.column_professors.max()) + 1) * slot_total))
+        return np.maximum(0, 100 - conflicts * 10).astype(np.float64)
+
+    def _overlap_conflict_scores(self, slot_indices: np.ndarray, room_indices: np.ndarray) -> np.ndarray:
+        """
+        Row-by-row sweep-line conflict count for slot grids with partially overlapping slots
+        """
+        scores = np.empty(slot_indices.shape[0])
+        for row in range(slot_indices.shape[0]):
+            intervals = [self.slot_intervals[slot] for slot in slot_indices[row]]
+            conflicts = (len(find_overlaps(list(zip(room_indices[row].tolist(), intervals, range(len(intervals)))))) +
+                         len(find_overlaps(list(zip(self.column_professors.tolist(), intervals, range(len(intervals)))))))
+            scores[row] = max(0, 100 - conflicts * 10)
+        return scores
+
+    def _duplicate_counts(self, keys: np.ndarray, key_space: int) -> np.ndarray:
+        """
+        Per row: number of entries minus number of distinct keys
+        """
+        # Counting bins is fastest while the bin table stays small, sorting otherwise
+        if keys.shape[0] * key_space <= 20_000_000:
+            counts = self._per_row_counts(keys, np.ones(keys.shape, dtype=bool), key_space)
+            distinct = (counts > 0).sum(axis=1)
+        else:
+            sorted_keys = np.sort(keys, axis=1)
+            distinct = 1 + (np.diff(sorted_keys, axis=1) != 0).sum(axis=1)
+        return keys.shape[1] - distinct
+
+    def _per_row_counts(self, indices: np.ndarray, mask: np.ndarray, size: int) -> np.ndarray:
+        """
+        Count occurrences of each index per row, ignoring masked-out entries
+        """
+        solution_count = indices.shape[0]
+        rows = np.broadcast_to(np.arange(solution_count)[:, None], indices.shape)
+        flat = (rows * size + indices)[mask]
+        return np.bincount(flat, minlength=solution_count * size).reshape(solution_count, size)
+
+    def _sum_in_first_seen_order(self, values: np.ndarray, indices: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """
+        Sum values[row, k] per row, adding k in the order each index first appears
+        in the row (the insertion order of the dicts in the scalar code)
+        """
+        solution_count, size = values.shape
+        column_count = indices.shape[1]
+        first_seen = np.full((solution_count, size), column_count, dtype=np.int64)
+        for k in range(size):
+            hits = (indices == k) & mask
+            first_seen[:, k] = np.where(hits.any(axis=1), hits.argmax(axis=1), column_count)
+        order = np.argsort(first_seen, axis=1, kind='stable')
+        ordered = np.take_along_axis(values, order, axis=1)
+
+        # Indices that never appear sort last and contribute exactly 0.0
+        total = np.zeros(solution_count)
+        for k in range(size):
+            total = total + ordered[:, k]
+        return total
+
+    def _cohesion_scores(self, slot_indices: np.ndarray) -> np.ndarray:
+        """
+        Average lectures-per-day over departments, scaled like get_departmental_cohesion_report
+        """
+        solution_count = slot_indices.shape[0]
+        if self.department_count == 0 or self.day_count == 0:
+            return np.zeros(solution_count)
+
+        days = self.slot_days[slot_indices]
+        departments = np.broadcast_to(self.column_departments[None, :], days.shape)
+        mask = (departments >= 0) & (days >= 0)
+        counts = self._per_row_counts(departments * self.day_count + days, mask,
+                                      self.department_count * self.day_count)
+        days_used = (counts.reshape(solution_count, self.department_count, self.day_count) > 0).sum(axis=2)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cohesion = np.where(days_used > 0, self.department_lecture_counts[None, :] / days_used, 0.0)
+
+        # Departments are numbered in order of first appearance, like the report dict
+        total = np.zeros(solution_count)
+        for department in range(self.department_count):
+            total = total + cohesion[:, department]
+        return np.minimum(100, total / self.department_count * 20)
+
+    def _balance_scores(self, slot_indices: np.ndarray) -> np.ndarray:
+        """
+        Least used slot / most used slot, over slots in use
+        """
+        counts = self._per_row_counts(slot_indices, np.ones(slot_indices.shape, dtype=bool), len(self.time_slot_ids))
+        max_load = counts.max(axis=1)
+        min_load = np.where(counts > 0, counts, np.iinfo(np.int64).max).min(axis=1)
+        return min_load / max_load * 100
+
+    def _utilization_scores(self, room_indices: np.ndarray) -> np.ndarray:
+        """
+        Average of min(100, bookings / capacity * 100) over rooms in use
+        """
+        mask = self.room_exists[room_indices]
+        counts = self._per_row_counts(room_indices, mask, len(self.classroom_ids))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.where(counts > 0, np.minimum(100, counts / self.room_capacity[None, :] * 100), 0.0)
+
+        total = self._sum_in_first_seen_order(utilization, room_indices, mask)
+        rooms_used = (counts > 0).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(rooms_used > 0, total / rooms_used, 0.0)
+
+    def _distribution_scores(self, slot_indices: np.ndarray) -> np.ndarray:
+        """
+        100 - variance of lectures per day as a percentage of avg_per_day ** 2
+        """
+        solution_count = slot_indices.shape[0]
+        if self.day_count == 0:
+            return np.zeros(solution_count)
+
+        days = self.slot_days[slot_indices]
+        mask = days >= 0
+        counts = self._per_row_counts(days, mask, self.day_count)
+        days_used = (counts > 0).sum(axis=1)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_per_day = counts.sum(axis=1) / days_used
+            squared_deviation = np.where(counts > 0, (counts - avg_per_day[:, None]) ** 2, 0.0)
+            variance = self._sum_in_first_seen_order(squared_deviation, days, mask) / days_used
+            max_variance = avg_per_day ** 2
+            distribution = np.where(max_variance > 0, np.maximum(0, 100 - (variance / max_variance * 100)), 100.0)
+
+        return np.where(days_used > 0, distribution, 0.0)
+
+    def _preference_scores(self, slot_indices: np.ndarray) -> np.ndarray:
+        """
+        Share of lectures with a time preference that sit in a matching slot
+        """
+        solution_count = slot_indices.shape[0]
+        if self.total_preferences == 0:
+            return np.full(solution_count, 100.0)
+
+        matches = self.preference_table[self.column_preferences[None, :], slot_indices].sum(axis=1)
+        return matches / self.total_preferences * 100
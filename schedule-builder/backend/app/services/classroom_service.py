@@ -12,6 +12,12 @@ class ClassroomService:
         self.classrooms[classroom.id] = classroom
         return classroom
     
+    def load_classrooms(self, classrooms: List[Classroom]):
+        """
+        Replace all classrooms at once (e.g. with those restored from the database)
+        """
+        self.classrooms = {classroom.id: classroom for classroom in classrooms}
+    
     def get_classroom(self, classroom_id: str) -> Optional[Classroom]:
         """
         Get a classroom by ID
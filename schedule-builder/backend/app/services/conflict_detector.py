@@ -1,17 +1,29 @@
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Optional
 from app.models.schedule import Schedule
 from app.models.lecture import Lecture
 from app.models.classroom import Classroom
+from app.models.time_slot import TimeSlot
+from app.models.group import Group
+from app.models.subgroup import Subgroup
 from app.services.time_slot_service import TimeSlotService
-import json
+from app.services.classroom_service import ClassroomService
+from app.services.group_size_estimator import GroupSizeEstimator
+from app.services.interval_sweep import Interval, slot_interval, find_overlaps
 
 class ConflictDetector:
-    def __init__(self, time_slot_service: TimeSlotService):
+    def __init__(self, time_slot_service: TimeSlotService, classroom_service: Optional[ClassroomService] = None):
         self.time_slot_service = time_slot_service
+        self.classroom_service = classroom_service
     
-    def detect_all_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> Dict[str, List]:
+    def detect_all_conflicts(self, schedules: List[Schedule], lectures: List[Lecture],
+                             groups: Optional[List[Group]] = None,
+                             subgroups: Optional[List[Subgroup]] = None) -> Dict[str, List]:
         """
-        Detect all types of conflicts in the schedule
+        Detect all types of conflicts in the schedule.
+        All categories are filled in a single pass over the schedules with shared
+        lecture and time slot lookups; the result is the same as running the
+        individual detect_* methods one after another.
+        Double-bookings are found by overlapping start/end times, not slot ids
         """
         conflicts = {
             "classroom_conflicts": [],
@@ -23,112 +35,317 @@ class ConflictDetector:
             "departmental_conflicts": []
         }
         
-        # Detect each type of conflict
-        conflicts["classroom_conflicts"] = self.detect_classroom_conflicts(schedules)
-        conflicts["professor_conflicts"] = self.detect_professor_conflicts(schedules)
-        conflicts["group_conflicts"] = self.detect_group_conflicts(schedules, lectures)
-        conflicts["time_slot_conflicts"] = self.detect_time_slot_conflicts(schedules, lectures)
-        conflicts["lecture_exercise_conflicts"] = self.detect_lecture_exercise_conflicts(schedules, lectures)
-        conflicts["capacity_conflicts"] = self.detect_capacity_conflicts(schedules, lectures)
-        conflicts["departmental_conflicts"] = self.detect_departmental_conflicts(schedules, lectures)
+        # Shared lookups
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        time_slot_cache = {}
+        size_estimator = self.get_size_estimator(groups, subgroups)
+        
+        # Per-category state; bookings are (resource, interval, item) for the overlap sweep
+        classroom_bookings = []
+        professor_bookings = []
+        group_bookings = []
+        lecture_names = set()
+        exercise_names = {}  # insertion-ordered set
+        dept_days = {}  # department -> [lecture count, days used]
+        
+        for schedule in schedules:
+            time_slot_id = schedule.time_slot_id
+            if time_slot_id not in time_slot_cache:
+                time_slot = self.time_slot_service.get_time_slot(time_slot_id)
+                time_slot_cache[time_slot_id] = (time_slot, slot_interval(time_slot_id, time_slot))
+            time_slot, interval = time_slot_cache[time_slot_id]
+            
+            # Classroom and professor double-booking (resolved by the sweep below)
+            classroom_bookings.append((schedule.classroom_id, interval, schedule))
+            professor_bookings.append((schedule.professor, interval, schedule))
+            
+            lecture = lecture_dict.get(schedule.lecture_id)
+            if not lecture:
+                continue
+            
+            # Group and subgroup double-booking
+            group_bookings.extend(self._group_bookings(lecture, interval, schedule))
+            
+            # Time slot validity and duration
+            time_slot_conflict = self._make_time_slot_conflict(schedule, lecture, time_slot)
+            if time_slot_conflict:
+                conflicts["time_slot_conflicts"].append(time_slot_conflict)
+            
+            # Room capacity against expected attendance
+            if size_estimator:
+                capacity_conflict = self._make_capacity_conflict(schedule, size_estimator.get_expected_size(lecture))
+                if capacity_conflict:
+                    conflicts["capacity_conflicts"].append(capacity_conflict)
+            
+            # Lecture/exercise pairing and departmental spread (checked after the pass)
+            self._record_lecture_kind(lecture, lecture_names, exercise_names)
+            self._record_department_day(lecture, time_slot, dept_days)
+        
+        conflicts["classroom_conflicts"] = self._classroom_overlaps(classroom_bookings)
+        conflicts["professor_conflicts"] = self._professor_overlaps(professor_bookings)
+        conflicts["group_conflicts"] = self._group_overlaps(group_bookings)
+        self._sort_by_deficit(conflicts["capacity_conflicts"])
+        
+        conflicts["lecture_exercise_conflicts"] = self._lecture_exercise_conflicts(lecture_names, exercise_names)
+        conflicts["departmental_conflicts"] = self._departmental_conflicts(dept_days)
         
         return conflicts
     
-    def detect_classroom_conflicts(self, schedules: List[Schedule]) -> List[Dict]:
+    def _get_interval(self, time_slot_id: str, cache: Dict[str, Interval]) -> Interval:
         """
-        Detect conflicts where the same classroom is booked for multiple lectures at the same time
+        Get the (day, start, end) interval of a time slot, memoized in cache
+        """
+        if time_slot_id not in cache:
+            cache[time_slot_id] = slot_interval(time_slot_id, self.time_slot_service.get_time_slot(time_slot_id))
+        return cache[time_slot_id]
+    
+    def _group_bookings(self, lecture: Lecture, interval: Interval, schedule: Schedule) -> List[Tuple]:
+        """
+        Group (and subgroup) bookings made by one schedule item
+        """
+        main_group = self._extract_main_group(lecture.grup_rreg)
+        bookings = [(main_group, interval, (schedule, 'group', main_group))]
+        if '.' in lecture.grup_rreg:
+            bookings.append((lecture.grup_rreg, interval, (schedule, 'subgroup', lecture.grup_rreg)))
+        return bookings
+    
+    def _classroom_overlaps(self, bookings: List[Tuple]) -> List[Dict]:
+        """
+        Classroom conflicts among (classroom, interval, schedule) bookings
+        """
+        return [self._make_classroom_conflict(first.id, schedule) for first, schedule in find_overlaps(bookings)]
+    
+    def _professor_overlaps(self, bookings: List[Tuple]) -> List[Dict]:
+        """
+        Professor conflicts among (professor, interval, schedule) bookings
+        """
+        return [self._make_professor_conflict(first.id, schedule) for first, schedule in find_overlaps(bookings)]
+    
+    def _group_overlaps(self, bookings: List[Tuple]) -> List[Dict]:
+        """
+        Group and subgroup conflicts among (group, interval, (schedule, kind, name)) bookings
         """
-        classroom_usage = {}
         conflicts = []
-        
-        for schedule in schedules:
-            key = (schedule.classroom_id, schedule.time_slot_id)
-            if key in classroom_usage:
-                # Conflict found
-                conflicts.append({
-                    "type": "classroom_conflict",
-                    "classroom_id": schedule.classroom_id,
-                    "time_slot_id": schedule.time_slot_id,
-                    "conflicting_schedules": [classroom_usage[key].id, schedule.id],
-                    "description": f"Classroom {schedule.classroom_id} double-booked at time slot {schedule.time_slot_id}"
-                })
+        for (first, _, _), (schedule, kind, name) in find_overlaps(bookings):
+            if kind == 'group':
+                conflicts.append(self._make_group_conflict(name, first.id, schedule))
             else:
-                classroom_usage[key] = schedule
-        
+                conflicts.append(self._make_subgroup_conflict(name, first.id, schedule))
         return conflicts
     
-    def detect_professor_conflicts(self, schedules: List[Schedule]) -> List[Dict]:
+    def _make_classroom_conflict(self, first_schedule_id: str, schedule: Schedule) -> Dict:
         """
-        Detect conflicts where the same professor is scheduled to teach multiple lectures at the same time
+        Conflict record for a classroom booked twice at the same time slot
         """
-        professor_usage = {}
-        conflicts = []
+        return {
+            "type": "classroom_conflict",
+            "classroom_id": schedule.classroom_id,
+            "time_slot_id": schedule.time_slot_id,
+            "conflicting_schedules": [first_schedule_id, schedule.id],
+            "description": f"Classroom {schedule.classroom_id} double-booked at time slot {schedule.time_slot_id}"
+        }
+    
+    def _make_professor_conflict(self, first_schedule_id: str, schedule: Schedule) -> Dict:
+        """
+        Conflict record for a professor booked twice at the same time slot
+        """
+        return {
+            "type": "professor_conflict",
+            "professor": schedule.professor,
+            "time_slot_id": schedule.time_slot_id,
+            "conflicting_schedules": [first_schedule_id, schedule.id],
+            "description": f"Professor {schedule.professor} double-booked at time slot {schedule.time_slot_id}"
+        }
+    
+    def _make_group_conflict(self, group: str, first_schedule_id: str, schedule: Schedule) -> Dict:
+        """
+        Conflict record for a student group booked twice at the same time slot
+        """
+        return {
+            "type": "group_conflict",
+            "group": group,
+            "time_slot_id": schedule.time_slot_id,
+            "conflicting_schedules": [first_schedule_id, schedule.id],
+            "description": f"Group {group} double-booked at time slot {schedule.time_slot_id}"
+        }
+    
+    def _make_subgroup_conflict(self, subgroup: str, first_schedule_id: str, schedule: Schedule) -> Dict:
+        """
+        Conflict record for a subgroup booked twice at the same time slot
+        """
+        return {
+            "type": "subgroup_conflict",
+            "subgroup": subgroup,
+            "time_slot_id": schedule.time_slot_id,
+            "conflicting_schedules": [first_schedule_id, schedule.id],
+            "description": f"Subgroup {subgroup} double-booked at time slot {schedule.time_slot_id}"
+        }
+    
+    def _make_time_slot_conflict(self, schedule: Schedule, lecture: Lecture, time_slot: Optional[TimeSlot]) -> Optional[Dict]:
+        """
+        Conflict record for an invalid or too short time slot (None if the slot fits)
+        """
+        if not time_slot:
+            return {
+                "type": "time_slot_conflict",
+                "schedule_id": schedule.id,
+                "issue": "invalid_time_slot",
+                "description": f"Schedule {schedule.id} references invalid time slot {schedule.time_slot_id}"
+            }
         
-        for schedule in schedules:
-            key = (schedule.professor, schedule.time_slot_id)
-            if key in professor_usage:
-                # Conflict found
-                conflicts.append({
-                    "type": "professor_conflict",
-                    "professor": schedule.professor,
-                    "time_slot_id": schedule.time_slot_id,
-                    "conflicting_schedules": [professor_usage[key].id, schedule.id],
-                    "description": f"Professor {schedule.professor} double-booked at time slot {schedule.time_slot_id}"
-                })
-            else:
-                professor_usage[key] = schedule
+        if time_slot.duration < lecture.time_per_lec_rreg:
+            return {
+                "type": "time_slot_conflict",
+                "schedule_id": schedule.id,
+                "issue": "insufficient_duration",
+                "description": f"Lecture {lecture.lenda_e_rreg} duration ({lecture.time_per_lec_rreg} min) exceeds time slot {time_slot.id} duration ({time_slot.duration} min)"
+            }
+        
+        return None
+    
+    def get_size_estimator(self, groups: Optional[List[Group]] = None,
+                           subgroups: Optional[List[Subgroup]] = None) -> Optional[GroupSizeEstimator]:
+        """
+        Expected attendance lookup for capacity checks (None when no classroom data is available)
+        """
+        if not self.classroom_service:
+            return None
+        return GroupSizeEstimator(groups or [], subgroups)
+    
+    def _make_capacity_conflict(self, schedule: Schedule, expected_size: Optional[int]) -> Optional[Dict]:
+        """
+        Conflict record for a classroom too small for the expected attendance
+        (None if it fits or the attendance is unknown)
+        """
+        if expected_size is None:
+            return None
+        classroom = self.classroom_service.get_classroom(schedule.classroom_id)
+        if not classroom or classroom.capacity >= expected_size:
+            return None
+        
+        deficit = expected_size - classroom.capacity
+        return {
+            "type": "capacity_conflict",
+            "schedule_id": schedule.id,
+            "classroom_id": classroom.id,
+            "time_slot_id": schedule.time_slot_id,
+            "capacity": classroom.capacity,
+            "expected_size": expected_size,
+            "deficit": deficit,
+            "description": f"Classroom {classroom.id} (capacity {classroom.capacity}) is {deficit} seats short for schedule {schedule.id} ({expected_size} students expected)"
+        }
+    
+    def _sort_by_deficit(self, capacity_conflicts: List[Dict]):
+        """
+        Order capacity conflicts so the largest seat deficits come first
+        """
+        capacity_conflicts.sort(key=lambda conflict: conflict["deficit"], reverse=True)
+    
+    def _make_lecture_exercise_conflict(self, exercise_name: str) -> Dict:
+        """
+        Conflict record for an exercise without a scheduled lecture
+        """
+        return {
+            "type": "lecture_exercise_conflict",
+            "exercise": exercise_name,
+            "issue": "missing_lecture",
+            "description": f"Exercise {exercise_name} scheduled without corresponding lecture"
+        }
+    
+    def _make_departmental_conflict(self, dept: str, days_used: List[str], lecture_count: int) -> Optional[Dict]:
+        """
+        Conflict record for a department spread across too many days (None if cohesive)
+        """
+        if lecture_count < 2:
+            return None
         
+        # If lectures are spread across too many days, flag as potential cohesion issue
+        if len(days_used) > 3 and lecture_count > 5:
+            return {
+                "type": "departmental_conflict",
+                "department": dept,
+                "days_used": days_used,
+                "lecture_count": lecture_count,
+                "issue": "poor_cohesion",
+                "description": f"Department {dept} lectures spread across {len(days_used)} days (may affect cohesion)"
+            }
+        
+        return None
+    
+    def _record_lecture_kind(self, lecture: Lecture, lecture_names: Set[str], exercise_names: Dict[str, None]):
+        """
+        Note the subject of a scheduled lecture or exercise for the pairing check
+        """
+        if lecture.status_lende_rreg == 'L':
+            lecture_names.add(lecture.lenda_e_rreg)
+        elif lecture.status_lende_rreg == 'U':
+            exercise_names[lecture.lenda_e_rreg] = None
+    
+    def _lecture_exercise_conflicts(self, lecture_names: Set[str], exercise_names: Dict[str, None]) -> List[Dict]:
+        """
+        Conflicts for the scheduled exercises whose lecture is not scheduled
+        """
+        return [
+            self._make_lecture_exercise_conflict(exercise_name)
+            for exercise_name in exercise_names if exercise_name not in lecture_names
+        ]
+    
+    def _record_department_day(self, lecture: Lecture, time_slot: Optional[TimeSlot], dept_days: Dict[str, List]):
+        """
+        Count a scheduled lecture and its day for its department
+        """
+        counts = dept_days.setdefault(lecture.dep_reale_rreg, [0, set()])
+        counts[0] += 1
+        if time_slot:
+            counts[1].add(time_slot.day)
+    
+    def _departmental_conflicts(self, dept_days: Dict[str, List]) -> List[Dict]:
+        """
+        Conflicts for the departments spread across too many days
+        """
+        conflicts = []
+        for dept, (lecture_count, days_used) in dept_days.items():
+            conflict = self._make_departmental_conflict(dept, list(days_used), lecture_count)
+            if conflict:
+                conflicts.append(conflict)
         return conflicts
     
+    def detect_classroom_conflicts(self, schedules: List[Schedule]) -> List[Dict]:
+        """
+        Detect conflicts where the same classroom is booked for multiple lectures at overlapping times
+        """
+        cache = {}
+        return self._classroom_overlaps([
+            (schedule.classroom_id, self._get_interval(schedule.time_slot_id, cache), schedule)
+            for schedule in schedules
+        ])
+    
+    def detect_professor_conflicts(self, schedules: List[Schedule]) -> List[Dict]:
+        """
+        Detect conflicts where the same professor is scheduled to teach multiple lectures at overlapping times
+        """
+        cache = {}
+        return self._professor_overlaps([
+            (schedule.professor, self._get_interval(schedule.time_slot_id, cache), schedule)
+            for schedule in schedules
+        ])
+    
     def detect_group_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> List[Dict]:
         """
-        Detect conflicts where the same student group is scheduled for multiple lectures at the same time
+        Detect conflicts where the same student group is scheduled for multiple lectures at overlapping times
         """
         # Create lecture lookup
         lecture_dict = {lecture.id: lecture for lecture in lectures}
         
-        group_usage = {}
-        conflicts = []
-        
+        cache = {}
+        bookings = []
         for schedule in schedules:
             lecture = lecture_dict.get(schedule.lecture_id)
             if not lecture:
                 continue
-                
-            # Handle main group
-            main_group = self._extract_main_group(lecture.grup_rreg)
-            key = (main_group, schedule.time_slot_id)
-            
-            if key in group_usage:
-                # Conflict found
-                conflicts.append({
-                    "type": "group_conflict",
-                    "group": main_group,
-                    "time_slot_id": schedule.time_slot_id,
-                    "conflicting_schedules": [group_usage[key].id, schedule.id],
-                    "description": f"Group {main_group} double-booked at time slot {schedule.time_slot_id}"
-                })
-            else:
-                group_usage[key] = schedule
-            
-            # Handle subgroup if it exists
-            if '.' in lecture.grup_rreg:
-                subgroup = lecture.grup_rreg
-                sub_key = (subgroup, schedule.time_slot_id)
-                
-                if sub_key in group_usage:
-                    # Conflict found
-                    conflicts.append({
-                        "type": "subgroup_conflict",
-                        "subgroup": subgroup,
-                        "time_slot_id": schedule.time_slot_id,
-                        "conflicting_schedules": [group_usage[sub_key].id, schedule.id],
-                        "description": f"Subgroup {subgroup} double-booked at time slot {schedule.time_slot_id}"
-                    })
-                else:
-                    group_usage[sub_key] = schedule
+            bookings.extend(self._group_bookings(lecture, self._get_interval(schedule.time_slot_id, cache), schedule))
         
-        return conflicts
+        return self._group_overlaps(bookings)
     
     def detect_time_slot_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> List[Dict]:
         """
@@ -138,82 +355,60 @@ class ConflictDetector:
         lecture_dict = {lecture.id: lecture for lecture in lectures}
         
         conflicts = []
-        
         for schedule in schedules:
             lecture = lecture_dict.get(schedule.lecture_id)
             if not lecture:
                 continue
             
-            time_slot = self.time_slot_service.get_time_slot(schedule.time_slot_id)
-            if not time_slot:
-                conflicts.append({
-                    "type": "time_slot_conflict",
-                    "schedule_id": schedule.id,
-                    "issue": "invalid_time_slot",
-                    "description": f"Schedule {schedule.id} references invalid time slot {schedule.time_slot_id}"
-                })
-                continue
-            
-            # Check if lecture duration fits in time slot
-            if time_slot.duration < lecture.time_per_lec_rreg:
-                conflicts.append({
-                    "type": "time_slot_conflict",
-                    "schedule_id": schedule.id,
-                    "issue": "insufficient_duration",
-                    "description": f"Lecture {lecture.lenda_e_rreg} duration ({lecture.time_per_lec_rreg} min) exceeds time slot {time_slot.id} duration ({time_slot.duration} min)"
-                })
+            conflict = self._make_time_slot_conflict(schedule, lecture, self.time_slot_service.get_time_slot(schedule.time_slot_id))
+            if conflict:
+                conflicts.append(conflict)
         
         return conflicts
     
     def detect_lecture_exercise_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> List[Dict]:
         """
-        Detect conflicts where exercises are scheduled before their corresponding lectures
+        Detect conflicts where exercises are scheduled without their corresponding lectures
         """
         # Create lecture lookup
         lecture_dict = {lecture.id: lecture for lecture in lectures}
         
-        # Separate lectures and exercises
-        lecture_schedules = {}
-        exercise_schedules = {}
+        lecture_names = set()
+        exercise_names = {}
+        for schedule in schedules:
+            lecture = lecture_dict.get(schedule.lecture_id)
+            if lecture:
+                self._record_lecture_kind(lecture, lecture_names, exercise_names)
+        
+        return self._lecture_exercise_conflicts(lecture_names, exercise_names)
+    
+    def detect_capacity_conflicts(self, schedules: List[Schedule], lectures: List[Lecture],
+                                  groups: Optional[List[Group]] = None,
+                                  subgroups: Optional[List[Subgroup]] = None) -> List[Dict]:
+        """
+        Detect conflicts where classroom capacity is insufficient for the expected
+        group size, largest seat deficit first
+        """
+        size_estimator = self.get_size_estimator(groups, subgroups)
+        if not size_estimator:
+            return []
+        
+        # Create lecture lookup
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
         
+        conflicts = []
         for schedule in schedules:
             lecture = lecture_dict.get(schedule.lecture_id)
             if not lecture:
                 continue
-                
-            if lecture.status_lende_rreg == 'L':
-                lecture_schedules[lecture.lenda_e_rreg] = schedule
-            elif lecture.status_lende_rreg == 'U':
-                exercise_schedules[lecture.lenda_e_rreg] = schedule
-        
-        conflicts = []
-        
-        # Check if exercises are scheduled after lectures
-        for exercise_name, exercise_schedule in exercise_schedules.items():
-            if exercise_name in lecture_schedules:
-                lecture_schedule = lecture_schedules[exercise_name]
-                
-                # In a more sophisticated implementation, we would compare actual time slots
-                # For now, we'll just note that both exist
-                pass
-            else:
-                conflicts.append({
-                    "type": "lecture_exercise_conflict",
-                    "exercise": exercise_name,
-                    "issue": "missing_lecture",
-                    "description": f"Exercise {exercise_name} scheduled without corresponding lecture"
-                })
+            
+            conflict = self._make_capacity_conflict(schedule, size_estimator.get_expected_size(lecture))
+            if conflict:
+                conflicts.append(conflict)
         
+        self._sort_by_deficit(conflicts)
         return conflicts
     
-    def detect_capacity_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> List[Dict]:
-        """
-        Detect conflicts where classroom capacity is insufficient
-        """
-        # This would require access to classroom data which is not passed to this method
-        # In a full implementation, we would check classroom capacity against expected attendance
-        return []
-    
     def detect_departmental_conflicts(self, schedules: List[Schedule], lectures: List[Lecture]) -> List[Dict]:
         """
         Detect conflicts related to departmental scheduling preferences
@@ -221,45 +416,13 @@ class ConflictDetector:
         # Create lecture lookup
         lecture_dict = {lecture.id: lecture for lecture in lectures}
         
-        # Group schedules by department
-        dept_schedules = {}
-        
+        dept_days = {}
         for schedule in schedules:
             lecture = lecture_dict.get(schedule.lecture_id)
-            if not lecture:
-                continue
-                
-            dept = lecture.dep_reale_rreg
-            if dept not in dept_schedules:
-                dept_schedules[dept] = []
-            dept_schedules[dept].append((schedule, lecture))
-        
-        conflicts = []
+            if lecture:
+                self._record_department_day(lecture, self.time_slot_service.get_time_slot(schedule.time_slot_id), dept_days)
         
-        # Check for departmental cohesion issues
-        for dept, dept_scheds in dept_schedules.items():
-            if len(dept_scheds) < 2:
-                continue
-                
-            # Count days used by this department
-            days_used = set()
-            for schedule, lecture in dept_scheds:
-                time_slot = self.time_slot_service.get_time_slot(schedule.time_slot_id)
-                if time_slot:
-                    days_used.add(time_slot.day)
-            
-            # If lectures are spread across too many days, flag as potential cohesion issue
-            if len(days_used) > 3 and len(dept_scheds) > 5:
-                conflicts.append({
-                    "type": "departmental_conflict",
-                    "department": dept,
-                    "days_used": list(days_used),
-                    "lecture_count": len(dept_scheds),
-                    "issue": "poor_cohesion",
-                    "description": f"Department {dept} lectures spread across {len(days_used)} days (may affect cohesion)"
-                })
-        
-        return conflicts
+        return self._departmental_conflicts(dept_days)
     
     def _extract_main_group(self, group_id: str) -> str:
         """
@@ -0,0 +1,402 @@
+import bisect
+from itertools import count
+from typing import List, Dict, Tuple, Set, Optional
+from app.models.schedule import Schedule
+from app.models.lecture import Lecture
+from app.models.group import Group
+from app.models.subgroup import Subgroup
+from app.services.conflict_detector import ConflictDetector
+from app.services.interval_sweep import Interval
+from datetime import datetime
+
+class ConflictIndex:
+    def __init__(self, conflict_detector: ConflictDetector):
+        self.conflict_detector = conflict_detector
+        self.time_slot_service = conflict_detector.time_slot_service
+        self.lecture_dict: Dict[str, Lecture] = {}
+        self.schedules: Dict[str, Schedule] = {}
+        self.size_estimator = None
+        self.version = 0  # bumped on every rebuild (lectures, groups or slots may have changed)
+        self._reset()
+
+    def _reset(self):
+        """
+        Clear all indexed state
+        """
+        self.schedules = {}
+        self.assignment_hash = 0  # order-independent hash of the indexed assignments
+        self._conflicts_cache: Optional[Tuple[Tuple[int, int], Dict[str, List]]] = None
+        self.interval_cache: Dict[str, Interval] = {}  # time_slot_id -> (day, start, end)
+        # Occupancy per (resource, day): ((start, seq), interval, booking) sorted by
+        # start time, ties in insertion order (the order find_overlaps sweeps in)
+        self.classroom_usage: Dict[Tuple[str, str], List[Tuple[Tuple, Interval, str]]] = {}
+        self.professor_usage: Dict[Tuple[str, str], List[Tuple[Tuple, Interval, str]]] = {}
+        self.group_usage: Dict[Tuple[str, str], List[Tuple[Tuple, Interval, Tuple[str, str, str]]]] = {}  # (schedule_id, kind, name)
+        # (resource, day) keys with overlapping bookings -> booking -> bookings it overlaps
+        self.conflicted_classrooms: Dict[Tuple[str, str], Dict] = {}
+        self.conflicted_professors: Dict[Tuple[str, str], Dict] = {}
+        self.conflicted_groups: Dict[Tuple[str, str], Dict] = {}
+        self._booking_seq = count()
+        self.longest_booking = 0  # upper bound on booking length, limits the backward sweep
+        # Per-schedule and per-name conflict state
+        self.time_slot_conflicts: Dict[str, Dict] = {}  # schedule_id -> conflict record
+        self.capacity_conflicts: Dict[str, Dict] = {}  # schedule_id -> conflict record
+        self.course_counts: Dict[str, List[int]] = {}  # course name -> [lectures, exercises]
+        self.missing_lectures: Dict[str, None] = {}  # exercises without a lecture
+        self.department_counts: Dict[str, int] = {}  # department -> scheduled lectures
+        self.department_days: Dict[str, Dict[str, int]] = {}  # department -> day -> scheduled lectures
+        self.poor_cohesion_departments: Dict[str, None] = {}
+
+    def rebuild(self, schedules: List[Schedule], lectures: List[Lecture],
+                groups: Optional[List[Group]] = None, subgroups: Optional[List[Subgroup]] = None):
+        """
+        Index a whole schedule from scratch
+        """
+        self._reset()
+        self.version += 1
+        self.lecture_dict = {lecture.id: lecture for lecture in lectures}
+        self.size_estimator = self.conflict_detector.get_size_estimator(groups, subgroups)
+        for schedule in schedules:
+            self.add_schedule(schedule)
+
+    def add_schedule(self, schedule: Schedule):
+        """
+        Index a newly inserted schedule item
+        """
+        self.schedules[schedule.id] = schedule
+        self._update(schedule, 1)
+
+    def remove_schedule(self, schedule_id: str) -> Optional[Schedule]:
+        """
+        Remove a schedule item from the index, returning it
+        """
+        schedule = self.schedules.get(schedule_id)
+        if not schedule:
+            return None
+        self._update(schedule, -1)
+        del self.schedules[schedule_id]
+        return schedule
+
+    def move_schedule(self, schedule_id: str, time_slot_id: str, classroom_id: str) -> Optional[Schedule]:
+        """
+        Move a schedule item to another time slot and classroom
+        """
+        schedule = self.remove_schedule(schedule_id)
+        if not schedule:
+            return None
+        schedule.time_slot_id = time_slot_id
+        schedule.classroom_id = classroom_id
+        schedule.updated_at = datetime.now()
+        self.add_schedule(schedule)
+        return schedule
+
+    def get_fingerprint(self) -> Tuple[int, int]:
+        """
+        Fingerprint of the indexed schedule; it changes whenever an assignment
+        changes or the index is rebuilt
+        """
+        return (self.version, self.assignment_hash)
+
+    def _assignment_key(self, schedule: Schedule) -> int:
+        """
+        Hash of one schedule item's assignment, combined into the fingerprint by addition
+        """
+        return hash((schedule.id, schedule.lecture_id, schedule.time_slot_id,
+                     schedule.classroom_id, schedule.professor)) & 0xFFFFFFFFFFFFFFFF
+
+    def _update(self, schedule: Schedule, delta: int):
+        """
+        Add (delta=1) or remove (delta=-1) a schedule item in every structure
+        """
+        self.assignment_hash = (self.assignment_hash + delta * self._assignment_key(schedule)) & 0xFFFFFFFFFFFFFFFF
+        time_slot_id = schedule.time_slot_id
+        interval = self.conflict_detector._get_interval(time_slot_id, self.interval_cache)
+        self._change(self.classroom_usage, self.conflicted_classrooms,
+                     schedule.classroom_id, interval, schedule.id, delta)
+        self._change(self.professor_usage, self.conflicted_professors,
+                     schedule.professor, interval, schedule.id, delta)
+
+        lecture = self.lecture_dict.get(schedule.lecture_id)
+        if not lecture:
+            return
+
+        # Same group and subgroup keys as ConflictDetector.detect_group_conflicts
+        for group, _, (_, kind, name) in self.conflict_detector._group_bookings(lecture, interval, schedule):
+            self._change(self.group_usage, self.conflicted_groups,
+                         group, interval, (schedule.id, kind, name), delta)
+
+        time_slot = self.time_slot_service.get_time_slot(time_slot_id)
+        if delta > 0:
+            record = self.conflict_detector._make_time_slot_conflict(schedule, lecture, time_slot)
+            if record:
+                self.time_slot_conflicts[schedule.id] = record
+        else:
+            self.time_slot_conflicts.pop(schedule.id, None)
+
+        if self.size_estimator:
+            record = None
+            if delta > 0:
+                record = self.conflict_detector._make_capacity_conflict(
+                    schedule, self.size_estimator.get_expected_size(lecture)
+                )
+            if record:
+                self.capacity_conflicts[schedule.id] = record
+            else:
+                self.capacity_conflicts.pop(schedule.id, None)
+
+        self._update_course(lecture, delta)
+        self._update_department(lecture.dep_reale_rreg, time_slot.day if time_slot else None, delta)
+
+    def _change(self, usage: Dict[Tuple[str, str], List], conflicted: Dict[Tuple[str, str], Dict],
+                resource: str, interval: Interval, entry, delta: int):
+        """
+        Add or remove one booking of a resource, sweeping only the bookings
+        of that resource's day that start near it
+        """
+        key = (resource, interval[0])
+        _, start, end = interval
+        if delta > 0:
+            bookings = usage.setdefault(key, [])
+            booking = ((start, next(self._booking_seq)), interval, entry)
+            position = bisect.bisect_right(bookings, (booking[0],))
+            bookings.insert(position, booking)
+            self.longest_booking = max(self.longest_booking, end - start)
+
+            # A sorted-earlier booking overlaps a later one if it is still running when
+            # the later one starts (the same rule as find_overlaps)
+            overlapping = []
+            for i in range(position - 1, -1, -1):
+                (other_start, _), (_, _, other_end), other = bookings[i]
+                if other_start + self.longest_booking <= start:
+                    break
+                if other_end > start:
+                    overlapping.append(other)
+            for i in range(position + 1, len(bookings)):
+                (other_start, _), _, other = bookings[i]
+                if other_start >= end:
+                    break
+                overlapping.append(other)
+
+            if overlapping:
+                overlaps = conflicted.setdefault(key, {})
+                overlaps[entry] = set(overlapping)
+                for other in overlapping:
+                    overlaps.setdefault(other, set()).add(entry)
+        else:
+            bookings = usage.get(key, [])
+            position = bisect.bisect_left(bookings, ((start,),))
+            while position < len(bookings) and bookings[position][0][0] == start:
+                if bookings[position][1:] == (interval, entry):
+                    del bookings[position]
+                    break
+                position += 1
+            if not bookings:
+                usage.pop(key, None)
+
+            overlaps = conflicted.get(key)
+            if overlaps and entry in overlaps:
+                for other in overlaps.pop(entry):
+                    overlaps[other].discard(entry)
+                    if not overlaps[other]:
+                        del overlaps[other]
+                if not overlaps:
+                    del conflicted[key]
+
+    def _overlaps(self, usage: Dict[Tuple[str, str], List], conflicted: Dict[Tuple[str, str], Dict],
+                  key: Tuple[str, str]) -> List[Tuple]:
+        """
+        Overlapping (first, later) booking pairs of one (resource, day) key, in
+        find_overlaps order: each overlapped booking paired with the earliest
+        booking still running when it starts
+        """
+        overlaps = conflicted[key]
+        position = {entry: i for i, (_, _, entry) in enumerate(usage[key])}
+        pairs = []
+        for i, (_, _, entry) in enumerate(usage[key]):
+            earlier = [other for other in overlaps.get(entry, ()) if position[other] < i]
+            if earlier:
+                pairs.append((min(earlier, key=position.get), entry))
+        return pairs
+
+    def _update_course(self, lecture: Lecture, delta: int):
+        """
+        Track lectures and exercises per course name
+        """
+        if lecture.status_lende_rreg not in ('L', 'U'):
+            return
+
+        counts = self.course_counts.setdefault(lecture.lenda_e_rreg, [0, 0])
+        counts[0 if lecture.status_lende_rreg == 'L' else 1] += delta
+
+        if counts[1] > 0 and counts[0] == 0:
+            self.missing_lectures[lecture.lenda_e_rreg] = None
+        else:
+            self.missing_lectures.pop(lecture.lenda_e_rreg, None)
+        if counts == [0, 0]:
+            del self.course_counts[lecture.lenda_e_rreg]
+
+    def _update_department(self, dept: str, day: Optional[str], delta: int):
+        """
+        Track lecture and day counts per department
+        """
+        self.department_counts[dept] = self.department_counts.get(dept, 0) + delta
+        days = self.department_days.setdefault(dept, {})
+        if day:
+            days[day] = days.get(day, 0) + delta
+            if days[day] <= 0:
+                del days[day]
+
+        if self.conflict_detector._make_departmental_conflict(dept, list(days), self.department_counts[dept]):
+            self.poor_cohesion_departments[dept] = None
+        else:
+            self.poor_cohesion_departments.pop(dept, None)
+
+        if self.department_counts[dept] <= 0:
+            del self.department_counts[dept]
+            del self.department_days[dept]
+
+    def get_conflicts(self) -> Dict[str, List]:
+        """
+        Current conflicts in the same format as ConflictDetector.detect_all_conflicts.
+        Only (resource, day) keys with overlaps are visited, and the result is
+        reused until the fingerprint changes (treat it as read-only)
+        """
+        fingerprint = self.get_fingerprint()
+        if self._conflicts_cache and self._conflicts_cache[0] == fingerprint:
+            return self._conflicts_cache[1]
+
+        detector = self.conflict_detector
+        conflicts = {
+            "classroom_conflicts": [],
+            "professor_conflicts": [],
+            "group_conflicts": [],
+            "time_slot_conflicts": list(self.time_slot_conflicts.values()),
+            "lecture_exercise_conflicts": [],
+            "capacity_conflicts": list(self.capacity_conflicts.values()),
+            "departmental_conflicts": []
+        }
+
+        for key in self.conflicted_classrooms:
+            for first_id, schedule_id in self._overlaps(self.classroom_usage, self.conflicted_classrooms, key):
+                conflicts["classroom_conflicts"].append(detector._make_classroom_conflict(first_id, self.schedules[schedule_id]))
+
+        for key in self.conflicted_professors:
+            for first_id, schedule_id in self._overlaps(self.professor_usage, self.conflicted_professors, key):
+                conflicts["professor_conflicts"].append(detector._make_professor_conflict(first_id, self.schedules[schedule_id]))
+
+        for key in self.conflicted_groups:
+            for (first_id, _, _), (schedule_id, kind, name) in self._overlaps(self.group_usage, self.conflicted_groups, key):
+                if kind == 'group':
+                    record = detector._make_group_conflict(name, first_id, self.schedules[schedule_id])
+                else:
+                    record = detector._make_subgroup_conflict(name, first_id, self.schedules[schedule_id])
+                conflicts["group_conflicts"].append(record)
+
+        for exercise_name in self.missing_lectures:
+            conflicts["lecture_exercise_conflicts"].append(detector._make_lecture_exercise_conflict(exercise_name))
+
+        for dept in self.poor_cohesion_departments:
+            conflicts["departmental_conflicts"].append(detector._make_departmental_conflict(
+                dept, list(self.department_days[dept]), self.department_counts[dept]
+            ))
+
+        detector._sort_by_deficit(conflicts["capacity_conflicts"])
+        self._conflicts_cache = (fingerprint, conflicts)
+        return conflicts
+
+    def placement_conflicts(self, schedule_id: str, time_slot_id: str, classroom_id: str,
+                            ignore_ids: Tuple[str, ...] = ()) -> List[Dict]:
+        """
+        Conflicts an indexed schedule item would have if it were placed at the
+        given time slot and classroom, read from the index without changing it.
+        Every record names the other schedule involved (if any); bookings of
+        ignore_ids are skipped
+        """
+        ignored = set(ignore_ids) | {schedule_id}
+        schedule = self.schedules[schedule_id]
+        placed = schedule.copy(update={'time_slot_id': time_slot_id, 'classroom_id': classroom_id})
+        interval = self.conflict_detector._get_interval(time_slot_id, self.interval_cache)
+        detector = self.conflict_detector
+        conflicts = []
+
+        for other_id in self._overlapping(self.classroom_usage, classroom_id, interval, ignored):
+            conflicts.append(dict(detector._make_classroom_conflict(other_id, placed), with_schedule=other_id))
+        for other_id in self._overlapping(self.professor_usage, schedule.professor, interval, ignored):
+            conflicts.append(dict(detector._make_professor_conflict(other_id, placed), with_schedule=other_id))
+
+        lecture = self.lecture_dict.get(schedule.lecture_id)
+        if not lecture:
+            return conflicts
+
+        for group, _, (_, kind, name) in detector._group_bookings(lecture, interval, placed):
+            for other_id, _, _ in self._overlapping(self.group_usage, group, interval, ignored):
+                if kind == 'group':
+                    record = detector._make_group_conflict(name, other_id, placed)
+                else:
+                    record = detector._make_subgroup_conflict(name, other_id, placed)
+                conflicts.append(dict(record, with_schedule=other_id))
+
+        time_slot = self.time_slot_service.get_time_slot(time_slot_id)
+        record = detector._make_time_slot_conflict(placed, lecture, time_slot)
+        if record:
+            conflicts.append(record)
+        if self.size_estimator:
+            record = detector._make_capacity_conflict(placed, self.size_estimator.get_expected_size(lecture))
+            if record:
+                conflicts.append(record)
+
+        # Department spread after moving this item from its current day
+        dept = lecture.dep_reale_rreg
+        days = dict(self.department_days.get(dept, {}))
+        current_slot = self.time_slot_service.get_time_slot(schedule.time_slot_id)
+        if current_slot and current_slot.day in days:
+            days[current_slot.day] -= 1
+            if days[current_slot.day] <= 0:
+                del days[current_slot.day]
+        if time_slot:
+            days[time_slot.day] = days.get(time_slot.day, 0) + 1
+        record = detector._make_departmental_conflict(dept, list(days), self.department_counts.get(dept, 0))
+        if record:
+            conflicts.append(record)
+
+        return conflicts
+
+    def move_conflict_changes(self, schedule_id: str, time_slot_id: str, classroom_id: str,
+                              ignore_ids: Tuple[str, ...] = ()) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Conflicts a move of one schedule item would introduce and resolve,
+        as (introduced, resolved)
+        """
+        current = self.schedules[schedule_id]
+        before = self.placement_conflicts(schedule_id, current.time_slot_id, current.classroom_id, ignore_ids)
+        after = self.placement_conflicts(schedule_id, time_slot_id, classroom_id, ignore_ids)
+        before_keys = {self._conflict_key(conflict) for conflict in before}
+        after_keys = {self._conflict_key(conflict) for conflict in after}
+        return (
+            [conflict for conflict in after if self._conflict_key(conflict) not in before_keys],
+            [conflict for conflict in before if self._conflict_key(conflict) not in after_keys]
+        )
+
+    def _conflict_key(self, conflict: Dict) -> Tuple:
+        """
+        Identity of a conflict independent of where the moved item sits
+        """
+        return (conflict["type"], conflict.get("with_schedule"), conflict.get("issue"))
+
+    def _overlapping(self, usage: Dict[Tuple[str, str], List], resource: str, interval: Interval,
+                     ignored: Set[str]) -> List:
+        """
+        Bookings of a resource overlapping an interval, skipping bookings of ignored schedule items
+        """
+        day, start, end = interval
+        return [
+            entry for _, (other_day, other_start, other_end), entry in usage.get((resource, day), [])
+            if other_start < end and start < other_end
+            and (entry if isinstance(entry, str) else entry[0]) not in ignored
+        ]
+
+    def get_schedules(self) -> List[Schedule]:
+        """
+        All indexed schedule items
+        """
+        return list(self.schedules.values())
@@ -1,101 +1,303 @@
 import sqlite3
 import json
-from typing import List, Optional, Dict, Any
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterator, Iterable, Tuple
 from app.models.schedule import Schedule
 from app.models.lecture import Lecture
 from app.models.classroom import Classroom
-from app.models.time_slot import TimeSlot
+from app.models.time_slot import TimeSlot, TimeSlotConfiguration
+from app.services.version_codec import encode_snapshot, decode_snapshot, is_snapshot, read_snapshot_header
 from datetime import datetime
 import os
 
+# Applied to every pooled connection: write-ahead logging so readers never
+# block the writer, fsync only at checkpoints, memory-mapped reads and a
+# 64 MB page cache
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA busy_timeout=5000'
+)
+
+# Table columns of the relational lectures, classrooms and time_slots tables
+LECTURE_COLUMNS = tuple(Lecture.__fields__)
+CLASSROOM_COLUMNS = tuple(Classroom.__fields__)
+TIME_SLOT_COLUMNS = tuple(TimeSlot.__fields__)
+
+# Ids per "id IN (...)" lookup, below the parameter limit of older SQLite builds
+ID_LOOKUP_CHUNK = 500
+
 class DatabaseService:
-    def __init__(self, db_path: str = "schedule.db"):
+    def __init__(self, db_path: str = "schedule.db", bulk_chunk_size: int = 1000,
+                 snapshot_interval: int = 20):
         self.db_path = db_path
+        # Rows per executemany call in bulk saves
+        self.bulk_chunk_size = bulk_chunk_size
+        # A full schedule version is stored at least every snapshot_interval versions
+        self.snapshot_interval = snapshot_interval
+        # (version id, schedule rows) of the last version saved or read, the usual delta parent
+        self._version_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+        # One connection per thread, opened on first use and kept until close()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Write transactions of this process queue here rather than polling SQLite's lock
+        self._write_lock = threading.Lock()
         self.init_database()
     
-    def init_database(self):
+    def get_connection(self) -> sqlite3.Connection:
         """
-        Initialize the database with required tables
+        Get the calling thread's connection, opening and tuning it on first use
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly by transaction()
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Run statements in one write transaction on the calling thread's connection.
+        Commits when the block finishes and rolls back if it raises; nested
+        blocks join the outermost transaction
+        """
+        conn = self.get_connection()
         cursor = conn.cursor()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield cursor
+            finally:
+                self._local.depth -= 1
+            return
         
-        # Create schedules table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedules (
-                id TEXT PRIMARY KEY,
-                lecture_id TEXT NOT NULL,
-                time_slot_id TEXT NOT NULL,
-                classroom_id TEXT NOT NULL,
-                professor TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create lectures table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS lectures (
-                id TEXT PRIMARY KEY,
-                data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create classrooms table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS classrooms (
-                id TEXT PRIMARY KEY,
-                data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create time_slots table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS time_slots (
-                id TEXT PRIMARY KEY,
-                data TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        # Take the write lock up front: a deferred transaction that reads and then
+        # writes fails at once with "database is locked" when another connection
+        # is writing, without waiting for busy_timeout. busy_timeout still covers
+        # writers in other processes
+        with self._write_lock:
+            conn.execute('BEGIN IMMEDIATE')
+            self._local.depth = 1
+            try:
+                yield cursor
+                conn.execute('COMMIT')
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            finally:
+                self._local.depth = 0
+    
+    def _execute_chunked(self, cursor: sqlite3.Cursor, sql: str, rows: Iterable[Tuple]):
+        """
+        executemany over rows in chunks, so only one chunk of parameters is built at a time
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, self.bulk_chunk_size))
+            if not chunk:
+                break
+            cursor.executemany(sql, chunk)
+    
+    def close(self):
+        """
+        Close every pooled connection (threads reopen one on their next query)
+        """
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def init_database(self):
+        """
+        Initialize the database with required tables
+        """
+        with self.transaction() as cursor:
+            # Create schedules table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schedules (
+                    id TEXT PRIMARY KEY,
+                    lecture_id TEXT NOT NULL,
+                    time_slot_id TEXT NOT NULL,
+                    classroom_id TEXT NOT NULL,
+                    professor TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    pinned INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # Databases created before schedule pinning lack the pinned column
+            cursor.execute('PRAGMA table_info(schedules)')
+            if 'pinned' not in [column[1] for column in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE schedules ADD COLUMN pinned INTEGER DEFAULT 0')
+            
+            # Filter columns followed by id, so filtered keyset pages are read straight off an index
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_professor ON schedules (professor, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_classroom ON schedules (classroom_id, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_time_slot ON schedules (time_slot_id, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_schedules_lecture ON schedules (lecture_id, id)')
+            
+            # Databases from before the relational schema stored these tables as JSON blobs
+            blob_rows = {table: self._drop_blob_table(cursor, table) for table in ('lectures', 'classrooms', 'time_slots')}
+            
+            # Create lectures table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS lectures (
+                    id TEXT PRIMARY KEY,
+                    lenda_e_rreg TEXT NOT NULL,
+                    dep_reale_rreg TEXT NOT NULL,
+                    sem_rreg TEXT NOT NULL,
+                    niveli_rreg TEXT NOT NULL,
+                    viti_rreg TEXT NOT NULL,
+                    prof_rreg TEXT NOT NULL,
+                    grup_rreg TEXT NOT NULL,
+                    status_lende_rreg TEXT NOT NULL,
+                    qasja_lende_rreg TEXT NOT NULL,
+                    mesimdhe_lende_rreg TEXT NOT NULL,
+                    time_per_lec_rreg INTEGER NOT NULL,
+                    time_preference TEXT,
+                    related_lecture TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lectures_professor ON lectures (prof_rreg)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lectures_group ON lectures (grup_rreg)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_lectures_department ON lectures (dep_reale_rreg)')
+            
+            # Create classrooms table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS classrooms (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    capacity INTEGER NOT NULL,
+                    equipment TEXT,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_classrooms_capacity ON classrooms (capacity)')
+            
+            # Create time_slots table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS time_slots (
+                    id TEXT PRIMARY KEY,
+                    day TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    duration INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_time_slots_day ON time_slots (day, start_time)')
+            
+            # Create settings table (one JSON document per key, e.g. the time slot configuration)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settings (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Move the blob rows over, keeping their creation times
+            self._migrate_blob_rows(cursor, 'lectures', Lecture, LECTURE_COLUMNS, blob_rows['lectures'])
+            self._migrate_blob_rows(cursor, 'classrooms', Classroom, CLASSROOM_COLUMNS, blob_rows['classrooms'])
+            self._migrate_blob_rows(cursor, 'time_slots', TimeSlot, TIME_SLOT_COLUMNS, blob_rows['time_slots'])
+            
+            # Create schedule_versions table for versioning. A 'full' version stores
+            # every schedule item (as a binary snapshot, or JSON for older versions);
+            # a 'delta' version stores the items changed since its parent version as
+            # JSON. lectures_from points at the version holding the lecture_data that applies
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schedule_versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    schedule_data TEXT NOT NULL,
+                    version_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    lecture_data TEXT,
+                    storage TEXT DEFAULT 'full',
+                    parent_id INTEGER,
+                    chain_length INTEGER DEFAULT 0,
+                    lectures_from INTEGER
+                )
+            ''')
+            
+            # Versions saved before warm starts and delta storage lack the newer columns
+            cursor.execute('PRAGMA table_info(schedule_versions)')
+            version_columns = [column[1] for column in cursor.fetchall()]
+            for column, declaration in (('lecture_data', 'TEXT'), ('storage', "TEXT DEFAULT 'full'"),
+                                        ('parent_id', 'INTEGER'), ('chain_length', 'INTEGER DEFAULT 0'),
+                                        ('lectures_from', 'INTEGER')):
+                if column not in version_columns:
+                    cursor.execute(f'ALTER TABLE schedule_versions ADD COLUMN {column} {declaration}')
+    
+    def _drop_blob_table(self, cursor: sqlite3.Cursor, table: str) -> List[Tuple[str, Optional[str]]]:
+        """
+        Drop a table still in the old (id, data, created_at) JSON blob layout,
+        returning its (data, created_at) rows. Returns nothing for other tables
+        """
+        cursor.execute(f'PRAGMA table_info({table})')
+        if 'data' not in [column[1] for column in cursor.fetchall()]:
+            return []
         
-        # Create schedule_versions table for versioning
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedule_versions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schedule_data TEXT NOT NULL,
-                version_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
+        cursor.execute(f'SELECT data, created_at FROM {table}')
+        rows = cursor.fetchall()
+        cursor.execute(f'DROP TABLE {table}')
+        return rows
+    
+    def _migrate_blob_rows(self, cursor: sqlite3.Cursor, table: str, model_class,
+                           columns: Tuple[str, ...], rows: List[Tuple[str, Optional[str]]]):
+        """
+        Insert JSON blob rows into the relational version of their table
+        """
+        values = []
+        for data, created_at in rows:
+            try:
+                model = model_class(**json.loads(data))
+            except ValueError as e:
+                print(f"Skipping unreadable {table} row during migration: {e}")
+                continue
+            values.append(tuple(getattr(model, column) for column in columns) + (created_at,))
         
-        conn.commit()
-        conn.close()
+        self._execute_chunked(cursor, f'''
+            INSERT OR REPLACE INTO {table} ({', '.join(columns)}, created_at)
+            VALUES ({', '.join('?' * (len(columns) + 1))})
+        ''', values)
     
     def save_schedule(self, schedule: Schedule) -> bool:
         """
         Save a schedule to the database
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO schedules 
-                (id, lecture_id, time_slot_id, classroom_id, professor, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                schedule.id,
-                schedule.lecture_id,
-                schedule.time_slot_id,
-                schedule.classroom_id,
-                schedule.professor,
-                datetime.now().isoformat()
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO schedules 
+                    (id, lecture_id, time_slot_id, classroom_id, professor, updated_at, pinned)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    schedule.id,
+                    schedule.lecture_id,
+                    schedule.time_slot_id,
+                    schedule.classroom_id,
+                    schedule.professor,
+                    datetime.now().isoformat(),
+                    int(schedule.pinned)
+                ))
             return True
         except Exception as e:
             print(f"Error saving schedule: {e}")
@@ -106,25 +308,21 @@ class DatabaseService:
         Save multiple schedules to the database
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            for schedule in schedules:
-                cursor.execute('''
+            updated_at = datetime.now().isoformat()
+            with self.transaction() as cursor:
+                self._execute_chunked(cursor, '''
                     INSERT OR REPLACE INTO schedules 
-                    (id, lecture_id, time_slot_id, classroom_id, professor, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
+                    (id, lecture_id, time_slot_id, classroom_id, professor, updated_at, pinned)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', ((
                     schedule.id,
                     schedule.lecture_id,
                     schedule.time_slot_id,
                     schedule.classroom_id,
                     schedule.professor,
-                    datetime.now().isoformat()
-                ))
-            
-            conn.commit()
-            conn.close()
+                    updated_at,
+                    int(schedule.pinned)
+                ) for schedule in schedules))
             return True
         except Exception as e:
             print(f"Error saving schedules: {e}")
@@ -135,23 +333,13 @@ class DatabaseService:
         Retrieve a schedule by ID
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.get_connection().cursor()
             
             cursor.execute('SELECT * FROM schedules WHERE id = ?', (schedule_id,))
             row = cursor.fetchone()
-            conn.close()
             
             if row:
-                return Schedule(
-                    id=row[0],
-                    lecture_id=row[1],
-                    time_slot_id=row[2],
-                    classroom_id=row[3],
-                    professor=row[4],
-                    created_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                    updated_at=datetime.fromisoformat(row[6]) if row[6] else None
-                )
+                return self._schedule_from_row(row)
             return None
         except Exception as e:
             print(f"Error retrieving schedule: {e}")
@@ -162,206 +350,506 @@ class DatabaseService:
         Retrieve all schedules
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            cursor = self.get_connection().cursor()
             
             cursor.execute('SELECT * FROM schedules ORDER BY created_at DESC')
             rows = cursor.fetchall()
-            conn.close()
-            
-            schedules = []
-            for row in rows:
-                schedule = Schedule(
-                    id=row[0],
-                    lecture_id=row[1],
-                    time_slot_id=row[2],
-                    classroom_id=row[3],
-                    professor=row[4],
-                    created_at=datetime.fromisoformat(row[5]) if row[5] else None,
-                    updated_at=datetime.fromisoformat(row[6]) if row[6] else None
-                )
-                schedules.append(schedule)
             
-            return schedules
+            return [self._schedule_from_row(row) for row in rows]
         except Exception as e:
             print(f"Error retrieving schedules: {e}")
             return []
     
+    def query_schedules(self, professor: Optional[str] = None, classroom_id: Optional[str] = None,
+                        time_slot_ids: Optional[List[str]] = None, department: Optional[str] = None,
+                        version_id: Optional[int] = None, after_id: Optional[str] = None,
+                        limit: int = 100) -> Optional[List[Schedule]]:
+        """
+        Retrieve one page of schedules in id order, filtered by professor,
+        classroom, time slots and lecture department. Pass the last id of a
+        page as after_id to get the next one. Ids are looked up first and only
+        the page's rows are read from the table; unfiltered or filtered by
+        professor or classroom alone, that lookup is answered from an index
+        without touching the table. With version_id the page
+        comes from a saved version instead of the current schedule (None if
+        the version does not exist); versions are stored as encoded snapshots
+        and deltas, so that version is decoded and filtered in memory
+        """
+        try:
+            cursor = self.get_connection().cursor()
+            if version_id is not None:
+                return self._query_version_schedules(cursor, version_id, professor, classroom_id,
+                                                     time_slot_ids, department, after_id, limit)
+            
+            conditions = []
+            if professor is not None:
+                conditions.append(('professor = ?', [professor]))
+            if classroom_id is not None:
+                conditions.append(('classroom_id = ?', [classroom_id]))
+            if time_slot_ids is not None:
+                conditions.append((f"time_slot_id IN ({', '.join('?' * len(time_slot_ids))})", list(time_slot_ids)))
+            if department is not None:
+                conditions.append(('lecture_id IN (SELECT id FROM lectures WHERE dep_reale_rreg = ?)', [department]))
+            if after_id is not None:
+                conditions.append(('id > ?', [after_id]))
+            
+            sql = 'SELECT id FROM schedules'
+            if conditions:
+                sql += ' WHERE ' + ' AND '.join(condition for condition, _ in conditions)
+            cursor.execute(sql + ' ORDER BY id LIMIT ?',
+                           [parameter for _, parameters in conditions for parameter in parameters] + [limit])
+            page_ids = [row[0] for row in cursor.fetchall()]
+            
+            rows = {}
+            for start in range(0, len(page_ids), ID_LOOKUP_CHUNK):
+                chunk = page_ids[start:start + ID_LOOKUP_CHUNK]
+                cursor.execute(f"SELECT * FROM schedules WHERE id IN ({', '.join('?' * len(chunk))})", chunk)
+                rows.update((row[0], row) for row in cursor.fetchall())
+            # Items deleted between the two queries are left out
+            return [self._schedule_from_row(rows[schedule_id]) for schedule_id in page_ids if schedule_id in rows]
+        except Exception as e:
+            print(f"Error querying schedules: {e}")
+            return []
+    
+    def _query_version_schedules(self, cursor: sqlite3.Cursor, version_id: int, professor: Optional[str],
+                                 classroom_id: Optional[str], time_slot_ids: Optional[List[str]],
+                                 department: Optional[str], after_id: Optional[str],
+                                 limit: int) -> Optional[List[Schedule]]:
+        """
+        query_schedules over the decoded rows of a saved version. The whole
+        version is reconstructed (and cached) before filtering, so paging a
+        version costs one decode rather than an index seek
+        """
+        rows = self._load_version_rows(cursor, version_id)
+        if rows is None:
+            return None
+        
+        slot_set = set(time_slot_ids) if time_slot_ids is not None else None
+        department_lectures = None
+        if department is not None:
+            cursor.execute('SELECT id FROM lectures WHERE dep_reale_rreg = ?', (department,))
+            department_lectures = {row[0] for row in cursor.fetchall()}
+        
+        matches = [
+            row for row in rows
+            if row['id'] is not None
+            and (after_id is None or row['id'] > after_id)
+            and (professor is None or row['professor'] == professor)
+            and (classroom_id is None or row['classroom_id'] == classroom_id)
+            and (slot_set is None or row['time_slot_id'] in slot_set)
+            and (department_lectures is None or row['lecture_id'] in department_lectures)
+        ]
+        matches.sort(key=lambda row: row['id'])
+        return [Schedule(**row) for row in matches[:limit]]
+    
+    def _schedule_from_row(self, row: Tuple) -> Schedule:
+        """
+        Build a schedule from a schedules table row
+        """
+        return Schedule(
+            id=row[0],
+            lecture_id=row[1],
+            time_slot_id=row[2],
+            classroom_id=row[3],
+            professor=row[4],
+            pinned=bool(row[7]),
+            created_at=datetime.fromisoformat(row[5]) if row[5] else None,
+            updated_at=datetime.fromisoformat(row[6]) if row[6] else None
+        )
+    
     def delete_schedule(self, schedule_id: str) -> bool:
         """
         Delete a schedule by ID
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,))
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,))
             return cursor.rowcount > 0
         except Exception as e:
             print(f"Error deleting schedule: {e}")
             return False
     
+    def delete_schedules(self, schedule_ids: List[str]) -> bool:
+        """
+        Delete multiple schedules by ID (ids that do not exist are skipped)
+        """
+        try:
+            with self.transaction() as cursor:
+                self._execute_chunked(cursor, 'DELETE FROM schedules WHERE id = ?',
+                                      ((schedule_id,) for schedule_id in schedule_ids))
+            return True
+        except Exception as e:
+            print(f"Error deleting schedules: {e}")
+            return False
+    
+    def delete_lecture(self, lecture_id: str) -> bool:
+        """
+        Delete a lecture by ID
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM lectures WHERE id = ?', (lecture_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error deleting lecture: {e}")
+            return False
+    
     def save_lecture(self, lecture: Lecture) -> bool:
         """
         Save a lecture to the database
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            lecture_data = json.dumps(lecture.dict())
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO lectures (id, data)
-                VALUES (?, ?)
-            ''', (lecture.id, lecture_data))
-            
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'lectures', LECTURE_COLUMNS, [lecture])
             return True
         except Exception as e:
             print(f"Error saving lecture: {e}")
             return False
     
+    def save_lectures(self, lectures: List[Lecture]) -> bool:
+        """
+        Save multiple lectures in one transaction
+        """
+        try:
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'lectures', LECTURE_COLUMNS, lectures)
+            return True
+        except Exception as e:
+            print(f"Error saving lectures: {e}")
+            return False
+    
     def get_lecture(self, lecture_id: str) -> Optional[Lecture]:
         """
         Retrieve a lecture by ID
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT data FROM lectures WHERE id = ?', (lecture_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                lecture_data = json.loads(row[0])
-                return Lecture(**lecture_data)
-            return None
+            lectures = self._query_models(Lecture, 'lectures', LECTURE_COLUMNS, [('id = ?', lecture_id)])
+            return lectures[0] if lectures else None
         except Exception as e:
             print(f"Error retrieving lecture: {e}")
             return None
     
+    def get_lectures(self, professor: Optional[str] = None, group: Optional[str] = None,
+                     department: Optional[str] = None) -> List[Lecture]:
+        """
+        Retrieve lectures, optionally filtered by professor, group and department
+        """
+        conditions = []
+        if professor is not None:
+            conditions.append(('prof_rreg = ?', professor))
+        if group is not None:
+            conditions.append(('grup_rreg = ?', group))
+        if department is not None:
+            conditions.append(('dep_reale_rreg = ?', department))
+        
+        try:
+            return self._query_models(Lecture, 'lectures', LECTURE_COLUMNS, conditions)
+        except Exception as e:
+            print(f"Error retrieving lectures: {e}")
+            return []
+    
     def save_classroom(self, classroom: Classroom) -> bool:
         """
         Save a classroom to the database
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            classroom_data = json.dumps(classroom.dict())
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO classrooms (id, data)
-                VALUES (?, ?)
-            ''', (classroom.id, classroom_data))
-            
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'classrooms', CLASSROOM_COLUMNS, [classroom])
             return True
         except Exception as e:
             print(f"Error saving classroom: {e}")
             return False
     
+    def save_classrooms(self, classrooms: List[Classroom]) -> bool:
+        """
+        Save multiple classrooms in one transaction
+        """
+        try:
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'classrooms', CLASSROOM_COLUMNS, classrooms)
+            return True
+        except Exception as e:
+            print(f"Error saving classrooms: {e}")
+            return False
+    
+    def delete_classroom(self, classroom_id: str) -> bool:
+        """
+        Delete a classroom by ID
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM classrooms WHERE id = ?', (classroom_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error deleting classroom: {e}")
+            return False
+    
     def get_classroom(self, classroom_id: str) -> Optional[Classroom]:
         """
         Retrieve a classroom by ID
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT data FROM classrooms WHERE id = ?', (classroom_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                classroom_data = json.loads(row[0])
-                return Classroom(**classroom_data)
-            return None
+            classrooms = self._query_models(Classroom, 'classrooms', CLASSROOM_COLUMNS, [('id = ?', classroom_id)])
+            return classrooms[0] if classrooms else None
         except Exception as e:
             print(f"Error retrieving classroom: {e}")
             return None
     
+    def get_classrooms(self, min_capacity: Optional[int] = None, status: Optional[str] = None) -> List[Classroom]:
+        """
+        Retrieve classrooms, optionally only those with at least min_capacity seats or a given status
+        """
+        conditions = []
+        if min_capacity is not None:
+            conditions.append(('capacity >= ?', min_capacity))
+        if status is not None:
+            conditions.append(('status = ?', status))
+        
+        try:
+            return self._query_models(Classroom, 'classrooms', CLASSROOM_COLUMNS, conditions)
+        except Exception as e:
+            print(f"Error retrieving classrooms: {e}")
+            return []
+    
     def save_time_slot(self, time_slot: TimeSlot) -> bool:
         """
         Save a time slot to the database
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            time_slot_data = json.dumps(time_slot.dict())
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO time_slots (id, data)
-                VALUES (?, ?)
-            ''', (time_slot.id, time_slot_data))
-            
-            conn.commit()
-            conn.close()
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'time_slots', TIME_SLOT_COLUMNS, [time_slot])
             return True
         except Exception as e:
             print(f"Error saving time slot: {e}")
             return False
     
+    def save_time_slots(self, time_slots: List[TimeSlot]) -> bool:
+        """
+        Save multiple time slots in one transaction
+        """
+        try:
+            with self.transaction() as cursor:
+                self._save_models(cursor, 'time_slots', TIME_SLOT_COLUMNS, time_slots)
+            return True
+        except Exception as e:
+            print(f"Error saving time slots: {e}")
+            return False
+    
+    def delete_time_slot(self, time_slot_id: str) -> bool:
+        """
+        Delete a time slot by ID
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('DELETE FROM time_slots WHERE id = ?', (time_slot_id,))
+            return cursor.rowcount > 0
+        except Exception as e:
+            print(f"Error deleting time slot: {e}")
+            return False
+    
     def get_time_slot(self, time_slot_id: str) -> Optional[TimeSlot]:
         """
         Retrieve a time slot by ID
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT data FROM time_slots WHERE id = ?', (time_slot_id,))
-            row = cursor.fetchone()
-            conn.close()
-            
-            if row:
-                time_slot_data = json.loads(row[0])
-                return TimeSlot(**time_slot_data)
-            return None
+            time_slots = self._query_models(TimeSlot, 'time_slots', TIME_SLOT_COLUMNS, [('id = ?', time_slot_id)])
+            return time_slots[0] if time_slots else None
         except Exception as e:
             print(f"Error retrieving time slot: {e}")
             return None
     
-    def save_schedule_version(self, schedules: List[Schedule], version_name: str = None) -> bool:
+    def get_time_slots(self, day: Optional[str] = None) -> List[TimeSlot]:
         """
-        Save a version of the schedule
+        Retrieve time slots, optionally only those of one day
         """
+        conditions = [('day = ?', day)] if day is not None else []
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            schedule_data = json.dumps([schedule.dict() for schedule in schedules])
+            return self._query_models(TimeSlot, 'time_slots', TIME_SLOT_COLUMNS, conditions)
+        except Exception as e:
+            print(f"Error retrieving time slots: {e}")
+            return []
+    
+    def save_time_slot_configuration(self, config: TimeSlotConfiguration) -> bool:
+        """
+        Save the time slot configuration
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO settings (key, value, updated_at)
+                    VALUES ('time_slot_configuration', ?, ?)
+                ''', (config.json(), datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            print(f"Error saving time slot configuration: {e}")
+            return False
+    
+    def get_time_slot_configuration(self) -> Optional[TimeSlotConfiguration]:
+        """
+        Retrieve the saved time slot configuration (None if it was never saved)
+        """
+        try:
+            cursor = self.get_connection().cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = 'time_slot_configuration'")
+            row = cursor.fetchone()
+            return TimeSlotConfiguration.parse_raw(row[0]) if row else None
+        except Exception as e:
+            print(f"Error retrieving time slot configuration: {e}")
+            return None
+    
+    def _save_models(self, cursor: sqlite3.Cursor, table: str, columns: Tuple[str, ...], models: Iterable):
+        """
+        Insert or replace models as rows of their table, one column per field
+        """
+        self._execute_chunked(cursor, f'''
+            INSERT OR REPLACE INTO {table} ({', '.join(columns)})
+            VALUES ({', '.join('?' * len(columns))})
+        ''', (tuple(getattr(model, column) for column in columns) for model in models))
+    
+    def _query_models(self, model_class, table: str, columns: Tuple[str, ...],
+                      conditions: List[Tuple[str, Any]]) -> List:
+        """
+        Build models from the rows of a table matching every (SQL condition, parameter) pair
+        """
+        sql = f"SELECT {', '.join(columns)} FROM {table}"
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(condition for condition, _ in conditions)
+        sql += ' ORDER BY id'
+        
+        cursor = self.get_connection().cursor()
+        cursor.execute(sql, [parameter for _, parameter in conditions])
+        return [model_class(**dict(zip(columns, row))) for row in cursor.fetchall()]
+    
+    def save_schedule_version(self, schedules: List[Schedule], version_name: str = None,
+                              lectures: Optional[List[Lecture]] = None) -> bool:
+        """
+        Save a version of the schedule, optionally with the lectures it was built for.
+        The version is stored as a delta against the latest version, or in full
+        when the chain of deltas gets too long or the delta would not be smaller
+        """
+        try:
+            rows = [json.loads(schedule.json()) for schedule in schedules]
+            lecture_data = json.dumps([lecture.dict() for lecture in lectures]) if lectures is not None else None
+            schedule_data = encode_snapshot(rows)
             
-            cursor.execute('''
-                INSERT INTO schedule_versions (schedule_data, version_name)
-                VALUES (?, ?)
-            ''', (schedule_data, version_name))
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    SELECT id, chain_length, COALESCE(lectures_from, id) FROM schedule_versions
+                    ORDER BY id DESC LIMIT 1
+                ''')
+                parent = cursor.fetchone()
+                
+                storage, parent_id, chain_length = 'full', None, 0
+                if parent and parent[1] + 1 < self.snapshot_interval:
+                    delta = self._version_delta(self._load_version_rows(cursor, parent[0]), rows)
+                    if delta is not None:
+                        delta_data = json.dumps(delta)
+                        if len(delta_data) < len(schedule_data):
+                            storage, parent_id, chain_length = 'delta', parent[0], parent[1] + 1
+                            schedule_data = delta_data
+                
+                # Share the parent's lectures when they did not change
+                lectures_from = None
+                if parent and lecture_data is not None:
+                    cursor.execute('SELECT lecture_data FROM schedule_versions WHERE id = ?', (parent[2],))
+                    if cursor.fetchone()[0] == lecture_data:
+                        lectures_from, lecture_data = parent[2], None
+                
+                cursor.execute('''
+                    INSERT INTO schedule_versions
+                    (schedule_data, version_name, lecture_data, storage, parent_id, chain_length, lectures_from)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (schedule_data, version_name, lecture_data, storage, parent_id, chain_length, lectures_from))
+                version_id = cursor.lastrowid
             
-            conn.commit()
-            conn.close()
+            self._version_cache = (version_id, rows)
             return True
         except Exception as e:
             print(f"Error saving schedule version: {e}")
             return False
     
-    def get_schedule_versions(self) -> List[Dict[str, Any]]:
+    def _version_delta(self, parent_rows: List[Dict[str, Any]], rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Changes turning the parent version's schedule rows into rows: changed or
+        new rows, deleted ids and, if it cannot be derived, the new row order.
+        Returns None when rows have missing or repeated ids
+        """
+        ids = [row['id'] for row in rows]
+        id_set = set(ids)
+        if None in id_set or len(id_set) != len(ids):
+            return None
+        
+        parent_by_id = {row['id']: row for row in parent_rows}
+        delta = {
+            'upserts': [row for row in rows if parent_by_id.get(row['id']) != row],
+            'deletes': [schedule_id for schedule_id in parent_by_id if schedule_id not in id_set]
+        }
+        if [row['id'] for row in self._apply_version_delta(parent_rows, delta)] != ids:
+            delta['order'] = ids
+        return delta
+    
+    def _apply_version_delta(self, parent_rows: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Apply a delta from _version_delta to the parent version's schedule rows
+        """
+        rows_by_id = {row['id']: row for row in parent_rows}
+        for schedule_id in delta['deletes']:
+            del rows_by_id[schedule_id]
+        for row in delta['upserts']:
+            rows_by_id[row['id']] = row
+        if 'order' in delta:
+            return [rows_by_id[schedule_id] for schedule_id in delta['order']]
+        return list(rows_by_id.values())
+    
+    def _load_version_rows(self, cursor: sqlite3.Cursor, version_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Reconstruct the schedule rows of a version from its nearest full
+        ancestor and the deltas after it, fetched in one recursive query
+        """
+        cached = self._version_cache
+        if cached and cached[0] == version_id:
+            return cached[1]
+        
+        cursor.execute('''
+            WITH RECURSIVE chain (id, parent_id, storage, schedule_data, depth) AS (
+                SELECT id, parent_id, storage, schedule_data, 0 FROM schedule_versions WHERE id = ?
+                UNION ALL
+                SELECT version.id, version.parent_id, version.storage, version.schedule_data, chain.depth + 1
+                FROM schedule_versions AS version JOIN chain ON version.id = chain.parent_id
+                WHERE chain.storage = 'delta'
+            )
+            SELECT storage, schedule_data FROM chain ORDER BY depth DESC
+        ''', (version_id,))
+        chain = cursor.fetchall()
+        if not chain:
+            return None
+        
+        rows = decode_snapshot(chain[0][1]) if is_snapshot(chain[0][1]) else json.loads(chain[0][1])
+        for _, delta_data in chain[1:]:
+            rows = self._apply_version_delta(rows, json.loads(delta_data))
+        
+        self._version_cache = (version_id, rows)
+        return rows
+    
+    def get_schedule_versions(self, limit: Optional[int] = None, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Retrieve all schedule versions
+        Retrieve schedule versions, newest first. Pass limit to get one page
+        and the last id of a page as before_id to get the next one
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('SELECT id, version_name, created_at FROM schedule_versions ORDER BY created_at DESC')
+            cursor = self.get_connection().cursor()
+            
+            sql = 'SELECT id, version_name, created_at FROM schedule_versions'
+            parameters = []
+            if before_id is not None:
+                sql += ' WHERE id < ?'
+                parameters.append(before_id)
+            sql += ' ORDER BY id DESC'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                parameters.append(limit)
+            cursor.execute(sql, parameters)
             rows = cursor.fetchall()
-            conn.close()
             
             versions = []
             for row in rows:
@@ -381,17 +869,74 @@ class DatabaseService:
         Retrieve a specific schedule version
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            rows = self._load_version_rows(self.get_connection().cursor(), version_id)
+            if rows is not None:
+                return [Schedule(**data) for data in rows]
+            return None
+        except Exception as e:
+            print(f"Error retrieving schedule version: {e}")
+            return None
+    
+    def get_schedule_version_rows(self, version_id: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Retrieve a specific schedule version as plain rows, without building Schedule models
+        """
+        try:
+            return self._load_version_rows(self.get_connection().cursor(), version_id)
+        except Exception as e:
+            print(f"Error retrieving schedule version: {e}")
+            return None
+    
+    def get_schedule_version_info(self, version_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a version's metadata and storage details without decoding its schedule
+        """
+        try:
+            cursor = self.get_connection().cursor()
             
-            cursor.execute('SELECT schedule_data FROM schedule_versions WHERE id = ?', (version_id,))
+            cursor.execute('''
+                SELECT id, version_name, created_at, storage, parent_id, chain_length, schedule_data
+                FROM schedule_versions WHERE id = ?
+            ''', (version_id,))
             row = cursor.fetchone()
-            conn.close()
             
             if row:
-                schedule_data = json.loads(row[0])
-                return [Schedule(**data) for data in schedule_data]
+                info = {
+                    'id': row[0],
+                    'version_name': row[1],
+                    'created_at': row[2],
+                    'storage': row[3],
+                    'parent_id': row[4],
+                    'chain_length': row[5],
+                    'encoded_size': len(row[6])
+                }
+                if is_snapshot(row[6]):
+                    info['item_count'] = read_snapshot_header(row[6])['item_count']
+                return info
             return None
         except Exception as e:
-            print(f"Error retrieving schedule version: {e}")
-            return None
\ No newline at end of file
+            print(f"Error retrieving schedule version info: {e}")
+            return None
+    
+    def get_schedule_version_lectures(self, version_id: int) -> Optional[List[Lecture]]:
+        """
+        Retrieve the lectures saved with a schedule version
+        (empty for versions saved without lectures)
+        """
+        try:
+            cursor = self.get_connection().cursor()
+            
+            cursor.execute('''
+                SELECT source.lecture_data FROM schedule_versions AS version
+                JOIN schedule_versions AS source ON source.id = COALESCE(version.lectures_from, version.id)
+                WHERE version.id = ?
+            ''', (version_id,))
+            row = cursor.fetchone()
+            
+            if row:
+                lecture_data = json.loads(row[0]) if row[0] else []
+                return [Lecture(**data) for data in lecture_data]
+            return None
+        except Exception as e:
+            print(f"Error retrieving schedule version lectures: {e}")
+            return None
@@ -0,0 +1,58 @@
+from typing import List, Dict, Optional
+from app.models.lecture import Lecture
+from app.models.group import Group
+from app.models.subgroup import Subgroup
+
+# Expected attendance from the student counts of groups and subgroups. Sizes
+# are None when unknown, so callers can skip checks instead of guessing; pass
+# default_group_size to assume a size for groups without a student count
+class GroupSizeEstimator:
+    def __init__(self, groups: List[Group], subgroups: Optional[List[Subgroup]] = None,
+                 default_group_size: Optional[int] = None):
+        self.default_group_size = default_group_size
+        self.groups: Dict[str, Group] = {group.id: group for group in groups}
+        self.subgroups: Dict[str, Subgroup] = {subgroup.id: subgroup for subgroup in (subgroups or [])}
+
+    def get_group_size(self, group_id: str) -> Optional[int]:
+        """
+        Get the expected number of students in a main group (None if unknown)
+        """
+        group = self.groups.get(group_id)
+        if group and group.student_count:
+            return group.student_count
+        return self.default_group_size
+
+    def get_subgroup_size(self, subgroup_id: str) -> Optional[int]:
+        """
+        Get the expected number of students in a subgroup (None if unknown)
+        """
+        subgroup = self.subgroups.get(subgroup_id)
+        if subgroup and subgroup.student_count:
+            return subgroup.student_count
+
+        # Split the parent group evenly between its subgroups
+        parent_id = self._extract_main_group(subgroup_id)
+        parent = self.groups.get(parent_id)
+        parent_size = self.get_group_size(parent_id)
+        if parent_size is None:
+            return None
+        subgroup_count = len(parent.sub_groups) if parent and parent.sub_groups else 1
+        return max(1, parent_size // subgroup_count)
+
+    def get_expected_size(self, lecture: Lecture) -> Optional[int]:
+        """
+        Get the expected attendance of a lecture (subgroup size if the lecture
+        is held for a subgroup, otherwise the main group size; None if unknown)
+        """
+        if '.' in lecture.grup_rreg and self._extract_main_group(lecture.grup_rreg) != lecture.grup_rreg:
+            return self.get_subgroup_size(lecture.grup_rreg)
+        return self.get_group_size(lecture.grup_rreg)
+
+    def _extract_main_group(self, group_id: str) -> str:
+        """
+        Extract main group from subgroup (e.g., "Gr. 1.1" -> "Gr. 1")
+        """
+        if '.' in group_id:
+            parts = group_id.split('.')
+            return f"{parts[0]}.{parts[1]}"
+        return group_id
@@ -0,0 +1,59 @@
+from typing import List, Tuple, Optional, Any
+from collections import deque
+from app.models.time_slot import TimeSlot
+
+# (day, start minute, end minute) of a booked time slot
+Interval = Tuple[str, int, int]
+
+def time_to_minutes(value: str) -> int:
+    """
+    Convert an "HH:MM" time to minutes since midnight
+    """
+    hours, minutes = value.split(':')[:2]
+    return int(hours) * 60 + int(minutes)
+
+def slot_interval(time_slot_id: str, time_slot: Optional[TimeSlot]) -> Interval:
+    """
+    Get the interval covered by a time slot. Unknown slots (or slots with
+    unparsable times) get a pseudo-day of their own, so they only overlap
+    bookings of the very same slot id
+    """
+    if time_slot:
+        try:
+            return (time_slot.day, time_to_minutes(time_slot.start_time), time_to_minutes(time_slot.end_time))
+        except (ValueError, AttributeError):
+            pass
+    return (f"?{time_slot_id}", 0, 1)
+
+def find_overlaps(bookings: List[Tuple[str, Interval, Any]]) -> List[Tuple[Any, Any]]:
+    """
+    Sweep-line overlap detection over (resource, interval, item) bookings.
+    Every booking that starts while another booking of the same resource is
+    still running is reported once, paired with the earliest-starting booking
+    in progress (ties keep input order). Intervals that only touch do not
+    overlap. Runs in O(n log n)
+    """
+    order = sorted(
+        range(len(bookings)),
+        key=lambda i: (bookings[i][0], bookings[i][1][0], bookings[i][1][1], i)
+    )
+
+    overlaps = []
+    active = deque()  # running bookings of the current resource and day, by start time
+    current = None
+    for i in order:
+        resource, (day, start, end), item = bookings[i]
+        if (resource, day) != current:
+            current = (resource, day)
+            active.clear()
+
+        # Only the earliest-starting running booking matters, so expired
+        # bookings are dropped lazily from the front
+        while active and active[0][0] <= start:
+            active.popleft()
+        if active:
+            overlaps.append((active[0][1], item))
+        if end > start:
+            active.append((end, item))
+
+    return overlaps
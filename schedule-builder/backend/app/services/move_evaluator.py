@@ -0,0 +1,69 @@
+from typing import List, Dict
+from app.models.schedule import ScheduleMove
+from app.services.conflict_index import ConflictIndex
+from app.services.schedule_optimizer import ScheduleOptimizer
+
+class MoveEvaluator:
+    def __init__(self, conflict_index: ConflictIndex, schedule_optimizer: ScheduleOptimizer):
+        self.conflict_index = conflict_index
+        self.schedule_optimizer = schedule_optimizer
+
+    def evaluate_moves(self, moves: List[ScheduleMove]) -> Dict[str, any]:
+        """
+        Evaluate proposed moves one by one against the current indexed schedule,
+        without changing it. For each move, report the conflicts it would
+        introduce and resolve and the change in schedule score
+        """
+        index = self.conflict_index
+        classroom_service = self.schedule_optimizer.classroom_service
+        time_slot_service = self.schedule_optimizer.time_slot_service
+        schedules = index.get_schedules()
+        positions = {schedule.id: i for i, schedule in enumerate(schedules)}
+        base_assignment = self.schedule_optimizer.to_assignment(schedules)
+
+        results = []
+        candidates = [base_assignment]
+        for move in moves:
+            result = {
+                "schedule_id": move.schedule_id,
+                "time_slot_id": move.time_slot_id,
+                "classroom_id": move.classroom_id,
+                "valid": False
+            }
+            results.append(result)
+
+            if move.schedule_id not in positions:
+                result["error"] = f"Schedule {move.schedule_id} not found"
+                continue
+            if not time_slot_service.get_time_slot(move.time_slot_id):
+                result["error"] = f"Time slot {move.time_slot_id} not found"
+                continue
+            if not classroom_service.get_classroom(move.classroom_id):
+                result["error"] = f"Classroom {move.classroom_id} not found"
+                continue
+
+            introduced, resolved = index.move_conflict_changes(move.schedule_id, move.time_slot_id, move.classroom_id)
+            result["valid"] = True
+            result["introduced_conflicts"] = introduced
+            result["resolved_conflicts"] = resolved
+            result["conflict_delta"] = len(result["introduced_conflicts"]) - len(result["resolved_conflicts"])
+
+            candidate = base_assignment.copy()
+            candidate[positions[move.schedule_id]] = (move.time_slot_id, move.classroom_id)
+            result["_candidate"] = len(candidates)
+            candidates.append(candidate)
+
+        # Score the current schedule and every valid move in one vectorized batch
+        scores = self.schedule_optimizer.calculate_schedule_scores_batch(
+            schedules, list(index.lecture_dict.values()), candidates
+        ) if schedules else [{}]
+        base_scores = scores[0]
+        for result in results:
+            if "_candidate" in result:
+                move_scores = scores[result.pop("_candidate")]
+                result["score_delta"] = {key: move_scores[key] - base_scores[key] for key in base_scores}
+
+        return {
+            "base_score": base_scores,
+            "results": results
+        }
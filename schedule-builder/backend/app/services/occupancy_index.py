@@ -0,0 +1,176 @@
+from typing import List, Dict, Tuple, Optional
+from app.models.schedule import Schedule
+from app.models.lecture import Lecture
+from app.services.time_slot_service import TimeSlotService
+from app.services.interval_sweep import slot_interval
+
+class OccupancyIndex:
+    def __init__(self, time_slot_service: TimeSlotService):
+        self.time_slot_service = time_slot_service
+        # Usage counters let placement checks be dictionary lookups instead of schedule scans.
+        # A booking counts towards every time slot overlapping its own, so a slot is
+        # free for a resource exactly when no booking of it overlaps the slot
+        self.room_usage: Dict[Tuple[str, str], int] = {}  # (classroom_id, time_slot_id) -> count
+        self.professor_usage: Dict[Tuple[str, str], int] = {}  # (professor, time_slot_id) -> count
+        self.group_usage: Dict[Tuple[str, str], int] = {}  # (group, time_slot_id) -> count
+        self.subgroup_usage: Dict[Tuple[str, str], int] = {}  # (subgroup, time_slot_id) -> count
+        self.group_daily_load: Dict[Tuple[str, str], int] = {}  # (group, day) -> count
+        self.subgroup_daily_load: Dict[Tuple[str, str], int] = {}  # (subgroup, day) -> count
+        self.day_counts: Dict[str, int] = {}  # day -> count
+        self.slot_days: Dict[str, str] = {}  # time_slot_id -> day
+        self.overlapping_slots: Dict[str, List[str]] = {}  # time_slot_id -> overlapping slot ids (itself included)
+        self.refresh_time_slots()
+
+    def refresh_time_slots(self):
+        """
+        Reload the time slot -> day and overlapping slot lookups from the time slot service
+        """
+        time_slots = self.time_slot_service.get_all_time_slots()
+        self.slot_days = {time_slot.id: time_slot.day for time_slot in time_slots}
+
+        day_intervals: Dict[str, List[Tuple[int, int, str]]] = {}
+        for time_slot in time_slots:
+            day, start, end = slot_interval(time_slot.id, time_slot)
+            day_intervals.setdefault(day, []).append((start, end, time_slot.id))
+
+        # Intervals that only touch do not overlap
+        self.overlapping_slots = {}
+        for intervals in day_intervals.values():
+            for start, end, time_slot_id in intervals:
+                self.overlapping_slots[time_slot_id] = [
+                    other_id for other_start, other_end, other_id in intervals
+                    if other_id == time_slot_id or (other_start < end and start < other_end)
+                ]
+
+    def build(self, schedules: List[Schedule], lectures: List[Lecture]) -> 'OccupancyIndex':
+        """
+        Index every schedule item whose lecture is known
+        """
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        for schedule in schedules:
+            lecture = lecture_dict.get(schedule.lecture_id)
+            if lecture:
+                self.add(schedule, lecture)
+        return self
+
+    def add(self, schedule: Schedule, lecture: Lecture):
+        """
+        Record a schedule item in the index
+        """
+        self._update(schedule, lecture, 1)
+
+    def remove(self, schedule: Schedule, lecture: Lecture):
+        """
+        Remove a schedule item from the index
+        """
+        self._update(schedule, lecture, -1)
+
+    def move(self, schedule: Schedule, lecture: Lecture, time_slot_id: str, classroom_id: str):
+        """
+        Move a schedule item to a new time slot and classroom, keeping the index in sync
+        """
+        self.remove(schedule, lecture)
+        schedule.time_slot_id = time_slot_id
+        schedule.classroom_id = classroom_id
+        self.add(schedule, lecture)
+
+    def _update(self, schedule: Schedule, lecture: Lecture, delta: int):
+        """
+        Add delta to every counter touched by a schedule item
+        """
+        time_slot_id = schedule.time_slot_id
+        main_group = self._extract_main_group(lecture.grup_rreg)
+        day = self.slot_days.get(time_slot_id)
+
+        for slot_id in self.overlapping_slots.get(time_slot_id, [time_slot_id]):
+            self._bump(self.room_usage, (schedule.classroom_id, slot_id), delta)
+            self._bump(self.professor_usage, (schedule.professor, slot_id), delta)
+            self._bump(self.group_usage, (main_group, slot_id), delta)
+            if lecture.grup_rreg != main_group:
+                self._bump(self.subgroup_usage, (lecture.grup_rreg, slot_id), delta)
+        if day:
+            self._bump(self.group_daily_load, (main_group, day), delta)
+            self._bump(self.day_counts, day, delta)
+
+        if lecture.grup_rreg != main_group:
+            if day:
+                self._bump(self.subgroup_daily_load, (lecture.grup_rreg, day), delta)
+
+    def _bump(self, counter: Dict, key, delta: int):
+        """
+        Adjust a counter, dropping keys that reach zero
+        """
+        count = counter.get(key, 0) + delta
+        if count > 0:
+            counter[key] = count
+        else:
+            counter.pop(key, None)
+
+    def is_room_free(self, classroom_id: str, time_slot_id: str) -> bool:
+        """
+        Check whether a classroom is unused during a time slot
+        """
+        return (classroom_id, time_slot_id) not in self.room_usage
+
+    def is_professor_free(self, professor: str, time_slot_id: str) -> bool:
+        """
+        Check whether a professor is free during a time slot
+        """
+        return (professor, time_slot_id) not in self.professor_usage
+
+    def is_group_free(self, lecture: Lecture, time_slot_id: str) -> bool:
+        """
+        Check whether the lecture's group (and subgroup) is free during a time slot
+        """
+        main_group = self._extract_main_group(lecture.grup_rreg)
+        if (main_group, time_slot_id) in self.group_usage:
+            return False
+        if lecture.grup_rreg != main_group and (lecture.grup_rreg, time_slot_id) in self.subgroup_usage:
+            return False
+        return True
+
+    def get_group_daily_load(self, group_id: str, day: str) -> int:
+        """
+        Get the number of lectures a group has on a day
+        """
+        return self.group_daily_load.get((group_id, day), 0)
+
+    def get_subgroup_daily_load(self, subgroup_id: str, day: str) -> int:
+        """
+        Get the number of lectures a subgroup has on a day
+        """
+        return self.subgroup_daily_load.get((subgroup_id, day), 0)
+
+    def can_place(self, lecture: Lecture, time_slot_id: str, classroom_id: str,
+                  group_limits: Optional[Dict[str, int]] = None) -> bool:
+        """
+        Check in O(1) whether a lecture that is not currently indexed fits
+        into a time slot and classroom, optionally enforcing daily limits
+        (keyed by group or subgroup id)
+        """
+        if not self.is_room_free(classroom_id, time_slot_id):
+            return False
+        if not self.is_professor_free(lecture.prof_rreg, time_slot_id):
+            return False
+        if not self.is_group_free(lecture, time_slot_id):
+            return False
+
+        if group_limits:
+            day = self.slot_days.get(time_slot_id)
+            main_group = self._extract_main_group(lecture.grup_rreg)
+            if main_group in group_limits and self.get_group_daily_load(main_group, day) >= group_limits[main_group]:
+                return False
+            if lecture.grup_rreg != main_group and lecture.grup_rreg in group_limits:
+                if self.get_subgroup_daily_load(lecture.grup_rreg, day) >= group_limits[lecture.grup_rreg]:
+                    return False
+
+        return True
+
+    def _extract_main_group(self, group_id: str) -> str:
+        """
+        Extract main group from subgroup (e.g., "Gr. 1.1" -> "Gr. 1")
+        """
+        if '.' in group_id:
+            parts = group_id.split('.')
+            return f"{parts[0]}.{parts[1]}"
+        return group_id
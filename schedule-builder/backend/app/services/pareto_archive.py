@@ -0,0 +1,148 @@
+from typing import List, Dict, Tuple, Optional, Any
+from array import array
+
+# Objectives kept separately in the archive (all of them: higher is better)
+PARETO_OBJECTIVES = [
+    'conflict_score',
+    'cohesion_score',
+    'balance_score',
+    'utilization_score',
+    'distribution_score',
+    'preference_score'
+]
+
+class ParetoArchive:
+    def __init__(self, max_size: int = 50):
+        self.max_size = max_size
+        self.entries: List[Dict[str, Any]] = []
+        self.next_id = 0
+        # Interned ids so each solution is stored as two integer arrays
+        self.time_slot_ids: List[str] = []
+        self.classroom_ids: List[str] = []
+        self._time_slot_index: Dict[str, int] = {}
+        self._classroom_index: Dict[str, int] = {}
+
+    def add(self, assignment: List[Tuple[str, str]], scores: Dict[str, float]) -> bool:
+        """
+        Add a solution unless an archived solution dominates or equals it.
+        Archived solutions dominated by the new one are dropped.
+        Returns True if the solution was archived
+        """
+        objectives = tuple(float(scores[key]) for key in PARETO_OBJECTIVES)
+
+        for entry in self.entries:
+            if entry['objectives'] == objectives or self._dominates(entry['objectives'], objectives):
+                return False
+
+        self.entries = [entry for entry in self.entries if not self._dominates(objectives, entry['objectives'])]
+        self.entries.append({
+            'id': self.next_id,
+            'objectives': objectives,
+            'time_slots': array('i', (self._intern(self.time_slot_ids, self._time_slot_index, slot_id) for slot_id, _ in assignment)),
+            'classrooms': array('i', (self._intern(self.classroom_ids, self._classroom_index, room_id) for _, room_id in assignment))
+        })
+        self.next_id += 1
+
+        if len(self.entries) > self.max_size:
+            self._prune()
+
+        return True
+
+    def get_assignment(self, solution_id: int) -> Optional[List[Tuple[str, str]]]:
+        """
+        Decode an archived solution back to (time_slot_id, classroom_id) pairs
+        """
+        entry = self._get_entry(solution_id)
+        if not entry:
+            return None
+        return [
+            (self.time_slot_ids[slot_index], self.classroom_ids[room_index])
+            for slot_index, room_index in zip(entry['time_slots'], entry['classrooms'])
+        ]
+
+    def get_solutions(self, weights: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """
+        List archived solutions with their objective scores, ranked by the
+        weighted sum of the objectives (stored scores are reused, nothing is recomputed)
+        """
+        weights = self._normalize_weights(weights)
+        solutions = []
+        for entry in self.entries:
+            scores = dict(zip(PARETO_OBJECTIVES, entry['objectives']))
+            solutions.append({
+                'id': entry['id'],
+                'scores': scores,
+                'weighted_score': sum(scores[key] * weights[key] for key in PARETO_OBJECTIVES)
+            })
+
+        solutions.sort(key=lambda solution: solution['weighted_score'], reverse=True)
+        return solutions
+
+    def select(self, weights: Optional[Dict[str, float]] = None) -> Optional[int]:
+        """
+        Get the id of the best archived solution under the given weights
+        """
+        solutions = self.get_solutions(weights)
+        return solutions[0]['id'] if solutions else None
+
+    def _get_entry(self, solution_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Find an archived solution by id
+        """
+        for entry in self.entries:
+            if entry['id'] == solution_id:
+                return entry
+        return None
+
+    def _normalize_weights(self, weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """
+        Fill missing weights with zero and scale them to sum to one
+        (equal weights if none are given)
+        """
+        if not weights:
+            return {key: 1 / len(PARETO_OBJECTIVES) for key in PARETO_OBJECTIVES}
+
+        unknown = [key for key in weights if key not in PARETO_OBJECTIVES]
+        if unknown:
+            raise ValueError(f"Unknown objectives: {', '.join(unknown)}")
+
+        total = sum(max(0.0, weights.get(key, 0.0)) for key in PARETO_OBJECTIVES)
+        if total <= 0:
+            raise ValueError("At least one objective weight must be positive")
+        return {key: max(0.0, weights.get(key, 0.0)) / total for key in PARETO_OBJECTIVES}
+
+    def _dominates(self, first: Tuple[float, ...], second: Tuple[float, ...]) -> bool:
+        """
+        Check if the first objective vector is at least as good everywhere and better somewhere
+        """
+        return all(a >= b for a, b in zip(first, second)) and any(a > b for a, b in zip(first, second))
+
+    def _intern(self, values: List[str], index: Dict[str, int], value: str) -> int:
+        """
+        Get the integer code of an id, assigning a new one on first use
+        """
+        if value not in index:
+            index[value] = len(values)
+            values.append(value)
+        return index[value]
+
+    def _prune(self):
+        """
+        Drop the most crowded solution so the archive keeps a spread-out front
+        """
+        distances = [0.0] * len(self.entries)
+        for objective in range(len(PARETO_OBJECTIVES)):
+            order = sorted(range(len(self.entries)), key=lambda i: self.entries[i]['objectives'][objective])
+            low = self.entries[order[0]]['objectives'][objective]
+            high = self.entries[order[-1]]['objectives'][objective]
+            # Extremes of every objective are always kept
+            distances[order[0]] = distances[order[-1]] = float('inf')
+            if high == low:
+                continue
+            for position in range(1, len(order) - 1):
+                previous_value = self.entries[order[position - 1]]['objectives'][objective]
+                next_value = self.entries[order[position + 1]]['objectives'][objective]
+                distances[order[position]] += (next_value - previous_value) / (high - low)
+
+        most_crowded = min(range(len(self.entries)), key=lambda i: distances[i])
+        del self.entries[most_crowded]
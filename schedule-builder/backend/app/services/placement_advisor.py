@@ -0,0 +1,205 @@
+from typing import List, Dict, Tuple, Optional, Any
+from app.models.lecture import Lecture
+from app.models.schedule import Schedule
+from app.models.time_slot import TimeSlot
+from app.services.classroom_service import ClassroomService
+from app.services.time_slot_service import TimeSlotService
+from app.services.combination_generator import CombinationGenerator
+from app.services.interval_sweep import slot_interval
+
+# Occupancy is kept as one integer bitset per resource: bit i is set when the
+# resource is busy at any time overlapping the i-th available time slot. The
+# resources checked are the same as in ScheduleGenerator._check_constraints
+class PlacementAdvisor:
+    def __init__(self, classroom_service: ClassroomService, time_slot_service: TimeSlotService):
+        self.classroom_service = classroom_service
+        self.time_slot_service = time_slot_service
+        self.combination_generator = CombinationGenerator(classroom_service, time_slot_service)
+
+    def suggest_placements(self, lecture: Lecture, schedules: List[Schedule], lectures: List[Lecture],
+                           k: int = 5, max_bumps: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Get the k best feasible (time slot, classroom) placements for a lecture,
+        ranked like CombinationGenerator, plus the cheapest single moves of
+        another lecture that would free a blocked placement. Any existing
+        schedule items of the lecture itself are ignored
+        """
+        time_slots = self.time_slot_service.get_available_time_slots()
+        classrooms = self.classroom_service.get_available_classrooms()
+        lecture_dict = {item.id: item for item in lectures}
+        slot_bits = {time_slot.id: i for i, time_slot in enumerate(time_slots)}
+        overlap_cache: Dict[str, int] = {}
+
+        # (kind, resource) -> bit -> schedule items busy there
+        occupancy: Dict[Tuple[str, str], Dict[int, List[Schedule]]] = {}
+        for schedule in schedules:
+            booked_lecture = lecture_dict.get(schedule.lecture_id)
+            if schedule.lecture_id == lecture.id or not booked_lecture:
+                continue
+            bits = self._bits(self._overlap_mask(schedule.time_slot_id, time_slots, overlap_cache))
+            for resource in self._resources(booked_lecture, schedule.classroom_id):
+                slots = occupancy.setdefault(resource, {})
+                for bit in bits:
+                    slots.setdefault(bit, []).append(schedule)
+
+        mask_cache: Dict[Tuple[Tuple[str, str], Optional[str]], int] = {}
+        combinations = self.combination_generator._generate_lecture_combinations(lecture, classrooms, time_slots)
+
+        placements = []
+        blocked = []
+        for combination in combinations:
+            bit = slot_bits[combination['time_slot_id']]
+            busy = 0
+            for resource in self._resources(lecture, combination['classroom_id']):
+                busy |= self._busy_mask(occupancy, resource, mask_cache)
+            if busy >> bit & 1:
+                blocked.append(combination)
+            elif len(placements) < k:
+                placements.append(combination)
+
+        bumps = self._find_bumps(lecture, blocked, occupancy, lecture_dict, classrooms, time_slots,
+                                 slot_bits, overlap_cache, mask_cache, max_bumps)
+
+        return {
+            "placements": placements,
+            "bumps": bumps
+        }
+
+    def _find_bumps(self, lecture: Lecture, blocked: List[Dict[str, Any]],
+                    occupancy: Dict[Tuple[str, str], Dict[int, List[Schedule]]],
+                    lecture_dict: Dict[str, Lecture], classrooms, time_slots: List[TimeSlot],
+                    slot_bits: Dict[str, int], overlap_cache: Dict[str, int],
+                    mask_cache: Dict[Tuple[Tuple[str, str], Optional[str]], int], max_bumps: int) -> List[Dict[str, Any]]:
+        """
+        For blocked placements held up by a single schedule item, find that
+        item's best other placement. The cost of a bump is the combination
+        score the moved item loses
+        """
+        bumps = []
+        # Ranked placements only depend on the fields CombinationGenerator scores,
+        # so lectures sharing them share one ranking
+        blocker_combinations: Dict[Tuple, List[Dict[str, Any]]] = {}
+        for combination in blocked:
+            bit = slot_bits[combination['time_slot_id']]
+            blockers = {}
+            for resource in self._resources(lecture, combination['classroom_id']):
+                for schedule in occupancy.get(resource, {}).get(bit, []):
+                    blockers[schedule.id] = schedule
+            if len(blockers) != 1:
+                continue
+
+            blocker = next(iter(blockers.values()))
+            blocker_lecture = lecture_dict[blocker.lecture_id]
+            ranking_key = (blocker_lecture.time_preference, blocker_lecture.time_per_lec_rreg,
+                           blocker_lecture.qasja_lende_rreg)
+            if ranking_key not in blocker_combinations:
+                blocker_combinations[ranking_key] = self.combination_generator._generate_lecture_combinations(
+                    blocker_lecture, classrooms, time_slots
+                )
+
+            # Resources taken by the bumped-in lecture, and the blocker's own bookings released
+            target_mask = self._overlap_mask(combination['time_slot_id'], time_slots, overlap_cache)
+            target_resources = set(self._resources(lecture, combination['classroom_id']))
+            alternative = None
+            for candidate in blocker_combinations[ranking_key]:
+                if (candidate['time_slot_id'], candidate['classroom_id']) == (blocker.time_slot_id, blocker.classroom_id):
+                    continue
+                candidate_bit = slot_bits[candidate['time_slot_id']]
+                busy = 0
+                for resource in self._resources(blocker_lecture, candidate['classroom_id']):
+                    busy |= self._busy_mask(occupancy, resource, mask_cache, exclude_id=blocker.id)
+                    if resource in target_resources:
+                        busy |= target_mask
+                if not busy >> candidate_bit & 1:
+                    alternative = candidate
+                    break
+            if not alternative:
+                continue
+
+            bumps.append({
+                "time_slot_id": combination['time_slot_id'],
+                "classroom_id": combination['classroom_id'],
+                "score": combination['score'],
+                "cost": self._placement_score(blocker_lecture, blocker.time_slot_id, blocker.classroom_id) - alternative['score'],
+                "bump": {
+                    "schedule_id": blocker.id,
+                    "lecture_id": blocker.lecture_id,
+                    "from_time_slot_id": blocker.time_slot_id,
+                    "from_classroom_id": blocker.classroom_id,
+                    "to_time_slot_id": alternative['time_slot_id'],
+                    "to_classroom_id": alternative['classroom_id']
+                }
+            })
+
+        bumps.sort(key=lambda bump: (bump['cost'], -bump['score']))
+        return bumps[:max_bumps]
+
+    def _resources(self, lecture: Lecture, classroom_id: str) -> List[Tuple[str, str]]:
+        """
+        Resources a lecture occupies in a classroom
+        """
+        resources = [
+            ('classroom', classroom_id),
+            ('professor', lecture.prof_rreg),
+            ('group', self._extract_main_group(lecture.grup_rreg))
+        ]
+        if '.' in lecture.grup_rreg:
+            resources.append(('subgroup', lecture.grup_rreg))
+        return resources
+
+    def _busy_mask(self, occupancy: Dict[Tuple[str, str], Dict[int, List[Schedule]]], resource: Tuple[str, str],
+                   mask_cache: Dict[Tuple[Tuple[str, str], Optional[str]], int], exclude_id: Optional[str] = None) -> int:
+        """
+        Bitset of slots where a resource is busy, optionally ignoring one schedule item
+        """
+        key = (resource, exclude_id)
+        if key not in mask_cache:
+            mask = 0
+            for bit, booked in occupancy.get(resource, {}).items():
+                if any(schedule.id != exclude_id for schedule in booked):
+                    mask |= 1 << bit
+            mask_cache[key] = mask
+        return mask_cache[key]
+
+    def _bits(self, mask: int) -> List[int]:
+        """
+        Indices of the set bits of a bitset
+        """
+        bits = []
+        while mask:
+            bits.append((mask & -mask).bit_length() - 1)
+            mask &= mask - 1
+        return bits
+
+    def _overlap_mask(self, time_slot_id: str, time_slots: List[TimeSlot], cache: Dict[str, int]) -> int:
+        """
+        Bitset of the available time slots overlapping a (possibly unavailable) time slot
+        """
+        if time_slot_id not in cache:
+            day, start, end = slot_interval(time_slot_id, self.time_slot_service.get_time_slot(time_slot_id))
+            mask = 0
+            for bit, time_slot in enumerate(time_slots):
+                other_day, other_start, other_end = slot_interval(time_slot.id, time_slot)
+                if time_slot.id == time_slot_id or (other_day == day and other_start < end and start < other_end):
+                    mask |= 1 << bit
+            cache[time_slot_id] = mask
+        return cache[time_slot_id]
+
+    def _placement_score(self, lecture: Lecture, time_slot_id: str, classroom_id: str) -> float:
+        """
+        CombinationGenerator score of a lecture's current placement (0 if the slot or room is unknown)
+        """
+        time_slot = self.time_slot_service.get_time_slot(time_slot_id)
+        classroom = self.classroom_service.get_classroom(classroom_id)
+        if not time_slot or not classroom:
+            return 0.0
+        return self.combination_generator._calculate_combination_score(lecture, classroom, time_slot)
+
+    def _extract_main_group(self, group_id: str) -> str:
+        """
+        Extract main group from subgroup (e.g., "Gr. 1.1" -> "Gr. 1")
+        """
+        if '.' in group_id:
+            parts = group_id.split('.')
+            return f"{parts[0]}.{parts[1]}"
+        return group_id
@@ -0,0 +1,28 @@
+from typing import Dict, Tuple, Any, Callable, Hashable
+
+class ResultCache:
+    def __init__(self):
+        # name -> (fingerprint, result); only the latest fingerprint is kept per name
+        self.entries: Dict[Hashable, Tuple[Hashable, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name: Hashable, fingerprint: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get a result memoized against a fingerprint, recomputing it when the fingerprint changed
+        """
+        entry = self.entries.get(name)
+        if entry and entry[0] == fingerprint:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        result = compute()
+        self.entries[name] = (fingerprint, result)
+        return result
+
+    def clear(self):
+        """
+        Drop all memoized results
+        """
+        self.entries.clear()
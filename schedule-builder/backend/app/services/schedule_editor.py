@@ -0,0 +1,119 @@
+import threading
+from typing import Dict, Optional, Any, Union
+from app.services.conflict_index import ConflictIndex
+from app.services.score_tracker import ScoreTracker
+from app.services.database_service import DatabaseService
+from app.services.write_behind import WriteBehindQueue
+
+# Conflicts a manual edit may not introduce unless forced
+HARD_CONFLICT_TYPES = {
+    'classroom_conflict',
+    'professor_conflict',
+    'group_conflict',
+    'subgroup_conflict',
+    'time_slot_conflict'
+}
+
+# Edits are checked and applied under one lock, so concurrent requests cannot
+# both pass validation for the same room or interleave counter updates.
+# Anything else that changes the conflict index or score counters takes it too
+class ScheduleEditor:
+    def __init__(self, conflict_index: ConflictIndex, score_tracker: ScoreTracker,
+                 schedule_store: Union[DatabaseService, WriteBehindQueue]):
+        self.conflict_index = conflict_index
+        self.score_tracker = score_tracker
+        self.schedule_store = schedule_store
+        self.lock = threading.Lock()
+
+    def move_schedule(self, schedule_id: str, time_slot_id: str, classroom_id: str,
+                      force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Move one schedule item if the move introduces no hard conflict (or force is set).
+        Returns None if the item does not exist
+        """
+        with self.lock:
+            if schedule_id not in self.conflict_index.schedules:
+                return None
+
+            error = self._check_placement(time_slot_id, classroom_id)
+            if error:
+                return {"applied": False, "error": error}
+
+            introduced, resolved = self.conflict_index.move_conflict_changes(schedule_id, time_slot_id, classroom_id)
+            blocking = [conflict for conflict in introduced if conflict["type"] in HARD_CONFLICT_TYPES]
+            if blocking and not force:
+                return {"applied": False, "blocking_conflicts": blocking}
+
+            schedule = self._apply_move(schedule_id, time_slot_id, classroom_id)
+            self.schedule_store.save_schedule(schedule)
+
+            return {
+                "applied": True,
+                "schedule": schedule,
+                "introduced_conflicts": introduced,
+                "resolved_conflicts": resolved,
+                "scores": self.get_scores()
+            }
+
+    def swap_schedules(self, first_id: str, second_id: str, force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Exchange the time slots and classrooms of two schedule items if that
+        introduces no hard conflict (or force is set). Returns None if either item does not exist
+        """
+        with self.lock:
+            schedules = self.conflict_index.schedules
+            if first_id not in schedules or second_id not in schedules:
+                return None
+
+            first, second = schedules[first_id], schedules[second_id]
+            first_placement = (first.time_slot_id, first.classroom_id)
+            second_placement = (second.time_slot_id, second.classroom_id)
+
+            # Each item is checked at the other's placement with the other one out of the way
+            introduced, resolved = self.conflict_index.move_conflict_changes(first_id, *second_placement, ignore_ids=(second_id,))
+            second_introduced, second_resolved = self.conflict_index.move_conflict_changes(second_id, *first_placement, ignore_ids=(first_id,))
+            introduced += second_introduced
+            resolved += second_resolved
+
+            blocking = [conflict for conflict in introduced if conflict["type"] in HARD_CONFLICT_TYPES]
+            if blocking and not force:
+                return {"applied": False, "blocking_conflicts": blocking}
+
+            moved = [self._apply_move(first_id, *second_placement), self._apply_move(second_id, *first_placement)]
+            for schedule in moved:
+                self.schedule_store.save_schedule(schedule)
+
+            return {
+                "applied": True,
+                "schedules": moved,
+                "introduced_conflicts": introduced,
+                "resolved_conflicts": resolved,
+                "scores": self.get_scores()
+            }
+
+    def get_scores(self) -> Dict[str, float]:
+        """
+        Current schedule scores from the incrementally maintained counters
+        """
+        conflicts = self.conflict_index.get_conflicts()
+        conflict_count = len(conflicts["classroom_conflicts"]) + len(conflicts["professor_conflicts"])
+        return self.score_tracker.get_scores(conflict_count)
+
+    def _apply_move(self, schedule_id: str, time_slot_id: str, classroom_id: str):
+        """
+        Move a schedule item in the conflict index and score counters
+        """
+        self.score_tracker.remove(self.conflict_index.schedules[schedule_id])
+        schedule = self.conflict_index.move_schedule(schedule_id, time_slot_id, classroom_id)
+        self.score_tracker.add(schedule)
+        return schedule
+
+    def _check_placement(self, time_slot_id: str, classroom_id: str) -> Optional[str]:
+        """
+        Error message if the target time slot or classroom does not exist
+        """
+        if not self.score_tracker.time_slot_service.get_time_slot(time_slot_id):
+            return f"Time slot {time_slot_id} not found"
+        if not self.score_tracker.classroom_service.get_classroom(classroom_id):
+            return f"Classroom {classroom_id} not found"
+        return None
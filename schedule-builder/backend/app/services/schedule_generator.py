@@ -1,4 +1,4 @@
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, Optional
 from app.models.lecture import Lecture
 from app.models.classroom import Classroom
 from app.models.time_slot import TimeSlot
@@ -8,6 +8,7 @@ from app.models.subgroup import Subgroup
 from app.services.classroom_service import ClassroomService
 from app.services.time_slot_service import TimeSlotService
 from app.services.combination_generator import CombinationGenerator
+from app.services.interval_sweep import slot_interval, find_overlaps
 import uuid
 from datetime import datetime
 
@@ -19,13 +20,19 @@ class ScheduleGenerator:
         self.schedules: List[Schedule] = []
     
     def generate_schedule(self, lectures: List[Lecture], groups: List[Group], 
-                         subgroups: List[Subgroup]) -> Tuple[List[Schedule], List[str]]:
+                         subgroups: List[Subgroup],
+                         pinned_schedules: Optional[List[Schedule]] = None,
+                         seed_schedules: Optional[List[Schedule]] = None) -> Tuple[List[Schedule], List[str]]:
         """
         Generate a schedule with constraint checking
         Returns a tuple of (schedules, conflicts)
+        Pinned schedules are booked first and kept as they are, so only
+        lectures without a pinned schedule item are searched for.
+        Seed schedules (a warm start) are kept wherever they still fit;
+        only the lectures whose seed does not fit are searched for
         """
         conflicts = []
-        generated_schedules = []
+        generated_schedules = list(pinned_schedules or [])
         
         # Sort lectures by priority (exercises after lectures, electives at edges)
         sorted_lectures = self._sort_lectures(lectures)
@@ -54,8 +61,61 @@ class ScheduleGenerator:
                 if lecture.grup_rreg not in subgroup_schedule:
                     subgroup_schedule[lecture.grup_rreg] = set()
         
-        # Generate schedule for each lecture
+        # Book the pinned schedule items (group bookings need a known lecture)
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        pinned_lecture_ids = set()
+        for schedule in generated_schedules:
+            pinned_lecture_ids.add(schedule.lecture_id)
+            lecture = lecture_dict.get(schedule.lecture_id)
+            if lecture:
+                self._update_tracking_structures(
+                    schedule, lecture, used_classrooms,
+                    professor_schedule, group_schedule, subgroup_schedule
+                )
+            else:
+                used_classrooms.setdefault(schedule.classroom_id, set()).add(schedule.time_slot_id)
+                professor_schedule.setdefault(schedule.professor, set()).add(schedule.time_slot_id)
+        
+        # Keep the seeded placements that still satisfy every constraint
+        seeds: Dict[str, Schedule] = {}
+        for seed in seed_schedules or []:
+            seeds.setdefault(seed.lecture_id, seed)
+        available_time_slot_ids = {time_slot.id for time_slot in self.time_slot_service.get_available_time_slots()}
+        available_classroom_ids = {classroom.id for classroom in self.classroom_service.get_available_classrooms()}
+        unscheduled_lectures = []
         for lecture in sorted_lectures:
+            if lecture.id in pinned_lecture_ids:
+                continue
+            seed = seeds.get(lecture.id)
+            if (
+                seed
+                and seed.time_slot_id in available_time_slot_ids
+                and seed.classroom_id in available_classroom_ids
+                and not self._check_constraints(
+                    lecture, seed.classroom_id, seed.time_slot_id,
+                    used_classrooms, professor_schedule,
+                    group_schedule, subgroup_schedule
+                )
+            ):
+                schedule = Schedule(
+                    id=seed.id or str(uuid.uuid4()),
+                    lecture_id=lecture.id,
+                    time_slot_id=seed.time_slot_id,
+                    classroom_id=seed.classroom_id,
+                    professor=lecture.prof_rreg,
+                    created_at=seed.created_at or datetime.now(),
+                    updated_at=datetime.now()
+                )
+                generated_schedules.append(schedule)
+                self._update_tracking_structures(
+                    schedule, lecture, used_classrooms,
+                    professor_schedule, group_schedule, subgroup_schedule
+                )
+            else:
+                unscheduled_lectures.append(lecture)
+        
+        # Generate schedule for each remaining lecture
+        for lecture in unscheduled_lectures:
             schedule, conflict = self._schedule_lecture(
                 lecture, used_classrooms, professor_schedule, 
                 group_schedule, subgroup_schedule
@@ -73,6 +133,48 @@ class ScheduleGenerator:
         
         return generated_schedules, conflicts
     
+    def match_base_schedules(self, base_schedules: List[Schedule], base_lectures: List[Lecture],
+                             lectures: List[Lecture]) -> List[Schedule]:
+        """
+        Carry a saved schedule over to the current lectures, for use as seed
+        schedules. Items are matched on course, professor, group and lecture
+        type; items whose lecture was not saved with the schedule are matched
+        on lecture id and professor. Returns unpinned copies of the matched
+        items pointing at the current lectures
+        """
+        base_lecture_dict = {lecture.id: lecture for lecture in base_lectures}
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        lectures_by_key: Dict[Tuple[str, str, str, str], List[Lecture]] = {}
+        for lecture in lectures:
+            lectures_by_key.setdefault(self._lecture_key(lecture), []).append(lecture)
+        
+        matched_schedules = []
+        matched_lecture_ids = set()
+        for schedule in base_schedules:
+            base_lecture = base_lecture_dict.get(schedule.lecture_id)
+            if base_lecture:
+                candidates = lectures_by_key.get(self._lecture_key(base_lecture), [])
+            else:
+                lecture = lecture_dict.get(schedule.lecture_id)
+                candidates = [lecture] if lecture and lecture.prof_rreg == schedule.professor else []
+            
+            lecture = next((item for item in candidates if item.id not in matched_lecture_ids), None)
+            if lecture:
+                matched_lecture_ids.add(lecture.id)
+                matched_schedules.append(schedule.copy(update={
+                    'lecture_id': lecture.id,
+                    'professor': lecture.prof_rreg,
+                    'pinned': False
+                }))
+        
+        return matched_schedules
+    
+    def _lecture_key(self, lecture: Lecture) -> Tuple[str, str, str, str]:
+        """
+        Identify a lecture across terms by course, professor, group and lecture type
+        """
+        return (lecture.lenda_e_rreg, lecture.prof_rreg, lecture.grup_rreg, lecture.status_lende_rreg)
+    
     def _sort_lectures(self, lectures: List[Lecture]) -> List[Lecture]:
         """
         Sort lectures by priority:
@@ -230,33 +332,32 @@ class ScheduleGenerator:
     
     def get_schedule_conflicts(self, schedules: List[Schedule]) -> List[str]:
         """
-        Check for conflicts in an existing schedule
+        Check for conflicts in an existing schedule.
+        Bookings clash when their time slots overlap on the same day
         """
         conflicts = []
-        
-        # Check for classroom conflicts
-        classroom_usage = {}
+        intervals = {}
         for schedule in schedules:
-            key = (schedule.classroom_id, schedule.time_slot_id)
-            if key in classroom_usage:
-                conflicts.append(
-                    f"Classroom conflict: {schedule.classroom_id} "
-                    f"double-booked at time slot {schedule.time_slot_id}"
+            if schedule.time_slot_id not in intervals:
+                intervals[schedule.time_slot_id] = slot_interval(
+                    schedule.time_slot_id, self.time_slot_service.get_time_slot(schedule.time_slot_id)
                 )
-            else:
-                classroom_usage[key] = schedule.lecture_id
+        
+        # Check for classroom conflicts
+        classroom_bookings = [(schedule.classroom_id, intervals[schedule.time_slot_id], schedule) for schedule in schedules]
+        for _, schedule in find_overlaps(classroom_bookings):
+            conflicts.append(
+                f"Classroom conflict: {schedule.classroom_id} "
+                f"double-booked at time slot {schedule.time_slot_id}"
+            )
         
         # Check for professor conflicts
-        professor_usage = {}
-        for schedule in schedules:
-            key = (schedule.professor, schedule.time_slot_id)
-            if key in professor_usage:
-                conflicts.append(
-                    f"Professor conflict: {schedule.professor} "
-                    f"double-booked at time slot {schedule.time_slot_id}"
-                )
-            else:
-                professor_usage[key] = schedule.lecture_id
+        professor_bookings = [(schedule.professor, intervals[schedule.time_slot_id], schedule) for schedule in schedules]
+        for _, schedule in find_overlaps(professor_bookings):
+            conflicts.append(
+                f"Professor conflict: {schedule.professor} "
+                f"double-booked at time slot {schedule.time_slot_id}"
+            )
         
         return conflicts
     
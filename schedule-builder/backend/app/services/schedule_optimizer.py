@@ -1,4 +1,4 @@
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Tuple, Set, Optional, Callable
 from app.models.lecture import Lecture
 from app.models.schedule import Schedule
 from app.models.group import Group
@@ -7,14 +7,26 @@ from app.models.time_slot import TimeSlot
 from app.services.schedule_generator import ScheduleGenerator
 from app.services.classroom_service import ClassroomService
 from app.services.time_slot_service import TimeSlotService
+from app.services.group_size_estimator import GroupSizeEstimator
+from app.services.assignment_solver import solve_assignment
+from app.services.occupancy_index import OccupancyIndex
+from app.services.pareto_archive import ParetoArchive
+from app.services.batch_scorer import BatchScheduleScorer
+from app.services.interval_sweep import slot_interval
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
 import random
 import copy
+import math
+import os
 
 class ScheduleOptimizer:
     def __init__(self, classroom_service: ClassroomService, time_slot_service: TimeSlotService):
         self.classroom_service = classroom_service
         self.time_slot_service = time_slot_service
         self.schedule_generator = ScheduleGenerator(classroom_service, time_slot_service)
+        # Below this many Hungarian steps per optimization, worker processes cost more than they save
+        self.parallel_threshold = 2_000_000
     
     def optimize_schedule(self, schedules: List[Schedule], lectures: List[Lecture], 
                          groups: List[Group], departments: List[Department]) -> List[Schedule]:
@@ -27,8 +39,9 @@ class ScheduleOptimizer:
         # Apply various optimization techniques
         optimized_schedules = self._optimize_departmental_cohesion(optimized_schedules, lectures)
         optimized_schedules = self._optimize_workload_balance(optimized_schedules, lectures)
-        optimized_schedules = self._optimize_classroom_utilization(optimized_schedules)
-        optimized_schedules = self._optimize_daily_distribution(optimized_schedules, lectures)
+        optimized_schedules = self._optimize_daily_distribution(optimized_schedules, lectures, groups)
+        # Rooms are fitted last so lectures moved between days also get well-sized rooms
+        optimized_schedules = self._optimize_classroom_utilization(optimized_schedules, lectures, groups)
         
         return optimized_schedules
     
@@ -113,53 +126,238 @@ class ScheduleOptimizer:
         
         return optimized_schedules
     
-    def _optimize_classroom_utilization(self, schedules: List[Schedule]) -> List[Schedule]:
+    def _optimize_classroom_utilization(self, schedules: List[Schedule], lectures: List[Lecture],
+                                      groups: List[Group]) -> List[Schedule]:
         """
-        Optimize classroom utilization (match lecture size to room capacity)
+        Optimize classroom utilization (match lecture size to room capacity).
+        Time slots stay fixed; within each group of overlapping time slots the
+        rooms are re-assigned as a min-cost assignment between expected
+        attendance and room capacity. Lectures without a known group size keep
+        their rooms, and groups with more lectures than free rooms are left as they are
         """
         optimized_schedules = schedules.copy()
         
-        # This would involve moving lectures to more appropriately sized classrooms
-        # when possible, but we need to check constraints
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        size_estimator = GroupSizeEstimator(groups)
+        
+        # Same minimum capacity as ScheduleGenerator._check_constraints
+        classrooms = [
+            classroom for classroom in self.classroom_service.get_available_classrooms()
+            if classroom.capacity >= 30
+        ]
+        if not classrooms:
+            return optimized_schedules
+        
+        # Group schedules by overlapping time slots, so no room is handed out twice
+        # at the same time; pinned schedules and schedules of unknown lectures or
+        # group sizes keep their rooms
+        slot_groups = self._overlapping_slot_groups({schedule.time_slot_id for schedule in optimized_schedules})
+        slot_schedules: Dict[int, List[Tuple[Schedule, int]]] = {}
+        blocked_rooms: Dict[int, Set[str]] = {}
+        for schedule in optimized_schedules:
+            slot_group = slot_groups[schedule.time_slot_id]
+            lecture = lecture_dict.get(schedule.lecture_id)
+            expected_size = size_estimator.get_expected_size(lecture) if lecture else None
+            if expected_size is not None and not schedule.pinned:
+                slot_schedules.setdefault(slot_group, []).append((schedule, expected_size))
+            else:
+                blocked_rooms.setdefault(slot_group, set()).add(schedule.classroom_id)
+        
+        # Build one cost matrix per group of overlapping time slots
+        problems = []
+        for slot_group, slot_scheds in slot_schedules.items():
+            blocked = blocked_rooms.get(slot_group, set())
+            slot_classrooms = [classroom for classroom in classrooms if classroom.id not in blocked]
+            # Lectures left without a room would keep one that may have been given away
+            if not slot_classrooms or len(slot_scheds) > len(slot_classrooms):
+                continue
+            
+            cost_matrix = []
+            for schedule, expected_size in slot_scheds:
+                cost_matrix.append([
+                    self._room_fit_cost(expected_size, classroom.capacity, classroom.id == schedule.classroom_id)
+                    for classroom in slot_classrooms
+                ])
+            problems.append((slot_scheds, slot_classrooms, cost_matrix))
+        
+        assignments = self._solve_assignments([cost_matrix for _, _, cost_matrix in problems])
+        
+        # Apply the new rooms (every lecture of a solved group gets one)
+        for (slot_scheds, slot_classrooms, _), assignment in zip(problems, assignments):
+            for row, column in assignment:
+                schedule = slot_scheds[row][0]
+                new_classroom_id = slot_classrooms[column].id
+                if schedule.classroom_id != new_classroom_id:
+                    schedule.classroom_id = new_classroom_id
+                    schedule.updated_at = datetime.now()
         
         return optimized_schedules
     
-    def _optimize_daily_distribution(self, schedules: List[Schedule], 
-                                  lectures: List[Lecture]) -> List[Schedule]:
+    def _overlapping_slot_groups(self, time_slot_ids: Set[str]) -> Dict[str, int]:
         """
-        Ensure even distribution of lectures across weekdays
+        Number the groups of time slots connected by overlapping intervals.
+        Returns time slot id -> group number
         """
-        # Group schedules by day
-        day_schedules = {}
-        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        intervals = sorted(
+            (slot_interval(time_slot_id, self.time_slot_service.get_time_slot(time_slot_id)), time_slot_id)
+            for time_slot_id in time_slot_ids
+        )
+        groups: Dict[str, int] = {}
+        group = -1
+        current_day, current_end = None, None
+        for (day, start, end), time_slot_id in intervals:
+            # Intervals that only touch do not overlap
+            if day != current_day or start >= current_end:
+                group += 1
+                current_day, current_end = day, end
+            else:
+                current_end = max(current_end, end)
+            groups[time_slot_id] = group
+        return groups
+    
+    def _room_fit_cost(self, expected_size: int, capacity: int, is_current_room: bool) -> float:
+        """
+        Cost of placing a lecture of the expected size into a room.
+        Missing seats are weighted far above empty seats, and the current room
+        gets a tiny bonus so equally good assignments do not move lectures
+        """
+        if capacity >= expected_size:
+            cost = float(capacity - expected_size)
+        else:
+            cost = float((expected_size - capacity) * 10)
         
-        for schedule in schedules:
-            time_slot = self.time_slot_service.get_time_slot(schedule.time_slot_id)
-            if time_slot:
-                day = time_slot.day
-                
-                if day not in day_schedules:
-                    day_schedules[day] = []
-                day_schedules[day].append(schedule)
-        
-        # Calculate average lectures per day
-        total_lectures = sum(len(day_scheds) for day_scheds in day_schedules.values())
-        avg_per_day = total_lectures / len(day_schedules) if day_schedules else 0
-        
-        # Identify overloaded days
-        overloaded_days = [
-            day for day, day_scheds in day_schedules.items() 
-            if len(day_scheds) > avg_per_day * 1.2
-        ]
+        if is_current_room:
+            cost -= 0.001
+        
+        return cost
+    
+    def _solve_assignments(self, cost_matrices: List[List[List[float]]]) -> List[List[Tuple[int, int]]]:
+        """
+        Solve independent assignment problems, in parallel worker processes
+        when there is enough work to pay for them
+        """
+        total_work = sum(len(matrix) ** 2 * len(matrix[0]) for matrix in cost_matrices if matrix)
+        worker_count = min(os.cpu_count() or 1, len(cost_matrices))
+        
+        if worker_count > 1 and total_work >= self.parallel_threshold:
+            try:
+                with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                    return list(executor.map(solve_assignment, cost_matrices))
+            except Exception as e:
+                print(f"Error solving classroom assignments in parallel: {e}")
         
+        return [solve_assignment(cost_matrix) for cost_matrix in cost_matrices]
+    
+    def _optimize_daily_distribution(self, schedules: List[Schedule], lectures: List[Lecture],
+                                  groups: List[Group], target_variance: float = 1.0) -> List[Schedule]:
+        """
+        Ensure even distribution of lectures across weekdays by moving lectures
+        from overloaded days into free slots on underloaded days, until the
+        variance of the lectures-per-day counts reaches target_variance
+        """
         optimized_schedules = schedules.copy()
+        lecture_dict = {lecture.id: lecture for lecture in lectures}
+        group_limits = {group.id: group.daily_limit for group in groups}
+        
+        # Candidate slots and rooms for moved lectures
+        day_slots: Dict[str, List[TimeSlot]] = {}
+        for time_slot in self.time_slot_service.get_available_time_slots():
+            day_slots.setdefault(time_slot.day, []).append(time_slot)
+        # Same minimum capacity as ScheduleGenerator._check_constraints
+        classroom_ids = [
+            classroom.id for classroom in self.classroom_service.get_available_classrooms()
+            if classroom.capacity >= 30
+        ]
+        if len(day_slots) < 2 or not classroom_ids:
+            return optimized_schedules
         
-        # Try to move lectures from overloaded days to underloaded days
-        # This is a simplified approach - in a real implementation,
-        # we would need to check constraints and find valid alternative slots
+        index = OccupancyIndex(self.time_slot_service).build(optimized_schedules, lectures)
+        
+        # Group movable schedules by day; pinned schedules count towards their day but stay put
+        day_schedules: Dict[str, List[Schedule]] = {day: [] for day in day_slots}
+        day_counts = {day: 0 for day in day_slots}
+        for schedule in optimized_schedules:
+            day = index.slot_days.get(schedule.time_slot_id)
+            if day in day_schedules and schedule.lecture_id in lecture_dict:
+                day_counts[day] += 1
+                if not schedule.pinned:
+                    day_schedules[day].append(schedule)
+        
+        # Overloaded days that have no movable lecture left
+        exhausted_days: Set[str] = set()
+        
+        while self._day_count_variance(day_counts) > target_variance:
+            source_days = [day for day in day_counts if day not in exhausted_days]
+            if not source_days:
+                break
+            source_day = max(source_days, key=lambda day: day_counts[day])
+            
+            moved = False
+            for target_day in sorted(day_counts, key=lambda day: day_counts[day]):
+                # A move only lowers the variance while the gap is at least two lectures
+                if day_counts[source_day] - day_counts[target_day] < 2:
+                    break
+                
+                moved_schedule = self._move_lecture_to_day(
+                    day_schedules[source_day], day_slots[target_day], classroom_ids,
+                    index, lecture_dict, group_limits
+                )
+                if moved_schedule:
+                    day_schedules[source_day].remove(moved_schedule)
+                    day_schedules[target_day].append(moved_schedule)
+                    day_counts[source_day] -= 1
+                    day_counts[target_day] += 1
+                    moved = True
+                    break
+            
+            if not moved:
+                exhausted_days.add(source_day)
         
         return optimized_schedules
     
+    def _move_lecture_to_day(self, source_schedules: List[Schedule], target_slots: List[TimeSlot],
+                             classroom_ids: List[str], index: OccupancyIndex,
+                             lecture_dict: Dict[str, Lecture], group_limits: Dict[str, int]) -> Schedule:
+        """
+        Move the first schedule item that fits into one of the target slots.
+        Slots in the same period (morning/midday/evening) and the current room
+        are tried first. Returns the moved schedule or None
+        """
+        for schedule in source_schedules:
+            lecture = lecture_dict[schedule.lecture_id]
+            period = schedule.time_slot_id.split('_')[-1]
+            candidate_slots = sorted(target_slots, key=lambda time_slot: time_slot.id.split('_')[-1] != period)
+            candidate_rooms = [schedule.classroom_id] if schedule.classroom_id in classroom_ids else []
+            candidate_rooms += [room_id for room_id in classroom_ids if room_id != schedule.classroom_id]
+            
+            # Take the lecture out of the index so it does not block itself
+            index.remove(schedule, lecture)
+            for time_slot in candidate_slots:
+                if time_slot.duration < lecture.time_per_lec_rreg:
+                    continue
+                # Professor and group checks do not depend on the room
+                if not index.is_professor_free(lecture.prof_rreg, time_slot.id) or not index.is_group_free(lecture, time_slot.id):
+                    continue
+                for room_id in candidate_rooms:
+                    if index.can_place(lecture, time_slot.id, room_id, group_limits):
+                        schedule.time_slot_id = time_slot.id
+                        schedule.classroom_id = room_id
+                        schedule.updated_at = datetime.now()
+                        index.add(schedule, lecture)
+                        return schedule
+            index.add(schedule, lecture)
+        
+        return None
+    
+    def _day_count_variance(self, day_counts: Dict[str, int]) -> float:
+        """
+        Variance of the number of lectures per day
+        """
+        if not day_counts:
+            return 0.0
+        avg_per_day = sum(day_counts.values()) / len(day_counts)
+        return sum((count - avg_per_day) ** 2 for count in day_counts.values()) / len(day_counts)
+    
     def calculate_schedule_score(self, schedules: List[Schedule], lectures: List[Lecture], 
                                groups: List[Group], departments: List[Department]) -> Dict[str, float]:
         """
@@ -266,6 +464,16 @@ class ScheduleOptimizer:
         
         return scores
     
+    def calculate_schedule_scores_batch(self, schedules: List[Schedule], lectures: List[Lecture],
+                                        assignments: List[List[Tuple[str, str]]]) -> List[Dict[str, float]]:
+        """
+        Score many assignments of the same schedule items at once with the
+        vectorized scorer (same results as calculate_schedule_score on each)
+        """
+        scorer = BatchScheduleScorer(self.classroom_service, self.time_slot_service, schedules, lectures)
+        scores = scorer.score(*scorer.encode(assignments))
+        return [{key: float(values[i]) for key, values in scores.items()} for i in range(len(assignments))]
+    
     def _matches_preference(self, preference: str, time_slot: TimeSlot) -> bool:
         """
         Check if a time slot matches a time preference
@@ -308,10 +516,11 @@ class ScheduleOptimizer:
         # Make a copy of the schedules
         neighbor_schedules = copy.deepcopy(schedules)
         
-        # If we have schedules, randomly modify one
-        if neighbor_schedules:
+        # If we have unpinned schedules, randomly modify one
+        movable = [idx for idx, schedule in enumerate(neighbor_schedules) if not schedule.pinned]
+        if movable:
             # Select a random schedule to modify
-            idx = random.randint(0, len(neighbor_schedules) - 1)
+            idx = random.choice(movable)
             
             # Get available time slots and classrooms
             available_time_slots = self.time_slot_service.get_available_time_slots()
@@ -329,4 +538,225 @@ class ScheduleOptimizer:
                 new_classroom = random.choice(available_classrooms)
                 neighbor_schedules[idx].classroom_id = new_classroom.id
         
-        return neighbor_schedules
\ No newline at end of file
+        return neighbor_schedules
+    
+    def parallel_tempering(self, schedules: List[Schedule], lectures: List[Lecture],
+                           groups: List[Group], departments: List[Department],
+                           replicas: int = 4, rounds: int = 20, steps_per_round: int = 25,
+                           min_temperature: float = 0.1, max_temperature: float = 10.0,
+                           max_workers: Optional[int] = None,
+                           progress_callback: Optional[Callable[[int, float], None]] = None) -> List[Schedule]:
+        """
+        Optimize with replica exchange: one annealing chain per temperature runs in
+        its own worker process, and after every round states are swapped between
+        neighbouring temperatures. The best state seen by any chain is returned
+        """
+        if not schedules:
+            return copy.deepcopy(schedules)
+        
+        replicas = max(1, replicas)
+        if replicas > 1:
+            ratio = max_temperature / min_temperature
+            temperatures = [min_temperature * ratio ** (k / (replicas - 1)) for k in range(replicas)]
+        else:
+            temperatures = [min_temperature]
+        
+        if not self._movable_positions(schedules):
+            return copy.deepcopy(schedules)
+        
+        initial_assignment = self.to_assignment(schedules)
+        worker_args = (self.classroom_service, self.time_slot_service, schedules, lectures, groups, departments)
+        
+        # Every replica starts from the current schedule
+        states = [list(initial_assignment) for _ in temperatures]
+        scores = [self._score_assignment(initial_assignment, schedules, lectures, groups, departments)] * replicas
+        best_assignment = list(initial_assignment)
+        best_score = scores[0]
+        
+        executor = None
+        worker_count = min(max_workers or os.cpu_count() or 1, replicas)
+        if worker_count > 1:
+            try:
+                executor = ProcessPoolExecutor(max_workers=worker_count, initializer=_init_tempering_worker,
+                                               initargs=worker_args)
+            except Exception as e:
+                print(f"Error starting parallel tempering workers: {e}")
+        if executor is None:
+            _init_tempering_worker(*worker_args)
+        
+        try:
+            for round_number in range(rounds):
+                # Advance every chain at its own temperature
+                chain_args = [
+                    (states[k], temperatures[k], steps_per_round, random.randrange(2 ** 32))
+                    for k in range(replicas)
+                ]
+                if executor:
+                    futures = {executor.submit(_run_tempering_chain, *args): k for k, args in enumerate(chain_args)}
+                    results = {}
+                    for future in as_completed(futures):
+                        results[futures[future]] = future.result()
+                else:
+                    results = {k: _run_tempering_chain(*args) for k, args in enumerate(chain_args)}
+                
+                for k in range(replicas):
+                    states[k] = results[k]['assignment']
+                    scores[k] = results[k]['score']
+                    if results[k]['best_score'] > best_score:
+                        best_score = results[k]['best_score']
+                        best_assignment = results[k]['best_assignment']
+                
+                # Swap neighbouring replicas, alternating even and odd pairs between rounds
+                for k in range(round_number % 2, replicas - 1, 2):
+                    exponent = (scores[k + 1] - scores[k]) * (1 / temperatures[k] - 1 / temperatures[k + 1])
+                    if exponent >= 0 or random.random() < math.exp(exponent):
+                        states[k], states[k + 1] = states[k + 1], states[k]
+                        scores[k], scores[k + 1] = scores[k + 1], scores[k]
+                
+                if progress_callback:
+                    progress_callback(round_number, best_score)
+        finally:
+            if executor:
+                executor.shutdown()
+        
+        return self.apply_assignment(schedules, best_assignment)
+    
+    def pareto_optimization(self, schedules: List[Schedule], lectures: List[Lecture],
+                            groups: List[Group], departments: List[Department],
+                            max_iterations: int = 200, archive_size: int = 50) -> ParetoArchive:
+        """
+        Multi-objective local search: repeatedly mutate a random archived
+        solution and keep every schedule that no other schedule beats on all
+        six sub-scores. The planner can then rank the front with any weights
+        """
+        archive = ParetoArchive(max_size=archive_size)
+        if not schedules:
+            return archive
+        
+        time_slot_ids = [time_slot.id for time_slot in self.time_slot_service.get_available_time_slots()]
+        classroom_ids = [classroom.id for classroom in self.classroom_service.get_available_classrooms()]
+        movable = self._movable_positions(schedules)
+        
+        initial_assignment = self.to_assignment(schedules)
+        archive.add(initial_assignment, self.calculate_schedule_score(schedules, lectures, groups, departments))
+        
+        rng = random.Random()
+        for _ in range(max_iterations if movable else 0):
+            parent_id = rng.choice(archive.entries)['id']
+            neighbor = self._neighbor_assignment(archive.get_assignment(parent_id), rng, time_slot_ids, classroom_ids, movable)
+            scores = self.calculate_schedule_score(self.apply_assignment(schedules, neighbor), lectures, groups, departments)
+            archive.add(neighbor, scores)
+        
+        return archive
+    
+    def _movable_positions(self, schedules: List[Schedule]) -> List[int]:
+        """
+        Positions of the schedules a search may change (everything not pinned)
+        """
+        return [idx for idx, schedule in enumerate(schedules) if not schedule.pinned]
+    
+    def to_assignment(self, schedules: List[Schedule]) -> List[Tuple[str, str]]:
+        """
+        Reduce schedules to a compact list of (time_slot_id, classroom_id) pairs
+        """
+        return [(schedule.time_slot_id, schedule.classroom_id) for schedule in schedules]
+    
+    def apply_assignment(self, schedules: List[Schedule], assignment: List[Tuple[str, str]]) -> List[Schedule]:
+        """
+        Build new schedules from base schedules and an assignment of the same length
+        """
+        applied_schedules = []
+        for schedule, (time_slot_id, classroom_id) in zip(schedules, assignment):
+            if schedule.time_slot_id == time_slot_id and schedule.classroom_id == classroom_id:
+                applied_schedules.append(schedule.copy())
+            else:
+                applied_schedules.append(schedule.copy(update={
+                    'time_slot_id': time_slot_id,
+                    'classroom_id': classroom_id,
+                    'updated_at': datetime.now()
+                }))
+        return applied_schedules
+    
+    def _score_assignment(self, assignment: List[Tuple[str, str]], schedules: List[Schedule],
+                          lectures: List[Lecture], groups: List[Group], departments: List[Department]) -> float:
+        """
+        Overall score of the schedules described by an assignment
+        """
+        applied_schedules = self.apply_assignment(schedules, assignment)
+        return self.calculate_schedule_score(applied_schedules, lectures, groups, departments)['overall_score']
+    
+    def _neighbor_assignment(self, assignment: List[Tuple[str, str]], rng: random.Random,
+                             time_slot_ids: List[str], classroom_ids: List[str],
+                             movable: Optional[List[int]] = None) -> List[Tuple[str, str]]:
+        """
+        Same move as _generate_neighbor_solution, applied to an assignment:
+        change the time slot or the classroom of one random schedule
+        (restricted to the movable positions when given)
+        """
+        neighbor = list(assignment)
+        idx = rng.choice(movable) if movable is not None else rng.randint(0, len(neighbor) - 1)
+        time_slot_id, classroom_id = neighbor[idx]
+        
+        change_type = rng.choice(['time_slot', 'classroom'])
+        if change_type == 'time_slot' and time_slot_ids:
+            neighbor[idx] = (rng.choice(time_slot_ids), classroom_id)
+        elif change_type == 'classroom' and classroom_ids:
+            neighbor[idx] = (time_slot_id, rng.choice(classroom_ids))
+        
+        return neighbor
+
+# Per-process state for parallel tempering workers, set once by _init_tempering_worker
+_tempering_context: Dict[str, object] = {}
+
+def _init_tempering_worker(classroom_service: ClassroomService, time_slot_service: TimeSlotService,
+                           schedules: List[Schedule], lectures: List[Lecture],
+                           groups: List[Group], departments: List[Department]):
+    """
+    Load the problem into a worker process so chain tasks only carry assignments
+    """
+    _tempering_context['optimizer'] = ScheduleOptimizer(classroom_service, time_slot_service)
+    _tempering_context['schedules'] = schedules
+    _tempering_context['lectures'] = lectures
+    _tempering_context['groups'] = groups
+    _tempering_context['departments'] = departments
+    _tempering_context['time_slot_ids'] = [time_slot.id for time_slot in time_slot_service.get_available_time_slots()]
+    _tempering_context['classroom_ids'] = [classroom.id for classroom in classroom_service.get_available_classrooms()]
+    _tempering_context['movable'] = _tempering_context['optimizer']._movable_positions(schedules)
+
+def _run_tempering_chain(assignment: List[Tuple[str, str]], temperature: float,
+                         steps: int, seed: int) -> Dict[str, object]:
+    """
+    Run one Metropolis annealing chain at a fixed temperature
+    """
+    optimizer: ScheduleOptimizer = _tempering_context['optimizer']
+    problem = (_tempering_context['schedules'], _tempering_context['lectures'],
+               _tempering_context['groups'], _tempering_context['departments'])
+    rng = random.Random(seed)
+    
+    current = list(assignment)
+    current_score = optimizer._score_assignment(current, *problem)
+    best = current
+    best_score = current_score
+    
+    for _ in range(steps):
+        neighbor = optimizer._neighbor_assignment(
+            current, rng, _tempering_context['time_slot_ids'], _tempering_context['classroom_ids'],
+            _tempering_context['movable']
+        )
+        neighbor_score = optimizer._score_assignment(neighbor, *problem)
+        
+        # Always accept improvements, accept worse states with Boltzmann probability
+        delta = neighbor_score - current_score
+        if delta >= 0 or rng.random() < math.exp(delta / temperature):
+            current = neighbor
+            current_score = neighbor_score
+            if current_score > best_score:
+                best = current
+                best_score = current_score
+    
+    return {
+        'assignment': current,
+        'score': current_score,
+        'best_assignment': best,
+        'best_score': best_score
+    }
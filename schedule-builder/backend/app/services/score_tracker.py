@@ -0,0 +1,132 @@
+from typing import List, Dict
+from app.models.schedule import Schedule
+from app.models.lecture import Lecture
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.services.batch_scorer import SCORE_WEIGHTS
+
+# Keeps the counters behind ScheduleOptimizer.calculate_schedule_score so the
+# score of an edited schedule is read in O(rooms + departments + days) instead
+# of rescanning every schedule item
+class ScoreTracker:
+    def __init__(self, schedule_optimizer: ScheduleOptimizer):
+        self.schedule_optimizer = schedule_optimizer
+        self.classroom_service = schedule_optimizer.classroom_service
+        self.time_slot_service = schedule_optimizer.time_slot_service
+        self._reset()
+
+    def _reset(self):
+        """
+        Clear all counters
+        """
+        self.lecture_dict: Dict[str, Lecture] = {}
+        self.slot_counts: Dict[str, int] = {}  # time_slot_id -> schedule items
+        self.load_histogram: Dict[int, int] = {}  # items per slot -> number of slots with that load
+        self.room_counts: Dict[str, int] = {}  # known classroom_id -> schedule items
+        self.day_counts: Dict[str, int] = {}  # day -> schedule items
+        self.department_counts: Dict[str, int] = {}  # department -> schedule items
+        self.department_days: Dict[str, Dict[str, int]] = {}  # department -> day -> schedule items
+        self.preference_matches = 0
+        self.total_preferences = 0
+
+    def rebuild(self, schedules: List[Schedule], lectures: List[Lecture]):
+        """
+        Count a whole schedule from scratch
+        """
+        self._reset()
+        self.lecture_dict = {lecture.id: lecture for lecture in lectures}
+        for schedule in schedules:
+            self.add(schedule)
+
+    def add(self, schedule: Schedule):
+        """
+        Count a schedule item at its current placement
+        """
+        self._update(schedule, 1)
+
+    def remove(self, schedule: Schedule):
+        """
+        Stop counting a schedule item at its current placement
+        """
+        self._update(schedule, -1)
+
+    def _update(self, schedule: Schedule, delta: int):
+        """
+        Add delta to every counter touched by a schedule item
+        """
+        old_load = self.slot_counts.get(schedule.time_slot_id, 0)
+        if old_load:
+            self._bump(self.load_histogram, old_load, -1)
+        if old_load + delta:
+            self._bump(self.load_histogram, old_load + delta, 1)
+        self._bump(self.slot_counts, schedule.time_slot_id, delta)
+
+        if self.classroom_service.get_classroom(schedule.classroom_id):
+            self._bump(self.room_counts, schedule.classroom_id, delta)
+
+        time_slot = self.time_slot_service.get_time_slot(schedule.time_slot_id)
+        if time_slot:
+            self._bump(self.day_counts, time_slot.day, delta)
+
+        lecture = self.lecture_dict.get(schedule.lecture_id)
+        if not lecture:
+            return
+
+        dept = lecture.dep_reale_rreg
+        self._bump(self.department_counts, dept, delta)
+        days = self.department_days.setdefault(dept, {})
+        if time_slot:
+            self._bump(days, time_slot.day, delta)
+        if dept not in self.department_counts:
+            del self.department_days[dept]
+
+        if lecture.time_preference:
+            self.total_preferences += delta
+            if time_slot and self.schedule_optimizer._matches_preference(lecture.time_preference, time_slot):
+                self.preference_matches += delta
+
+    def _bump(self, counter: Dict, key, delta: int):
+        """
+        Adjust a counter, dropping keys that reach zero
+        """
+        count = counter.get(key, 0) + delta
+        if count > 0:
+            counter[key] = count
+        else:
+            counter.pop(key, None)
+
+    def get_scores(self, conflict_count: int) -> Dict[str, float]:
+        """
+        Scores in the same format as calculate_schedule_score, given the
+        number of classroom and professor conflicts
+        """
+        scores = {key: 0.0 for key in SCORE_WEIGHTS}
+        scores['conflict_score'] = max(0, 100 - conflict_count * 10)
+
+        if self.department_counts:
+            cohesion = [
+                count / len(self.department_days[dept]) if self.department_days[dept] else 0
+                for dept, count in self.department_counts.items()
+            ]
+            scores['cohesion_score'] = min(100, sum(cohesion) / len(cohesion) * 20)
+
+        if self.load_histogram:
+            max_load = max(self.load_histogram)
+            scores['balance_score'] = min(self.load_histogram) / max_load * 100
+
+        if self.room_counts:
+            utilization = [
+                min(100, count / self.classroom_service.get_classroom(room_id).capacity * 100)
+                for room_id, count in self.room_counts.items()
+            ]
+            scores['utilization_score'] = sum(utilization) / len(utilization)
+
+        if self.day_counts:
+            avg_per_day = sum(self.day_counts.values()) / len(self.day_counts)
+            variance = sum((count - avg_per_day) ** 2 for count in self.day_counts.values()) / len(self.day_counts)
+            max_variance = avg_per_day ** 2
+            scores['distribution_score'] = max(0, 100 - (variance / max_variance * 100) if max_variance > 0 else 100)
+
+        scores['preference_score'] = (self.preference_matches / self.total_preferences * 100) if self.total_preferences > 0 else 100
+
+        scores['overall_score'] = sum(scores[key] * weight for key, weight in SCORE_WEIGHTS.items())
+        return scores
@@ -0,0 +1,79 @@
+import time
+from typing import List, Dict, Any
+from app.models.schedule import Schedule
+from app.services.database_service import DatabaseService
+from app.services.classroom_service import ClassroomService
+from app.services.time_slot_service import TimeSlotService
+from app.services.conflict_index import ConflictIndex
+from app.services.score_tracker import ScoreTracker
+
+# Restores the in-memory services from the database at startup: one query per
+# table, then every index is built before the first request instead of on it.
+# Lectures belong to upload sessions, so the restored schedule is indexed
+# without them until a session is uploaded
+class StateLoader:
+    def __init__(self, database_service: DatabaseService, classroom_service: ClassroomService,
+                 time_slot_service: TimeSlotService, conflict_index: ConflictIndex, score_tracker: ScoreTracker):
+        self.database_service = database_service
+        self.classroom_service = classroom_service
+        self.time_slot_service = time_slot_service
+        self.conflict_index = conflict_index
+        self.score_tracker = score_tracker
+
+    def restore(self) -> Dict[str, Any]:
+        """
+        Load classrooms, time slots, the time slot configuration and the stored
+        schedule, and index them. On a fresh database the standard time slots are
+        created and saved. Returns the schedule and a report with the number of
+        items and the milliseconds spent per step
+        """
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        step_started = started
+
+        def finish_step(name: str):
+            nonlocal step_started
+            now = time.perf_counter()
+            timings[name] = round((now - step_started) * 1000, 2)
+            step_started = now
+
+        classrooms = self.database_service.get_classrooms()
+        self.classroom_service.load_classrooms(classrooms)
+        finish_step("classrooms")
+
+        time_slots = self.database_service.get_time_slots()
+        if time_slots:
+            self.time_slot_service.load_time_slots(time_slots)
+        else:
+            time_slots = self.time_slot_service.create_standard_time_slots()
+            self.database_service.save_time_slots(time_slots)
+        finish_step("time_slots")
+
+        config = self.database_service.get_time_slot_configuration()
+        if config:
+            self.time_slot_service.update_configuration(config)
+        finish_step("configuration")
+
+        schedules = self.database_service.get_all_schedules()
+        finish_step("schedules")
+
+        self._build_indexes(schedules)
+        finish_step("indexes")
+
+        timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        return {
+            "schedules": schedules,
+            "report": {
+                "classrooms": len(classrooms),
+                "time_slots": len(time_slots),
+                "schedules": len(schedules),
+                "timings_ms": timings
+            }
+        }
+
+    def _build_indexes(self, schedules: List[Schedule]):
+        """
+        Build the conflict index and score counters of the restored schedule
+        """
+        self.conflict_index.rebuild(schedules, [])
+        self.score_tracker.rebuild(schedules, [])
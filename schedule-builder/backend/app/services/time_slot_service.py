@@ -2,6 +2,9 @@ from typing import List, Dict, Optional
 from app.models.time_slot import TimeSlot, TimeSlotConfiguration
 from datetime import datetime, time
 
+# Week order of the days time slots are created for
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+
 class TimeSlotService:
     def __init__(self):
         self.time_slots: Dict[str, TimeSlot] = {}
@@ -14,6 +17,18 @@ class TimeSlotService:
         self.time_slots[time_slot.id] = time_slot
         return time_slot
     
+    def load_time_slots(self, time_slots: List[TimeSlot]):
+        """
+        Replace all time slots at once (e.g. with those restored from the database),
+        keeping them in week order like create_standard_time_slots
+        """
+        ordered = sorted(time_slots, key=lambda time_slot: (
+            WEEKDAYS.index(time_slot.day) if time_slot.day in WEEKDAYS else len(WEEKDAYS),
+            time_slot.start_time,
+            time_slot.id
+        ))
+        self.time_slots = {time_slot.id: time_slot for time_slot in ordered}
+    
     def get_time_slot(self, time_slot_id: str) -> Optional[TimeSlot]:
         """
         Get a time slot by ID
@@ -76,10 +91,8 @@ class TimeSlotService:
         Create standard time slots based on configuration
         """
         created_slots = []
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
-        
         # Create time slots for each day
-        for day in days:
+        for day in WEEKDAYS:
             # Morning slots (9:00-11:00)
             morning_start = "09:00"
             morning_end = "11:00"
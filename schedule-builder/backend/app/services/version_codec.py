@@ -0,0 +1,108 @@
+from typing import List, Dict, Any
+from array import array
+import json
+import lzma
+import struct
+import sys
+import zlib
+
+# Binary layout of a schedule snapshot:
+#   header:  magic, format version, codec, item count, uncompressed payload size
+#   payload: length-prefixed JSON metadata (field names, interned values and the
+#            index typecode), then one array of value indices per field
+SNAPSHOT_MAGIC = b'SCHV'
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_HEADER = struct.Struct('<4sBBII')
+
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+_COMPRESSORS = {
+    CODEC_ZLIB: (zlib.compress, zlib.decompress),
+    CODEC_LZMA: (lzma.compress, lzma.decompress)
+}
+
+def is_snapshot(data: Any) -> bool:
+    """
+    Whether stored version data is a binary snapshot (rather than JSON text)
+    """
+    return isinstance(data, bytes) and data[:len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC
+
+def encode_snapshot(rows: List[Dict[str, Any]], codec: int = CODEC_ZLIB) -> bytes:
+    """
+    Encode schedule rows (JSON-compatible dicts with the same fields) as a
+    compressed binary snapshot. Every value is interned, so each row costs one
+    small integer per field before compression
+    """
+    fields = list(rows[0]) if rows else []
+    values: List[Any] = []
+    positions: Dict[str, int] = {}
+    columns = [[] for _ in fields]
+    for row in rows:
+        for column, field in zip(columns, fields):
+            value = row[field]
+            # Key on the JSON form so that True, 1 and "1" stay distinct
+            key = json.dumps(value)
+            if key not in positions:
+                positions[key] = len(values)
+                values.append(value)
+            column.append(positions[key])
+
+    typecode = 'H' if len(values) <= 0xFFFF else 'I'
+    meta = json.dumps({'fields': fields, 'values': values, 'typecode': typecode}).encode('utf-8')
+    parts = [struct.pack('<I', len(meta)), meta]
+    for column in columns:
+        indices = array(typecode, column)
+        if sys.byteorder == 'big':
+            indices.byteswap()
+        parts.append(indices.tobytes())
+    payload = b''.join(parts)
+
+    compress, _ = _COMPRESSORS[codec]
+    return SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, codec, len(rows), len(payload)) + compress(payload)
+
+def read_snapshot_header(data: bytes) -> Dict[str, int]:
+    """
+    Read a snapshot's header without decompressing it
+    """
+    if not is_snapshot(data) or len(data) < SNAPSHOT_HEADER.size:
+        raise ValueError("Not a schedule snapshot")
+    _, format_version, codec, item_count, payload_size = SNAPSHOT_HEADER.unpack_from(data)
+    if format_version != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported schedule snapshot format {format_version}")
+    if codec not in _COMPRESSORS:
+        raise ValueError(f"Unsupported schedule snapshot codec {codec}")
+    return {
+        'format': format_version,
+        'codec': codec,
+        'item_count': item_count,
+        'payload_size': payload_size,
+        'encoded_size': len(data)
+    }
+
+def decode_snapshot(data: bytes) -> List[Dict[str, Any]]:
+    """
+    Decode a binary snapshot back into schedule rows
+    """
+    header = read_snapshot_header(data)
+    _, decompress = _COMPRESSORS[header['codec']]
+    payload = decompress(data[SNAPSHOT_HEADER.size:])
+    if len(payload) != header['payload_size']:
+        raise ValueError("Corrupt schedule snapshot")
+
+    meta_size, = struct.unpack_from('<I', payload)
+    meta = json.loads(payload[4:4 + meta_size].decode('utf-8'))
+    values = meta['values']
+    count = header['item_count']
+
+    offset = 4 + meta_size
+    columns = []
+    for _ in meta['fields']:
+        indices = array(meta['typecode'])
+        size = count * indices.itemsize
+        indices.frombytes(payload[offset:offset + size])
+        if sys.byteorder == 'big':
+            indices.byteswap()
+        columns.append([values[index] for index in indices])
+        offset += size
+
+    return [dict(zip(meta['fields'], row)) for row in zip(*columns)] if columns else [{} for _ in range(count)]
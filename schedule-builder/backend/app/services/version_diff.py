@@ -0,0 +1,99 @@
+from typing import List, Dict, Tuple, Any, Optional
+from app.models.schedule import Schedule
+from app.models.lecture import Lecture
+from app.models.group import Group
+from app.models.department import Department
+from app.services.database_service import DatabaseService
+from app.services.schedule_optimizer import ScheduleOptimizer
+
+class VersionDiffService:
+    def __init__(self, database_service: DatabaseService, schedule_optimizer: ScheduleOptimizer):
+        self.database_service = database_service
+        self.schedule_optimizer = schedule_optimizer
+
+    def diff_versions(self, base_version_id: int, target_version_id: int, lectures: List[Lecture],
+                      groups: List[Group], departments: List[Department]) -> Optional[Dict[str, Any]]:
+        """
+        Compare two saved versions: assignments moved, added and removed between
+        them, and the scores of both sides. Versions saved with their lectures are
+        scored against those, others against the given lectures. Returns None if
+        either version does not exist
+        """
+        base_rows = self.database_service.get_schedule_version_rows(base_version_id)
+        target_rows = self.database_service.get_schedule_version_rows(target_version_id)
+        if base_rows is None or target_rows is None:
+            return None
+
+        # Hash join on lecture id (the n-th item of a lecture matches the n-th item on the other side)
+        base_items = self._by_lecture(base_rows)
+        moved = []
+        added = []
+        unchanged_count = 0
+        for key, target_row in self._by_lecture(target_rows).items():
+            base_row = base_items.pop(key, None)
+            if base_row is None:
+                added.append(self._assignment(target_row))
+            elif (base_row['time_slot_id'], base_row['classroom_id']) != (target_row['time_slot_id'], target_row['classroom_id']):
+                moved.append({
+                    "lecture_id": key[0],
+                    "base_schedule_id": base_row['id'],
+                    "target_schedule_id": target_row['id'],
+                    "from_time_slot_id": base_row['time_slot_id'],
+                    "from_classroom_id": base_row['classroom_id'],
+                    "to_time_slot_id": target_row['time_slot_id'],
+                    "to_classroom_id": target_row['classroom_id']
+                })
+            else:
+                unchanged_count += 1
+        removed = [self._assignment(base_row) for base_row in base_items.values()]
+
+        base_score = self._score_version(base_version_id, base_rows, lectures, groups, departments)
+        target_score = self._score_version(target_version_id, target_rows, lectures, groups, departments)
+
+        return {
+            "base_version_id": base_version_id,
+            "target_version_id": target_version_id,
+            "moved": moved,
+            "added": added,
+            "removed": removed,
+            "unchanged_count": unchanged_count,
+            "scores": {
+                "base": base_score,
+                "target": target_score,
+                "delta": {key: target_score[key] - base_score[key] for key in base_score}
+            }
+        }
+
+    def _by_lecture(self, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, int], Dict[str, Any]]:
+        """
+        Key schedule rows by (lecture id, occurrence of that lecture)
+        """
+        occurrences: Dict[str, int] = {}
+        items = {}
+        for row in rows:
+            occurrence = occurrences.get(row['lecture_id'], 0)
+            occurrences[row['lecture_id']] = occurrence + 1
+            items[(row['lecture_id'], occurrence)] = row
+        return items
+
+    def _assignment(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        The assignment fields of a schedule row
+        """
+        return {
+            "lecture_id": row['lecture_id'],
+            "schedule_id": row['id'],
+            "time_slot_id": row['time_slot_id'],
+            "classroom_id": row['classroom_id'],
+            "professor": row['professor']
+        }
+
+    def _score_version(self, version_id: int, rows: List[Dict[str, Any]], lectures: List[Lecture],
+                       groups: List[Group], departments: List[Department]) -> Dict[str, float]:
+        """
+        Score a version's schedule, preferring the lectures saved with it
+        """
+        version_lectures = self.database_service.get_schedule_version_lectures(version_id) or lectures
+        # Scoring only reads assignment fields, so the rows skip validation
+        schedules = [Schedule.construct(**row) for row in rows]
+        return self.schedule_optimizer.calculate_schedule_score(schedules, version_lectures, groups, departments)
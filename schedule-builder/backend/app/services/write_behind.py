@@ -0,0 +1,165 @@
+import threading
+import time
+from typing import List, Dict, Optional
+from app.models.schedule import Schedule
+from app.services.database_service import DatabaseService
+
+# Schedule writes queued here are persisted in batches by a background thread,
+# so requests do not wait for disk I/O. Pending writes are keyed by schedule id:
+# an item saved again (or deleted) before its batch is written is written once,
+# in its latest state. flush() is the durability barrier for readers of the
+# schedules table. A batch that still fails after max_retries attempts is
+# dropped and its error kept in last_error
+class WriteBehindQueue:
+    def __init__(self, database_service: DatabaseService, flush_delay: float = 0.5,
+                 retry_delay: float = 1.0, max_retries: int = 3):
+        self.database_service = database_service
+        # Seconds a queued write waits for later writes to coalesce with (skipped by flush())
+        self.flush_delay = flush_delay
+        # Seconds to wait before retrying a batch that failed to write
+        self.retry_delay = retry_delay
+        # Attempts after the first before a failing batch is dropped
+        self.max_retries = max_retries
+        self.batches_written = 0
+        self.batches_dropped = 0
+        self.last_error: Optional[str] = None
+        self._pending: Dict[str, Optional[Schedule]] = {}  # schedule id -> latest state, None to delete
+        self._condition = threading.Condition()
+        # Writes are numbered as they are queued; everything up to _written is done with,
+        # and writes up to _dropped_through were in a dropped batch
+        self._queued = 0
+        self._written = 0
+        self._dropped_through = 0
+        self._flush_target = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="schedule-write-behind", daemon=True)
+        self._thread.start()
+
+    def save_schedule(self, schedule: Schedule) -> bool:
+        """
+        Queue a schedule to be saved
+        """
+        return self.save_schedules([schedule])
+
+    def save_schedules(self, schedules: List[Schedule]) -> bool:
+        """
+        Queue multiple schedules to be saved. The current state of each item is
+        queued, so later in-place changes need to be saved again
+        """
+        return self._enqueue({schedule.id: schedule.copy() for schedule in schedules})
+
+    def delete_schedule(self, schedule_id: str) -> bool:
+        """
+        Queue a schedule to be deleted
+        """
+        return self.delete_schedules([schedule_id])
+
+    def delete_schedules(self, schedule_ids: List[str]) -> bool:
+        """
+        Queue multiple schedules to be deleted
+        """
+        return self._enqueue(dict.fromkeys(schedule_ids))
+
+    def get_pending_count(self) -> int:
+        """
+        Number of schedule items waiting to be written
+        """
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything queued so far and wait until it is persisted.
+        Returns False if that did not happen within the timeout, or if some of
+        it was dropped after failing (see last_error)
+        """
+        with self._condition:
+            target = self._queued
+            written_before = self._written
+            self._flush_target = max(self._flush_target, target)
+            self._condition.notify_all()
+            if not self._condition.wait_for(lambda: self._written >= target, timeout):
+                return False
+            return self._dropped_through <= written_before
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write all pending schedules and stop the writer thread. Writes queued
+        after closing go straight to the database. Returns False if the writer
+        was still busy when the timeout ran out: the writes it had not finished
+        may then be lost when the process exits (see last_error)
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
+
+    def _enqueue(self, writes: Dict[str, Optional[Schedule]]) -> bool:
+        """
+        Merge writes into the pending batch and wake the writer thread
+        """
+        with self._condition:
+            if not self._closed:
+                self._pending.update(writes)
+                self._queued += 1
+                self._condition.notify_all()
+                return True
+        return self._write(writes)
+
+    def _run(self):
+        """
+        Writer thread: take the pending batch, write it, repeat until closed and drained
+        """
+        attempts = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                # Give later writes a chance to coalesce unless someone is waiting
+                self._condition.wait_for(lambda: self._closed or self._flush_target > self._written,
+                                         self.flush_delay)
+                batch, self._pending = self._pending, {}
+                target = self._queued
+
+            if self._write(batch):
+                attempts = 0
+                with self._condition:
+                    self._written = target
+                    self.batches_written += 1
+                    self._condition.notify_all()
+            elif attempts >= self.max_retries:
+                # Give up on the batch so flushes and close() return instead of waiting forever
+                attempts = 0
+                with self._condition:
+                    self._written = target
+                    self._dropped_through = target
+                    self.batches_dropped += 1
+                    self._condition.notify_all()
+                print(f"Dropped {len(batch)} schedule writes: {self.last_error}")
+            else:
+                attempts += 1
+                with self._condition:
+                    # Retry the batch, minus the items written again since
+                    batch.update(self._pending)
+                    self._pending = batch
+                time.sleep(self.retry_delay)
+
+    def _write(self, writes: Dict[str, Optional[Schedule]]) -> bool:
+        """
+        Persist a batch of saves and deletes in one transaction
+        """
+        saves = [schedule for schedule in writes.values() if schedule is not None]
+        deletes = [schedule_id for schedule_id, schedule in writes.items() if schedule is None]
+        try:
+            with self.database_service.transaction():
+                if not self.database_service.save_schedules(saves):
+                    raise RuntimeError(f"saving {len(saves)} schedules failed")
+                if not self.database_service.delete_schedules(deletes):
+                    raise RuntimeError(f"deleting {len(deletes)} schedules failed")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error writing schedule batch: {e}")
+            return False
@@ -1,9 +1,14 @@
 import sys
 import os
+import tempfile
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Keep the app's database out of the working directory
+db_dir = tempfile.TemporaryDirectory()
+os.environ["SCHEDULE_DB_PATH"] = os.path.join(db_dir.name, "schedule.db")
+
 try:
     from app.main import app
     from app.services.database_service import DatabaseService
@@ -12,7 +17,7 @@ try:
     print("- FastAPI app initialized")
     
     # Test database service
-    db_service = DatabaseService()
+    db_service = DatabaseService(os.environ["SCHEDULE_DB_PATH"])
     print("- Database service initialized")
     
     # Test excel parser service
@@ -24,4 +29,6 @@ try:
 except Exception as e:
     print(f"Error initializing backend components: {e}")
     import traceback
-    traceback.print_exc()
\ No newline at end of file
+    traceback.print_exc()
+finally:
+    db_dir.cleanup()
@@ -1,9 +1,14 @@
 import sys
 import os
+import tempfile
 
 # Add the current directory to the path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+# Test against a throwaway database, not the app's schedule.db
+db_dir = tempfile.TemporaryDirectory()
+db_path = os.path.join(db_dir.name, "schedule.db")
+
 try:
     from app.models.lecture import Lecture
     from app.models.classroom import Classroom
@@ -14,14 +19,14 @@ try:
     print("Database test script started...")
     
     # Initialize database service
-    db_service = DatabaseService()
+    db_service = DatabaseService(db_path)
     print("✓ Database service initialized")
     
     # Check if database file exists
-    if os.path.exists("schedule.db"):
+    if os.path.exists(db_path):
         print("✓ Database file exists")
         # Get file size
-        size = os.path.getsize("schedule.db")
+        size = os.path.getsize(db_path)
         print(f"  Database file size: {size} bytes")
     else:
         print("✗ Database file does not exist")
@@ -120,4 +125,6 @@ try:
 except Exception as e:
     print(f"Error during database test: {e}")
     import traceback
-    traceback.print_exc()
\ No newline at end of file
+    traceback.print_exc()
+finally:
+    db_dir.cleanup()
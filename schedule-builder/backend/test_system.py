@@ -17,6 +17,8 @@ from app.services.classroom_service import ClassroomService
 from app.services.time_slot_service import TimeSlotService
 from app.services.combination_generator import CombinationGenerator
 from app.services.conflict_detector import ConflictDetector
+from app.services.schedule_optimizer import ScheduleOptimizer
+from app.models.schedule import Schedule
 
 def test_data_models():
     """Test data models creation"""
@@ -162,6 +164,1492 @@ def test_integration():
     combination_generator = CombinationGenerator(classroom_service, time_slot_service)
     print("✓ Integration tests passed\n")
 
+def make_test_lecture(lecture_id, group, lecture_type="L", professor="Dr. John Smith", department="EK"):
+    """Create a lecture for tests"""
+    return Lecture(
+        id=lecture_id,
+        lenda_e_rreg=f"Course {lecture_id}",
+        dep_reale_rreg=department,
+        sem_rreg="Semestri i parë (I)",
+        niveli_rreg="Bachelor",
+        viti_rreg="VITI I",
+        prof_rreg=professor,
+        grup_rreg=group,
+        status_lende_rreg=lecture_type,
+        qasja_lende_rreg="O",
+        mesimdhe_lende_rreg="P",
+        time_per_lec_rreg=90
+    )
+
+def test_classroom_utilization_optimization():
+    """Test room re-assignment by expected group size"""
+    print("Testing classroom utilization optimization...")
+    
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_2", "Gr. 2.1", "U", "Prof B")
+    ]
+    groups = [
+        Group(id="Gr. 1", student_count=120),
+        Group(id="Gr. 2", sub_groups=["Gr. 2.1", "Gr. 2.2"], student_count=40)
+    ]
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_midday", classroom_id="S2", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_midday", classroom_id="S1", professor="Prof B")
+    ]
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    optimized = optimizer._optimize_classroom_utilization(schedules, lectures, groups)
+    rooms = {schedule.lecture_id: schedule.classroom_id for schedule in optimized}
+    assert rooms == {"lec_1": "S1", "lec_2": "S2"}
+    assert all(schedule.time_slot_id == "monday_midday" for schedule in optimized)
+    
+    # Lectures without a known group size keep their rooms
+    unsized = [schedule.copy(update={"classroom_id": room}) for schedule, room in zip(schedules, ["S2", "S1"])]
+    optimized = optimizer._optimize_classroom_utilization(unsized, lectures, [])
+    assert [schedule.classroom_id for schedule in optimized] == ["S2", "S1"]
+    
+    # More lectures than rooms: the slot is left alone rather than double-booking a room
+    lectures.append(make_test_lecture("lec_3", "Gr. 1", "L", "Prof C"))
+    crowded = [
+        Schedule(id=f"c{i}", lecture_id=lecture.id, time_slot_id="tuesday_morning", classroom_id=room, professor=lecture.prof_rreg)
+        for i, (lecture, room) in enumerate(zip(lectures, ["R9", "S1", "S2"]))
+    ]
+    optimized = optimizer._optimize_classroom_utilization(crowded, lectures, groups)
+    assert [schedule.classroom_id for schedule in optimized] == ["R9", "S1", "S2"]
+    
+    # Overlapping slots share the rooms: both lectures cannot get the hall
+    time_slot_service.add_time_slot(TimeSlot(id="monday_late", day="Monday", start_time="10:00",
+                                             end_time="12:00", duration=120))
+    overlapping = [
+        Schedule(id="o1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S2", professor="Prof A"),
+        Schedule(id="o2", lecture_id="lec_3", time_slot_id="monday_late", classroom_id="S2", professor="Prof C")
+    ]
+    optimized = optimizer._optimize_classroom_utilization(overlapping, lectures, groups)
+    assert {schedule.classroom_id for schedule in optimized} == {"S1", "S2"}
+    print("✓ Classroom utilization optimization tests passed\n")
+
+def test_daily_distribution_rebalancing():
+    """Test moving lectures from overloaded to underloaded days"""
+    print("Testing daily distribution rebalancing...")
+    
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Room 101", capacity=50))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    
+    # Six lectures of one group crammed into Monday and Tuesday
+    lectures = [make_test_lecture(f"lec_{i}", "Gr. 1", "L", f"Prof {i % 2}") for i in range(6)]
+    groups = [Group(id="Gr. 1", daily_limit=2)]
+    slots = ["monday_morning", "monday_midday", "monday_evening",
+             "tuesday_morning", "tuesday_midday", "tuesday_evening"]
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id=slots[i], classroom_id="S1", professor=lecture.prof_rreg)
+        for i, lecture in enumerate(lectures)
+    ]
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    optimized = optimizer._optimize_daily_distribution(schedules, lectures, groups)
+    
+    day_counts = {}
+    used = set()
+    for schedule in optimized:
+        day = time_slot_service.get_time_slot(schedule.time_slot_id).day
+        day_counts[day] = day_counts.get(day, 0) + 1
+        assert (schedule.classroom_id, schedule.time_slot_id) not in used
+        used.add((schedule.classroom_id, schedule.time_slot_id))
+    assert max(day_counts.values()) <= 2
+    assert sum(day_counts.values()) == 6
+    
+    # Custom slots with different ids but overlapping times: the only free-looking
+    # Tuesday slot overlaps the Tuesday lecture's room booking, so nothing may move
+    from app.services.occupancy_index import OccupancyIndex
+    time_slot_service = TimeSlotService()
+    for slot_id, day, start, end in [("monday_a", "Monday", "08:00", "10:00"), ("monday_b", "Monday", "10:00", "12:00"),
+                                     ("monday_c", "Monday", "12:00", "14:00"), ("monday_d", "Monday", "14:00", "16:00"),
+                                     ("tuesday_a", "Tuesday", "08:00", "10:00"), ("tuesday_x", "Tuesday", "09:00", "11:00")]:
+        time_slot_service.add_time_slot(TimeSlot(id=slot_id, day=day, start_time=start, end_time=end, duration=120))
+    lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i}", "L", f"Prof {i}") for i in range(5)]
+    slots = ["monday_a", "monday_b", "monday_c", "monday_d", "tuesday_a"]
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id=slot_id, classroom_id="S1", professor=lecture.prof_rreg)
+        for i, (lecture, slot_id) in enumerate(zip(lectures, slots))
+    ]
+    index = OccupancyIndex(time_slot_service).build(schedules, lectures)
+    assert not index.is_room_free("S1", "tuesday_x")
+    assert not index.is_room_free("S1", "monday_a") and index.is_professor_free("Prof 4", "monday_a")
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    optimized = optimizer._optimize_daily_distribution(schedules, lectures, [])
+    assert [schedule.time_slot_id for schedule in optimized] == slots
+    detector = ConflictDetector(time_slot_service, classroom_service)
+    assert detector.detect_classroom_conflicts(optimized) == []
+    print("✓ Daily distribution rebalancing tests passed\n")
+
+def test_parallel_tempering():
+    """Test replica-exchange optimization"""
+    print("Testing parallel tempering...")
+    
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Room 101", capacity=50))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 102", capacity=80))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    
+    # Everything double-booked in one slot
+    lectures = [make_test_lecture(f"lec_{i}", "Gr. 1", "L", f"Prof {i % 3}") for i in range(8)]
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id="monday_morning", classroom_id="S1", professor=lecture.prof_rreg)
+        for i, lecture in enumerate(lectures)
+    ]
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    initial_score = optimizer.calculate_schedule_score(schedules, lectures, [], [])['overall_score']
+    optimized = optimizer.parallel_tempering(schedules, lectures, [], [], replicas=3, rounds=5, steps_per_round=10)
+    optimized_score = optimizer.calculate_schedule_score(optimized, lectures, [], [])['overall_score']
+    
+    assert len(optimized) == len(schedules)
+    assert [schedule.lecture_id for schedule in optimized] == [schedule.lecture_id for schedule in schedules]
+    assert optimized_score >= initial_score
+    print("✓ Parallel tempering tests passed\n")
+
+def test_pareto_archive():
+    """Test non-dominated archive and re-weighting"""
+    print("Testing Pareto archive...")
+    
+    from app.services.pareto_archive import ParetoArchive, PARETO_OBJECTIVES
+    
+    def scores(*values):
+        return dict(zip(PARETO_OBJECTIVES, values))
+    
+    archive = ParetoArchive()
+    assert archive.add([("monday_morning", "S1")], scores(100, 10, 50, 50, 50, 50))
+    assert archive.add([("monday_midday", "S1")], scores(50, 90, 50, 50, 50, 50))
+    # Dominated by the first solution
+    assert not archive.add([("monday_evening", "S2")], scores(90, 10, 50, 50, 50, 50))
+    # Dominates the second solution
+    assert archive.add([("tuesday_midday", "S2")], scores(60, 90, 50, 50, 50, 50))
+    assert len(archive.entries) == 2
+    
+    conflict_first = archive.select({"conflict_score": 1})
+    cohesion_first = archive.select({"cohesion_score": 1})
+    assert archive.get_assignment(conflict_first) == [("monday_morning", "S1")]
+    assert archive.get_assignment(cohesion_first) == [("tuesday_midday", "S2")]
+    print("✓ Pareto archive tests passed\n")
+
+def load_main_app(db_path):
+    """Import a fresh app.main whose services use the database at db_path"""
+    import importlib
+    os.environ["SCHEDULE_DB_PATH"] = db_path
+    sys.modules.pop("app.main", None)
+    return importlib.import_module("app.main")
+
+def test_pareto_endpoints():
+    """Test optimizing, ranking and selecting a Pareto front through the API"""
+    print("Testing Pareto endpoints...")
+    
+    import tempfile
+    from fastapi.testclient import TestClient
+    from app.models.schedule import ScheduleMove
+    
+    db_dir = tempfile.TemporaryDirectory()
+    try:
+        main = load_main_app(os.path.join(db_dir.name, "schedule.db"))
+        with TestClient(main.app) as client:
+            main.classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+            main.classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+            lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i}", "L", f"Prof {i}") for i in range(3)]
+            main.parsed_data_storage["session"] = {"lectures": lectures, "groups": [], "departments": []}
+            main.generated_schedules.extend(
+                Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id="monday_morning",
+                         classroom_id="S1", professor=lecture.prof_rreg)
+                for i, lecture in enumerate(lectures)
+            )
+            main.refresh_conflict_index()
+            
+            def optimize():
+                response = client.post("/api/schedule/optimize/pareto", params={"max_iterations": 30})
+                assert response.status_code == 200
+                return response.json()["solutions"]
+            
+            solutions = optimize()
+            ranked = client.post("/api/schedule/pareto/rank", json={"conflict_score": 1}).json()
+            assert sorted(solution["id"] for solution in ranked) == sorted(solution["id"] for solution in solutions)
+            assert ranked[0]["scores"]["conflict_score"] == max(solution["scores"]["conflict_score"] for solution in solutions)
+            
+            response = client.post(f"/api/schedule/pareto/select/{ranked[0]['id']}")
+            assert response.status_code == 200
+            assert sorted(schedule["id"] for schedule in response.json()["schedules"]) == ["s0", "s1", "s2"]
+            assert client.post("/api/schedule/pareto/select/999999").status_code == 404
+            
+            # The selection replaced the schedule, so the front no longer applies
+            assert client.post(f"/api/schedule/pareto/select/{ranked[-1]['id']}").status_code == 409
+            
+            # Nor after a manual move or a pin
+            solutions = optimize()
+            move = ScheduleMove(schedule_id="s0", time_slot_id="friday_evening", classroom_id="S2")
+            assert client.patch("/api/schedule/move", data=move.json(), params={"force": True}).status_code == 200
+            assert client.post(f"/api/schedule/pareto/select/{solutions[0]['id']}").status_code == 409
+            solutions = optimize()
+            assert client.patch("/api/schedule/pin/s1").status_code == 200
+            assert client.post(f"/api/schedule/pareto/select/{solutions[0]['id']}").status_code == 409
+            assert main.conflict_index.schedules["s0"].time_slot_id == "friday_evening"
+    finally:
+        db_dir.cleanup()
+    print("✓ Pareto endpoint tests passed\n")
+
+def test_batch_scoring():
+    """Test vectorized scoring against calculate_schedule_score"""
+    print("Testing batch scoring...")
+    
+    import random
+    rng = random.Random(7)
+    classroom_service = ClassroomService()
+    for i, capacity in enumerate([20, 40, 60, 120, 150]):
+        classroom_service.add_classroom(Classroom(id=f"S{i}", name=f"Room {i}", capacity=capacity))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    
+    lectures = []
+    for i in range(40):
+        lecture = make_test_lecture(f"lec_{i}", f"Gr. {i % 4}", "L", f"Prof {i % 9}", ["EK", "BF", "AEM"][i % 3])
+        lecture.time_preference = [None, "Morning", "Midday", "Evening"][i % 4]
+        lectures.append(lecture)
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id="monday_morning", classroom_id="S0", professor=lecture.prof_rreg)
+        for i, lecture in enumerate(lectures)
+    ]
+    slot_ids = list(time_slot_service.time_slots)
+    room_ids = list(classroom_service.classrooms)
+    assignments = [
+        [(rng.choice(slot_ids), rng.choice(room_ids)) for _ in schedules]
+        for _ in range(20)
+    ]
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    batch_scores = optimizer.calculate_schedule_scores_batch(schedules, lectures, assignments)
+    for assignment, batch_score in zip(assignments, batch_scores):
+        scalar_score = optimizer.calculate_schedule_score(optimizer.apply_assignment(schedules, assignment), lectures, [], [])
+        assert batch_score == scalar_score
+    
+    # Custom slot overlapping the standard grid
+    time_slot_service.add_time_slot(TimeSlot(id="monday_custom", day="Monday", start_time="10:00", end_time="11:30", duration=90))
+    assignments = [[(rng.choice(slot_ids + ["monday_custom"]), rng.choice(room_ids)) for _ in schedules] for _ in range(5)]
+    batch_scores = optimizer.calculate_schedule_scores_batch(schedules, lectures, assignments)
+    for assignment, batch_score in zip(assignments, batch_scores):
+        assert batch_score == optimizer.calculate_schedule_score(optimizer.apply_assignment(schedules, assignment), lectures, [], [])
+    print("✓ Batch scoring tests passed\n")
+
+def test_fused_conflict_detection():
+    """Test single-pass conflict detection against the individual detectors"""
+    print("Testing fused conflict detection...")
+    
+    import random
+    rng = random.Random(11)
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    slot_ids = list(time_slot_service.time_slots) + ["deleted_slot"]
+    
+    lectures = []
+    for i in range(60):
+        lecture = make_test_lecture(f"lec_{i}", rng.choice(["Gr. 1", "Gr. 2", "Gr. 1.1", "Gr. 2.2"]),
+                                    rng.choice(["L", "U"]), f"Prof {i % 7}", rng.choice(["EK", "BF", "AEM"]))
+        lecture.lenda_e_rreg = f"Course {i % 25}"
+        lecture.time_per_lec_rreg = rng.choice([45, 90, 135, 180])
+        lectures.append(lecture)
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id if i % 17 else "unknown", time_slot_id=rng.choice(slot_ids),
+                 classroom_id=rng.choice(["S1", "S2", "S3"]), professor=lecture.prof_rreg)
+        for i, lecture in enumerate(lectures)
+    ]
+    
+    detector = ConflictDetector(time_slot_service)
+    expected = {
+        "classroom_conflicts": detector.detect_classroom_conflicts(schedules),
+        "professor_conflicts": detector.detect_professor_conflicts(schedules),
+        "group_conflicts": detector.detect_group_conflicts(schedules, lectures),
+        "time_slot_conflicts": detector.detect_time_slot_conflicts(schedules, lectures),
+        "lecture_exercise_conflicts": detector.detect_lecture_exercise_conflicts(schedules, lectures),
+        "capacity_conflicts": detector.detect_capacity_conflicts(schedules, lectures),
+        "departmental_conflicts": detector.detect_departmental_conflicts(schedules, lectures)
+    }
+    assert detector.detect_all_conflicts(schedules, lectures) == expected
+    print("✓ Fused conflict detection tests passed\n")
+
+def test_conflict_index():
+    """Test that the incremental conflict index matches full detection after edits"""
+    print("Testing incremental conflict index...")
+    
+    import random
+    from app.services.conflict_index import ConflictIndex
+    rng = random.Random(5)
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    slot_ids = list(time_slot_service.time_slots)
+    
+    lectures = []
+    for i in range(40):
+        lecture = make_test_lecture(f"lec_{i}", rng.choice(["Gr. 1", "Gr. 2", "Gr. 1.1"]),
+                                    rng.choice(["L", "U"]), f"Prof {i % 5}", rng.choice(["EK", "BF"]))
+        lecture.lenda_e_rreg = f"Course {i % 15}"
+        lectures.append(lecture)
+    
+    def random_schedule(i):
+        lecture = rng.choice(lectures)
+        return Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id=rng.choice(slot_ids[:6]),
+                        classroom_id=rng.choice(["S1", "S2"]), professor=lecture.prof_rreg)
+    
+    def normalize(conflicts):
+        normalized = {}
+        for category, records in conflicts.items():
+            records = [dict(record, days_used=sorted(record["days_used"])) if "days_used" in record else record
+                       for record in records]
+            normalized[category] = sorted(repr(sorted(record.items())) for record in records)
+        return normalized
+    
+    detector = ConflictDetector(time_slot_service)
+    index = ConflictIndex(detector)
+    index.rebuild([random_schedule(i) for i in range(30)], lectures)
+    next_id = 30
+    for step in range(200):
+        action = rng.random()
+        schedule_ids = list(index.schedules)
+        if action < 0.3 or not schedule_ids:
+            index.add_schedule(random_schedule(next_id))
+            next_id += 1
+        elif action < 0.5:
+            index.remove_schedule(rng.choice(schedule_ids))
+        else:
+            index.move_schedule(rng.choice(schedule_ids), rng.choice(slot_ids[:6]), rng.choice(["S1", "S2"]))
+        
+        if step % 20 == 0:
+            expected = detector.detect_all_conflicts(index.get_schedules(), lectures)
+            assert normalize(index.get_conflicts()) == normalize(expected)
+    
+    assert normalize(index.get_conflicts()) == normalize(detector.detect_all_conflicts(index.get_schedules(), lectures))
+    print("✓ Incremental conflict index tests passed\n")
+
+def test_overlap_detection():
+    """Test conflict detection on overlapping custom time slots"""
+    print("Testing overlap detection...")
+    
+    import time
+    import random
+    from app.services.conflict_index import ConflictIndex
+    from app.services.schedule_generator import ScheduleGenerator
+    time_slot_service = TimeSlotService()
+    time_slot_service.add_time_slot(TimeSlot(id="a", day="Monday", start_time="09:00", end_time="10:30", duration=90))
+    time_slot_service.add_time_slot(TimeSlot(id="b", day="Monday", start_time="10:00", end_time="11:30", duration=90))
+    time_slot_service.add_time_slot(TimeSlot(id="c", day="Monday", start_time="10:30", end_time="12:00", duration=90))
+    time_slot_service.add_time_slot(TimeSlot(id="d", day="Tuesday", start_time="10:00", end_time="11:30", duration=90))
+    
+    lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i}", professor=f"Prof {i}") for i in range(4)]
+    schedules = [
+        Schedule(id="s0", lecture_id="lec_0", time_slot_id="a", classroom_id="S1", professor="Prof 0"),
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="b", classroom_id="S1", professor="Prof 1"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="c", classroom_id="S2", professor="Prof 0"),
+        Schedule(id="s3", lecture_id="lec_3", time_slot_id="d", classroom_id="S1", professor="Prof 1")
+    ]
+    
+    detector = ConflictDetector(time_slot_service)
+    conflicts = detector.detect_all_conflicts(schedules, lectures)
+    # a and b overlap in S1; a and c only touch; b and d are on different days
+    assert [c["conflicting_schedules"] for c in conflicts["classroom_conflicts"]] == [["s0", "s1"]]
+    assert conflicts["professor_conflicts"] == []
+    
+    generator = ScheduleGenerator(ClassroomService(), time_slot_service)
+    assert generator.get_schedule_conflicts(schedules) == ["Classroom conflict: S1 double-booked at time slot b"]
+    
+    index = ConflictIndex(detector)
+    index.rebuild(schedules, lectures)
+    assert index.get_conflicts()["classroom_conflicts"] == conflicts["classroom_conflicts"]
+    index.move_schedule("s1", "c", "S1")
+    assert index.get_conflicts()["classroom_conflicts"] == []
+    index.move_schedule("s2", "b", "S1")
+    assert len(index.get_conflicts()["classroom_conflicts"]) == 2
+    
+    # Large random grid
+    rng = random.Random(3)
+    for i in range(40):
+        start = rng.randrange(8 * 60, 18 * 60, 15)
+        time_slot_service.add_time_slot(TimeSlot(id=f"t{i}", day=rng.choice(["Monday", "Tuesday"]),
+                                                 start_time=f"{start // 60:02d}:{start % 60:02d}",
+                                                 end_time=f"{(start + 90) // 60:02d}:{(start + 90) % 60:02d}", duration=90))
+    slot_ids = list(time_slot_service.time_slots)
+    many = [Schedule(id=f"m{i}", lecture_id="none", time_slot_id=rng.choice(slot_ids),
+                     classroom_id=f"R{rng.randrange(2000)}", professor=f"P{rng.randrange(2000)}") for i in range(50000)]
+    started = time.time()
+    detector.detect_all_conflicts(many, lectures)
+    assert time.time() - started < 5
+    print("✓ Overlap detection tests passed\n")
+
+def test_capacity_conflicts():
+    """Test capacity conflicts against expected group sizes"""
+    print("Testing capacity conflicts...")
+    
+    from app.services.conflict_index import ConflictIndex
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+    classroom_service.add_classroom(Classroom(id="S3", name="Lab", capacity=15))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_2", "Gr. 2.1", "U", "Prof B"),
+        make_test_lecture("lec_3", "Gr. 2", "L", "Prof C")
+    ]
+    groups = [
+        Group(id="Gr. 1", student_count=120),
+        Group(id="Gr. 2", sub_groups=["Gr. 2.1", "Gr. 2.2"], student_count=40)
+    ]
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S2", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_morning", classroom_id="S3", professor="Prof B"),
+        Schedule(id="s3", lecture_id="lec_3", time_slot_id="monday_morning", classroom_id="S1", professor="Prof C")
+    ]
+    
+    # Without classroom data there is nothing to check
+    assert ConflictDetector(time_slot_service).detect_capacity_conflicts(schedules, lectures, groups) == []
+    
+    detector = ConflictDetector(time_slot_service, classroom_service)
+    conflicts = detector.detect_capacity_conflicts(schedules, lectures, groups)
+    # Gr. 1 (120) in a 40-seat room, Gr. 2.1 (half of 40) in a 15-seat lab
+    assert [(c["schedule_id"], c["deficit"]) for c in conflicts] == [("s1", 80), ("s2", 5)]
+    assert detector.detect_all_conflicts(schedules, lectures, groups)["capacity_conflicts"] == conflicts
+    
+    index = ConflictIndex(detector)
+    index.rebuild(schedules, lectures, groups)
+    assert index.get_conflicts()["capacity_conflicts"] == conflicts
+    index.move_schedule("s1", "tuesday_morning", "S1")
+    assert [c["schedule_id"] for c in index.get_conflicts()["capacity_conflicts"]] == ["s2"]
+    
+    # Without student counts no size is guessed, so nothing is reported
+    assert detector.detect_capacity_conflicts(schedules, lectures) == []
+    assert detector.detect_all_conflicts(schedules, lectures, [Group(id="Gr. 1")])["capacity_conflicts"] == []
+    index.rebuild(schedules, lectures)
+    assert index.get_conflicts()["capacity_conflicts"] == []
+    # unless a default size is asked for
+    from app.services.group_size_estimator import GroupSizeEstimator
+    assert GroupSizeEstimator([]).get_expected_size(lectures[1]) is None
+    assert GroupSizeEstimator([], default_group_size=60).get_expected_size(lectures[1]) == 60
+    print("✓ Capacity conflict tests passed\n")
+
+def test_conflict_result_cache():
+    """Test fingerprint-keyed memoization of conflict results"""
+    print("Testing conflict result cache...")
+    
+    from app.services.conflict_index import ConflictIndex
+    from app.services.result_cache import ResultCache
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    lectures = [make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"), make_test_lecture("lec_2", "Gr. 2", "L", "Prof A")]
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_morning", classroom_id="S2", professor="Prof A")
+    ]
+    
+    detector = ConflictDetector(time_slot_service)
+    index = ConflictIndex(detector)
+    index.rebuild(schedules, lectures)
+    fingerprint = index.get_fingerprint()
+    conflicts = index.get_conflicts()
+    assert index.get_conflicts() is conflicts
+    assert len(conflicts["professor_conflicts"]) == 1
+    
+    # Moving changes the fingerprint; moving back restores it
+    index.move_schedule("s2", "monday_midday", "S2")
+    assert index.get_fingerprint() != fingerprint
+    assert index.get_conflicts()["professor_conflicts"] == []
+    index.move_schedule("s2", "monday_morning", "S2")
+    assert index.get_fingerprint() == fingerprint
+    
+    # Rebuilding (e.g. after a lecture edit) always invalidates
+    index.rebuild(schedules, lectures)
+    assert index.get_fingerprint() != fingerprint
+    
+    cache = ResultCache()
+    calls = []
+    compute = lambda: calls.append(1) or len(calls)
+    assert cache.get("report", index.get_fingerprint(), compute) == 1
+    assert cache.get("report", index.get_fingerprint(), compute) == 1
+    index.move_schedule("s1", "friday_morning", "S1")
+    assert cache.get("report", index.get_fingerprint(), compute) == 2
+    assert (cache.hits, cache.misses) == (1, 2)
+    print("✓ Conflict result cache tests passed\n")
+
+def test_what_if_moves():
+    """Test batch what-if move evaluation"""
+    print("Testing what-if moves...")
+    
+    from app.models.schedule import ScheduleMove
+    from app.services.conflict_index import ConflictIndex
+    from app.services.move_evaluator import MoveEvaluator
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=150))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_2", "Gr. 2", "L", "Prof A"),
+        make_test_lecture("lec_3", "Gr. 3", "L", "Prof B")
+    ]
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_morning", classroom_id="S2", professor="Prof A"),
+        Schedule(id="s3", lecture_id="lec_3", time_slot_id="tuesday_morning", classroom_id="S1", professor="Prof B")
+    ]
+    
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    index = ConflictIndex(ConflictDetector(time_slot_service, classroom_service))
+    index.rebuild(schedules, lectures, [])
+    fingerprint = index.get_fingerprint()
+    
+    evaluation = MoveEvaluator(index, optimizer).evaluate_moves([
+        ScheduleMove(schedule_id="s2", time_slot_id="tuesday_morning", classroom_id="S1"),
+        ScheduleMove(schedule_id="s2", time_slot_id="wednesday_morning", classroom_id="S2"),
+        ScheduleMove(schedule_id="s9", time_slot_id="wednesday_morning", classroom_id="S2"),
+        ScheduleMove(schedule_id="s2", time_slot_id="nowhere", classroom_id="S2")
+    ])
+    results = evaluation["results"]
+    
+    # Resolves the professor clash but double-books S1 with s3
+    assert [c["type"] for c in results[0]["resolved_conflicts"]] == ["professor_conflict"]
+    assert [(c["type"], c["with_schedule"]) for c in results[0]["introduced_conflicts"]] == [("classroom_conflict", "s3")]
+    assert results[0]["conflict_delta"] == 0
+    assert results[1]["introduced_conflicts"] == [] and results[1]["conflict_delta"] == -1
+    assert [result["valid"] for result in results] == [True, True, False, False]
+    
+    # Score deltas match full rescoring, and nothing was changed
+    moved = [schedule.copy(update={"time_slot_id": "wednesday_morning"}) if schedule.id == "s2" else schedule for schedule in schedules]
+    expected = optimizer.calculate_schedule_score(moved, lectures, [], [])["overall_score"] - \
+        optimizer.calculate_schedule_score(schedules, lectures, [], [])["overall_score"]
+    assert abs(results[1]["score_delta"]["overall_score"] - expected) < 1e-9
+    assert index.get_fingerprint() == fingerprint
+    assert schedules[1].time_slot_id == "monday_morning"
+    print("✓ What-if move tests passed\n")
+
+def test_placement_suggestions():
+    """Test top-k placement suggestions and bump moves"""
+    print("Testing placement suggestions...")
+    
+    import time
+    import random
+    from app.services.placement_advisor import PlacementAdvisor
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    time_slot_service = TimeSlotService()
+    time_slot_service.add_time_slot(TimeSlot(id="monday_morning", day="Monday", start_time="09:00", end_time="10:30", duration=90))
+    time_slot_service.add_time_slot(TimeSlot(id="monday_midday", day="Monday", start_time="11:00", end_time="12:30", duration=90))
+    time_slot_service.add_time_slot(TimeSlot(id="monday_evening", day="Monday", start_time="15:00", end_time="16:30", duration=90))
+    
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_2", "Gr. 2", "L", "Prof B"),
+        make_test_lecture("lec_3", "Gr. 1", "L", "Prof C")
+    ]
+    lectures[2].time_preference = "Morning"
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_midday", classroom_id="S1", professor="Prof B")
+    ]
+    
+    advisor = PlacementAdvisor(classroom_service, time_slot_service)
+    result = advisor.suggest_placements(lectures[2], schedules, lectures, k=3)
+    assert [p["time_slot_id"] for p in result["placements"]] == ["monday_evening"]
+    # The preferred morning slot is freed by moving s1 (the only blocker) to the evening
+    bump = result["bumps"][0]
+    assert bump["time_slot_id"] == "monday_morning"
+    assert (bump["bump"]["schedule_id"], bump["bump"]["to_time_slot_id"]) == ("s1", "monday_evening")
+    
+    # Interactive speed on a realistic grid
+    rng = random.Random(4)
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    for i in range(30):
+        classroom_service.add_classroom(Classroom(id=f"R{i}", name=f"Room {i}", capacity=rng.choice([40, 80, 120])))
+    lectures = [make_test_lecture(f"l{i}", f"Gr. {i % 30}", "L", f"P{i % 80}") for i in range(400)]
+    slot_ids = list(time_slot_service.time_slots)
+    room_ids = list(classroom_service.classrooms)
+    schedules = [Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id=rng.choice(slot_ids),
+                          classroom_id=rng.choice(room_ids), professor=lecture.prof_rreg) for i, lecture in enumerate(lectures)]
+    advisor = PlacementAdvisor(classroom_service, time_slot_service)
+    started = time.time()
+    result = advisor.suggest_placements(lectures[0], schedules, lectures, k=5)
+    assert time.time() - started < 0.5
+    assert len(result["placements"]) <= 5
+    print("✓ Placement suggestion tests passed\n")
+
+def test_manual_edits():
+    """Test validated move and swap edits with incremental scoring"""
+    print("Testing manual edits...")
+    
+    import os
+    import random
+    import tempfile
+    import threading
+    import time
+    from app.services.conflict_index import ConflictIndex
+    from app.services.score_tracker import ScoreTracker
+    from app.services.schedule_editor import ScheduleEditor
+    from app.services.database_service import DatabaseService
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A", "EK"),
+        make_test_lecture("lec_2", "Gr. 2", "L", "Prof B", "BF"),
+        make_test_lecture("lec_3", "Gr. 3", "L", "Prof C", "EK")
+    ]
+    lectures[0].time_preference = "Morning"
+    schedules = [
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1", professor="Prof A"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="monday_midday", classroom_id="S1", professor="Prof B"),
+        Schedule(id="s3", lecture_id="lec_3", time_slot_id="tuesday_morning", classroom_id="S2", professor="Prof C")
+    ]
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+        index = ConflictIndex(ConflictDetector(time_slot_service, classroom_service))
+        index.rebuild(schedules, lectures)
+        tracker = ScoreTracker(optimizer)
+        tracker.rebuild(schedules, lectures)
+        editor = ScheduleEditor(index, tracker, database_service)
+        assert editor.get_scores() == optimizer.calculate_schedule_score(schedules, lectures, [], [])
+        
+        # S1 is taken on Monday midday
+        result = editor.move_schedule("s3", "monday_midday", "S1")
+        assert not result["applied"] and result["blocking_conflicts"][0]["with_schedule"] == "s2"
+        assert editor.move_schedule("s3", "nowhere", "S1")["error"]
+        assert editor.move_schedule("s9", "monday_midday", "S1") is None
+        
+        result = editor.move_schedule("s3", "monday_midday", "S2")
+        assert result["applied"] and schedules[2].time_slot_id == "monday_midday"
+        assert database_service.get_schedule("s3").time_slot_id == "monday_midday"
+        
+        result = editor.swap_schedules("s1", "s2")
+        assert result["applied"]
+        assert (schedules[0].time_slot_id, schedules[1].time_slot_id) == ("monday_midday", "monday_morning")
+        assert database_service.get_schedule("s1").time_slot_id == "monday_midday"
+        
+        result = editor.move_schedule("s2", "monday_midday", "S1", force=True)
+        assert result["applied"] and result["introduced_conflicts"]
+        
+        # Random edits keep the incremental score equal to a full rescore
+        rng = random.Random(2)
+        for _ in range(30):
+            editor.move_schedule(rng.choice(["s1", "s2", "s3"]), rng.choice(list(time_slot_service.time_slots)),
+                                 rng.choice(["S1", "S2"]), force=True)
+            expected = optimizer.calculate_schedule_score(schedules, lectures, [], [])
+            scores = editor.get_scores()
+            assert all(abs(scores[key] - expected[key]) < 1e-9 for key in expected)
+        
+        # Two concurrent moves into the same room and slot: only the first may pass validation
+        for schedule_id, slot_id in [("s1", "wednesday_morning"), ("s2", "wednesday_midday"), ("s3", "wednesday_evening")]:
+            editor.move_schedule(schedule_id, slot_id, "S2", force=True)
+        check_move = index.move_conflict_changes
+        
+        def slow_check(*args, **kwargs):
+            changes = check_move(*args, **kwargs)
+            time.sleep(0.05)
+            return changes
+        
+        index.move_conflict_changes = slow_check
+        results = {}
+        threads = [
+            threading.Thread(target=lambda schedule_id=schedule_id: results.update(
+                {schedule_id: editor.move_schedule(schedule_id, "friday_evening", "S1")}
+            ))
+            for schedule_id in ("s1", "s3")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(result["applied"] for result in results.values()) == [False, True]
+        assert index.get_conflicts()["classroom_conflicts"] == []
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Manual edit tests passed\n")
+
+def test_partial_resolve():
+    """Test pinned schedule items and re-solving around them"""
+    print("Testing partial re-solve...")
+    
+    import os
+    import random
+    import sqlite3
+    import tempfile
+    from app.services.schedule_generator import ScheduleGenerator
+    from app.services.database_service import DatabaseService
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A", "EK"),
+        make_test_lecture("lec_2", "Gr. 2", "L", "Prof B", "BF"),
+        make_test_lecture("lec_3", "Gr. 1", "L", "Prof C", "BF")
+    ]
+    
+    # The pinned lecture keeps a slot the generator would otherwise hand out first
+    generator = ScheduleGenerator(classroom_service, time_slot_service)
+    first_schedules, _ = generator.generate_schedule(lectures, [], [])
+    taken = next(schedule for schedule in first_schedules if schedule.lecture_id == "lec_2")
+    pin = Schedule(id="p1", lecture_id="lec_1", time_slot_id=taken.time_slot_id, classroom_id="S1",
+                   professor="Prof A", pinned=True)
+    schedules, conflicts = generator.generate_schedule(lectures, [], [], pinned_schedules=[pin])
+    assert not conflicts and schedules[0] is pin
+    assert [schedule.lecture_id for schedule in schedules].count("lec_1") == 1
+    assert all(schedule.time_slot_id != pin.time_slot_id for schedule in schedules[1:])
+    
+    # Searches never change pinned items
+    optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+    for schedule in schedules[1:]:
+        schedule.pinned = True
+    schedules[0].pinned = False
+    random.seed(3)
+    for _ in range(10):
+        neighbor = optimizer._generate_neighbor_solution(schedules)
+        assert optimizer.to_assignment(neighbor)[1:] == optimizer.to_assignment(schedules)[1:]
+    archive = optimizer.pareto_optimization(schedules, lectures, [], [], max_iterations=20)
+    for entry in archive.entries:
+        assert archive.get_assignment(entry['id'])[1:] == optimizer.to_assignment(schedules)[1:]
+    
+    # Pins survive a database round trip, also in databases created before pinning
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        conn = sqlite3.connect(db_file.name)
+        conn.execute('''
+            CREATE TABLE schedules (
+                id TEXT PRIMARY KEY, lecture_id TEXT NOT NULL, time_slot_id TEXT NOT NULL,
+                classroom_id TEXT NOT NULL, professor TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute("INSERT INTO schedules (id, lecture_id, time_slot_id, classroom_id, professor) "
+                     "VALUES ('old', 'lec_9', 'monday_morning', 'S1', 'Prof Z')")
+        conn.commit()
+        conn.close()
+        
+        database_service = DatabaseService(db_file.name)
+        assert not database_service.get_schedule("old").pinned
+        database_service.save_schedules(schedules)
+        assert database_service.get_schedule(schedules[1].id).pinned
+        assert not database_service.get_schedule(schedules[0].id).pinned
+        assert sum(schedule.pinned for schedule in database_service.get_all_schedules()) == 2
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Partial re-solve tests passed\n")
+
+def test_warm_start():
+    """Test generating a schedule from a saved version"""
+    print("Testing warm start...")
+    
+    import os
+    import tempfile
+    from app.services.schedule_generator import ScheduleGenerator
+    from app.services.database_service import DatabaseService
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    generator = ScheduleGenerator(classroom_service, time_slot_service)
+    
+    old_lectures = [
+        make_test_lecture("lec_0", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_1", "Gr. 2", "L", "Prof B"),
+        make_test_lecture("lec_2", "Gr. 3", "L", "Prof C")
+    ]
+    old_schedules = [
+        Schedule(id="s0", lecture_id="lec_0", time_slot_id="friday_evening", classroom_id="S1", professor="Prof A"),
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="thursday_evening", classroom_id="S2", professor="Prof B"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="wednesday_evening", classroom_id="S1", professor="Prof C")
+    ]
+    
+    # Next term the rows are re-numbered, Prof C's course changes hands and a course is added
+    lectures = [
+        make_test_lecture("lec_0", "Gr. 3", "L", "Prof D"),
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A"),
+        make_test_lecture("lec_2", "Gr. 2", "L", "Prof B"),
+        make_test_lecture("lec_3", "Gr. 4", "L", "Prof E")
+    ]
+    for lecture, course in zip(lectures, ["Course lec_2", "Course lec_0", "Course lec_1"]):
+        lecture.lenda_e_rreg = course
+    
+    seeds = generator.match_base_schedules(old_schedules, old_lectures, lectures)
+    assert {(seed.id, seed.lecture_id) for seed in seeds} == {("s0", "lec_1"), ("s1", "lec_2")}
+    
+    # Room S2 is gone, so Prof B's course is repaired while Prof A's keeps its placement
+    classroom_service.delete_classroom("S2")
+    schedules, conflicts = generator.generate_schedule(lectures, [], [], seed_schedules=seeds)
+    placements = {schedule.lecture_id: (schedule.time_slot_id, schedule.classroom_id) for schedule in schedules}
+    assert not conflicts and len(schedules) == 4
+    assert placements["lec_1"] == ("friday_evening", "S1")
+    assert placements["lec_2"][1] == "S1"
+    assert next(schedule for schedule in schedules if schedule.lecture_id == "lec_1").id == "s0"
+    
+    # Versions keep their lectures; older versions fall back to lecture ids
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        assert database_service.save_schedule_version(schedules, "term 1", lectures)
+        assert database_service.save_schedule_version(old_schedules, "term 0")
+        versions = {version['version_name']: version['id'] for version in database_service.get_schedule_versions()}
+        assert len(database_service.get_schedule_version_lectures(versions["term 1"])) == 4
+        assert database_service.get_schedule_version_lectures(versions["term 0"]) == []
+        assert database_service.get_schedule_version_lectures(999) is None
+        
+        restored = database_service.get_schedule_version(versions["term 1"])
+        seeds = generator.match_base_schedules(restored, database_service.get_schedule_version_lectures(versions["term 1"]), lectures)
+        assert len(seeds) == 4
+        # The old row ids now belong to other professors, so nothing matches
+        seeds = generator.match_base_schedules(database_service.get_schedule_version(versions["term 0"]), [], lectures)
+        assert seeds == []
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Warm start tests passed\n")
+
+def test_database_connection_pool():
+    """Test pooled per-thread connections and transactions"""
+    print("Testing database connection pool...")
+    
+    import os
+    import tempfile
+    import threading
+    from app.services.database_service import DatabaseService
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        conn = database_service.get_connection()
+        assert database_service.get_connection() is conn
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        
+        # A failing block rolls back everything, including nested blocks
+        try:
+            with database_service.transaction() as cursor:
+                cursor.execute("INSERT INTO schedules (id, lecture_id, time_slot_id, classroom_id, professor) "
+                               "VALUES ('a', 'lec_1', 'monday_morning', 'S1', 'Prof A')")
+                assert database_service.save_lecture(make_test_lecture("lec_1", "Gr. 1"))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        assert conn.execute('SELECT COUNT(*) FROM schedules').fetchone()[0] == 0
+        assert database_service.get_lecture("lec_1") is None
+        
+        # Every thread writes through its own connection
+        thread_connections = []
+        def save_from_thread(index):
+            thread_connections.append(database_service.get_connection())
+            schedule = Schedule(id=f"t{index}", lecture_id="lec_1", time_slot_id="monday_morning",
+                                classroom_id="S1", professor="Prof A")
+            for _ in range(20):
+                assert database_service.save_schedule(schedule)
+        threads = [threading.Thread(target=save_from_thread, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len({id(item) for item in thread_connections + [conn]}) == 5
+        assert len(database_service.get_all_schedules()) == 4
+        
+        # Transactions that read before writing wait for a concurrent writer instead of failing
+        rows = [Schedule(id=f"b{i}", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1",
+                         professor="Prof A") for i in range(300)]
+        writing = threading.Event()
+        def save_in_loop():
+            while not writing.is_set():
+                assert database_service.save_schedules(rows)
+        writer = threading.Thread(target=save_in_loop)
+        writer.start()
+        try:
+            saved = [database_service.save_schedule_version(rows[:50], f"v{i}") for i in range(5)]
+        finally:
+            writing.set()
+            writer.join()
+        assert all(saved)
+        assert database_service.delete_schedules([row.id for row in rows])
+        
+        assert database_service.delete_schedule("t0")
+        assert not database_service.delete_schedule("t0")
+        assert database_service.save_lecture(make_test_lecture("lec_1", "Gr. 1"))
+        assert database_service.delete_lecture("lec_1")
+        assert database_service.get_lecture("lec_1") is None
+        
+        # Closing drops the pool; the next query opens a fresh connection
+        database_service.close()
+        assert database_service.get_connection() is not conn
+        assert len(database_service.get_all_schedules()) == 3
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Database connection pool tests passed\n")
+
+def test_bulk_persistence():
+    """Test bulk saves in chunked executemany batches"""
+    print("Testing bulk persistence...")
+    
+    import os
+    import tempfile
+    from app.services.database_service import DatabaseService
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name, bulk_chunk_size=300)
+        lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i % 7}") for i in range(1000)]
+        classrooms = [Classroom(id=f"R{i}", name=f"Room {i}", capacity=30 + i) for i in range(40)]
+        time_slots = TimeSlotService().create_standard_time_slots()
+        schedules = [
+            Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id="monday_morning",
+                     classroom_id="R1", professor=lecture.prof_rreg, pinned=i % 2 == 0)
+            for i, lecture in enumerate(lectures)
+        ]
+        
+        # Every row is written, across several executemany chunks
+        conn = database_service.get_connection()
+        changes_before = conn.total_changes
+        assert database_service.save_lectures(lectures)
+        assert conn.total_changes - changes_before == 1000
+        assert database_service.save_classrooms(classrooms)
+        assert database_service.save_time_slots(time_slots)
+        assert database_service.save_schedules(schedules)
+        
+        assert conn.execute('SELECT COUNT(*) FROM lectures').fetchone()[0] == 1000
+        assert database_service.get_lecture("lec_999").grup_rreg == "Gr. 5"
+        assert database_service.get_classroom("R39").capacity == 69
+        assert database_service.get_time_slot(time_slots[0].id) == time_slots[0]
+        assert sum(schedule.pinned for schedule in database_service.get_all_schedules()) == 500
+        
+        # Saving again replaces rows instead of duplicating them
+        assert database_service.save_lectures(lectures[:10])
+        assert conn.execute('SELECT COUNT(*) FROM lectures').fetchone()[0] == 1000
+        assert database_service.save_lectures([])
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Bulk persistence tests passed\n")
+
+def test_relational_schema():
+    """Test the relational lecture, classroom and time slot tables and the blob migration"""
+    print("Testing relational schema...")
+    
+    import os
+    import json
+    import sqlite3
+    import tempfile
+    from app.services.database_service import DatabaseService
+    lectures = [
+        make_test_lecture("lec_1", "Gr. 1", "L", "Prof A", "EK"),
+        make_test_lecture("lec_2", "Gr. 2", "U", "Prof A", "BF"),
+        make_test_lecture("lec_3", "Gr. 1", "L", "Prof B", "EK")
+    ]
+    lectures[0].time_preference = "Morning"
+    classrooms = [Classroom(id="S1", name="Hall", capacity=150, equipment="Projector"),
+                  Classroom(id="S2", name="Room 201", capacity=40)]
+    time_slots = TimeSlotService().create_standard_time_slots()
+    
+    # A database in the old layout, one JSON blob per row
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        conn = sqlite3.connect(db_file.name)
+        for table, models in (("lectures", lectures), ("classrooms", classrooms), ("time_slots", time_slots)):
+            conn.execute(f"CREATE TABLE {table} (id TEXT PRIMARY KEY, data TEXT NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+            conn.executemany(f"INSERT INTO {table} (id, data, created_at) VALUES (?, ?, '2024-01-01 08:00:00')",
+                             [(model.id, json.dumps(model.dict())) for model in models])
+        conn.execute("INSERT INTO lectures (id, data) VALUES ('broken', 'not json')")
+        conn.commit()
+        conn.close()
+        
+        database_service = DatabaseService(db_file.name)
+        assert database_service.get_lecture("lec_1") == lectures[0]
+        assert database_service.get_lecture("broken") is None
+        assert database_service.get_classroom("S1") == classrooms[0]
+        assert database_service.get_time_slot(time_slots[0].id) == time_slots[0]
+        conn = database_service.get_connection()
+        assert conn.execute("SELECT created_at FROM lectures WHERE id = 'lec_2'").fetchone()[0] == '2024-01-01 08:00:00'
+        
+        # Filters run in SQL
+        assert [lecture.id for lecture in database_service.get_lectures(professor="Prof A")] == ["lec_1", "lec_2"]
+        assert [lecture.id for lecture in database_service.get_lectures(group="Gr. 1", department="EK")] == ["lec_1", "lec_3"]
+        assert [classroom.id for classroom in database_service.get_classrooms(min_capacity=100)] == ["S1"]
+        assert len(database_service.get_time_slots(day="Monday")) == len(time_slots) // 5
+        assert len(database_service.get_lectures()) == 3
+        
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM lectures WHERE prof_rreg = ?", ("Prof A",)).fetchall()
+        assert "idx_lectures_professor" in str(plan)
+        plan = conn.execute("EXPLAIN QUERY PLAN SELECT id FROM classrooms WHERE capacity >= ?", (100,)).fetchall()
+        assert "idx_classrooms_capacity" in str(plan)
+        
+        # Re-opening a migrated database leaves it alone
+        database_service.close()
+        database_service = DatabaseService(db_file.name)
+        assert len(database_service.get_lectures()) == 3
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Relational schema tests passed\n")
+
+def test_delta_versions():
+    """Test schedule versions stored as deltas with periodic full snapshots"""
+    print("Testing delta versions...")
+    
+    import os
+    import sqlite3
+    import tempfile
+    from datetime import datetime
+    from app.services.database_service import DatabaseService
+    lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i % 5}") for i in range(200)]
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=lecture.id, time_slot_id="monday_morning", classroom_id=f"R{i}",
+                 professor=lecture.prof_rreg, created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1))
+        for i, lecture in enumerate(lectures)
+    ]
+    
+    # Each step changes a few items: moves, a removal and an addition, a reorder
+    versions = [list(schedules)]
+    moved = list(versions[-1])
+    for i in (3, 50, 120):
+        moved[i] = moved[i].copy(update={'time_slot_id': "friday_evening", 'updated_at': datetime(2024, 2, 1)})
+    versions.append(moved)
+    versions.append(versions[-1][1:] + [Schedule(id="new", lecture_id="lec_0", time_slot_id="tuesday_midday",
+                                                  classroom_id="R0", professor="Dr. John Smith", pinned=True)])
+    versions.append(list(reversed(versions[-1])))
+    versions.append(versions[-1][:150])
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        # A version saved before delta storage
+        conn = sqlite3.connect(db_file.name)
+        conn.execute("CREATE TABLE schedule_versions (id INTEGER PRIMARY KEY AUTOINCREMENT, schedule_data TEXT NOT NULL, "
+                     "version_name TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.execute("INSERT INTO schedule_versions (schedule_data, version_name) VALUES ('[]', 'old')")
+        conn.commit()
+        conn.close()
+        
+        database_service = DatabaseService(db_file.name, snapshot_interval=3)
+        assert database_service.get_schedule_version(1) == []
+        for number, version in enumerate(versions):
+            assert database_service.save_schedule_version(version, f"v{number}", lectures)
+        
+        conn = database_service.get_connection()
+        storage = conn.execute("SELECT storage, chain_length, length(schedule_data), lectures_from "
+                               "FROM schedule_versions WHERE id > 1 ORDER BY id").fetchall()
+        assert [row[0] for row in storage] == ["full", "delta", "delta", "full", "delta"]
+        assert storage[1][2] < storage[0][2]  # three moved items instead of two hundred
+        assert [row[3] for row in storage] == [None, 2, 2, 2, 2]
+        
+        # Rebuilt from the database, not from the cache of the last save
+        database_service.close()
+        database_service = DatabaseService(db_file.name, snapshot_interval=3)
+        for number, version in enumerate(versions):
+            assert database_service.get_schedule_version(number + 2) == version
+            assert database_service.get_schedule_version_lectures(number + 2) == lectures
+        assert database_service.get_schedule_version(99) is None
+        assert {version['version_name'] for version in database_service.get_schedule_versions()} == {
+            "old", "v0", "v1", "v2", "v3", "v4"
+        }
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Delta version tests passed\n")
+
+def test_snapshot_encoding():
+    """Test the compressed binary encoding of schedule snapshots"""
+    print("Testing snapshot encoding...")
+    
+    import os
+    import json
+    import tempfile
+    from datetime import datetime
+    from app.services.database_service import DatabaseService
+    from app.services.version_codec import (encode_snapshot, decode_snapshot, read_snapshot_header,
+                                            is_snapshot, CODEC_LZMA)
+    slots = ["monday_morning", "monday_midday", "tuesday_evening"]
+    schedules = [
+        Schedule(id=f"id-{i:05d}", lecture_id=f"lec_{i}", time_slot_id=slots[i % 3], classroom_id=f"R{i % 20}",
+                 professor=f"Prof {i % 40}", pinned=i % 7 == 0,
+                 created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1 + i % 3))
+        for i in range(3000)
+    ]
+    schedules[5].id = None
+    rows = [json.loads(schedule.json()) for schedule in schedules]
+    
+    for codec in (1, CODEC_LZMA):
+        data = encode_snapshot(rows, codec)
+        assert is_snapshot(data) and decode_snapshot(data) == rows
+        assert read_snapshot_header(data)['item_count'] == 3000
+        assert len(data) * 10 < len(json.dumps(rows))
+    assert decode_snapshot(encode_snapshot([])) == []
+    assert not is_snapshot(json.dumps(rows))
+    
+    # Values keep their JSON types, and newer formats are refused
+    assert decode_snapshot(encode_snapshot([{"a": True}, {"a": 1}, {"a": "1"}, {"a": None}])) == [
+        {"a": True}, {"a": 1}, {"a": "1"}, {"a": None}
+    ]
+    data = bytearray(encode_snapshot(rows))
+    data[4] = 99
+    try:
+        decode_snapshot(bytes(data))
+        assert False, "newer snapshot formats must be refused"
+    except ValueError:
+        pass
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        assert database_service.save_schedule_version(schedules, "binary")
+        version_id = database_service.get_schedule_versions()[0]['id']
+        info = database_service.get_schedule_version_info(version_id)
+        assert info['storage'] == "full" and info['item_count'] == 3000
+        assert info['encoded_size'] * 10 < len(json.dumps(rows))
+        database_service.close()
+        
+        database_service = DatabaseService(db_file.name)
+        assert database_service.get_schedule_version(version_id) == schedules
+        assert database_service.get_schedule_version_info(version_id + 1) is None
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Snapshot encoding tests passed\n")
+
+def test_version_diff():
+    """Test comparing two saved schedule versions"""
+    print("Testing version diff...")
+    
+    import os
+    import tempfile
+    from app.services.database_service import DatabaseService
+    from app.services.version_diff import VersionDiffService
+    classroom_service = ClassroomService()
+    classroom_service.add_classroom(Classroom(id="S1", name="Hall", capacity=150))
+    classroom_service.add_classroom(Classroom(id="S2", name="Room 201", capacity=40))
+    time_slot_service = TimeSlotService()
+    time_slot_service.create_standard_time_slots()
+    lectures = [make_test_lecture(f"lec_{i}", f"Gr. {i}", "L", f"Prof {i}") for i in range(4)]
+    base = [
+        Schedule(id="s0", lecture_id="lec_0", time_slot_id="monday_morning", classroom_id="S1", professor="Prof 0"),
+        Schedule(id="s1", lecture_id="lec_1", time_slot_id="monday_morning", classroom_id="S1", professor="Prof 1"),
+        Schedule(id="s2", lecture_id="lec_2", time_slot_id="tuesday_morning", classroom_id="S2", professor="Prof 2")
+    ]
+    # lec_1 moves out of the double-booked room, lec_2 is dropped and lec_3 added
+    target = [
+        base[0],
+        base[1].copy(update={'time_slot_id': "monday_midday"}),
+        Schedule(id="s3", lecture_id="lec_3", time_slot_id="friday_evening", classroom_id="S2", professor="Prof 3")
+    ]
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        database_service.save_schedule_version(base, "base", lectures)
+        database_service.save_schedule_version(target, "target")
+        base_id, target_id = sorted(version['id'] for version in database_service.get_schedule_versions())
+        
+        optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+        diff = VersionDiffService(database_service, optimizer).diff_versions(base_id, target_id, lectures, [], [])
+        assert diff["moved"] == [{
+            "lecture_id": "lec_1", "base_schedule_id": "s1", "target_schedule_id": "s1",
+            "from_time_slot_id": "monday_morning", "from_classroom_id": "S1",
+            "to_time_slot_id": "monday_midday", "to_classroom_id": "S1"
+        }]
+        assert [item["schedule_id"] for item in diff["added"]] == ["s3"]
+        assert [item["schedule_id"] for item in diff["removed"]] == ["s2"]
+        assert diff["unchanged_count"] == 1
+        
+        expected_base = optimizer.calculate_schedule_score(base, lectures, [], [])
+        expected_target = optimizer.calculate_schedule_score(target, lectures, [], [])
+        assert diff["scores"]["base"] == expected_base
+        assert diff["scores"]["target"] == expected_target
+        assert diff["scores"]["delta"]["conflict_score"] > 0
+        
+        reverse = VersionDiffService(database_service, optimizer).diff_versions(target_id, base_id, lectures, [], [])
+        assert [item["schedule_id"] for item in reverse["added"]] == ["s2"]
+        assert VersionDiffService(database_service, optimizer).diff_versions(base_id, 999, lectures, [], []) is None
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Version diff tests passed\n")
+
+def test_paginated_queries():
+    """Test keyset-paginated, filtered schedule and version queries"""
+    print("Testing paginated queries...")
+    
+    import os
+    import tempfile
+    from app.services.database_service import DatabaseService
+    slots = ["monday_morning", "monday_midday", "tuesday_morning", "friday_evening"]
+    lectures = [make_test_lecture(f"lec_{i}", "Gr. 1", "L", f"Prof {i % 3}", ["EK", "BF"][i % 2]) for i in range(250)]
+    schedules = [
+        Schedule(id=f"s{i:04d}", lecture_id=lecture.id, time_slot_id=slots[i % 4], classroom_id=f"R{i % 5}",
+                 professor=lecture.prof_rreg)
+        for i, lecture in enumerate(lectures)
+    ]
+    lecture_departments = {lecture.id: lecture.dep_reale_rreg for lecture in lectures}
+    
+    def read_pages(database_service, **filters):
+        items, after_id = [], None
+        while True:
+            page = database_service.query_schedules(after_id=after_id, limit=40, **filters)
+            items.extend(page)
+            if len(page) < 40:
+                return [item.id for item in items]
+            after_id = page[-1].id
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        database_service.save_lectures(lectures)
+        database_service.save_schedules(schedules)
+        for number in range(5):
+            database_service.save_schedule_version(schedules[number * 10:], f"v{number}")
+        
+        expected = [schedule.id for schedule in schedules if schedule.professor == "Prof 1" and schedule.classroom_id == "R2"]
+        assert read_pages(database_service, professor="Prof 1", classroom_id="R2") == expected
+        expected = [schedule.id for schedule in schedules
+                    if schedule.time_slot_id.startswith("monday") and lecture_departments[schedule.lecture_id] == "BF"]
+        assert read_pages(database_service, time_slot_ids=["monday_morning", "monday_midday"], department="BF") == expected
+        assert len(read_pages(database_service)) == 250
+        # Pages read by id come back in id order
+        assert [item.id for item in database_service.query_schedules(limit=1000)] == [schedule.id for schedule in schedules]
+        
+        # The same filters over a saved version
+        version_id = database_service.get_schedule_versions(limit=1)[0]['id']
+        expected = [schedule.id for schedule in schedules[40:] if schedule.professor == "Prof 0"]
+        assert read_pages(database_service, professor="Prof 0", version_id=version_id) == expected
+        assert database_service.query_schedules(version_id=999) is None
+        
+        # Keyset paging reads ids off the professor index alone, not a scan and sort
+        plan = database_service.get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM schedules WHERE professor = ? AND id > ? ORDER BY id LIMIT 40",
+            ("Prof 1", "s0100")
+        ).fetchall()
+        assert "COVERING INDEX idx_schedules_professor" in str(plan) and "TEMP B-TREE" not in str(plan)
+        
+        first_page = database_service.get_schedule_versions(limit=2)
+        second_page = database_service.get_schedule_versions(limit=2, before_id=first_page[-1]['id'])
+        assert [version['version_name'] for version in first_page + second_page] == ["v4", "v3", "v2", "v1"]
+        assert len(database_service.get_schedule_versions()) == 5
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Paginated query tests passed\n")
+
+def test_write_behind():
+    """Test the write-behind queue for schedule writes"""
+    print("Testing write-behind persistence...")
+    
+    import os
+    import tempfile
+    from app.services.database_service import DatabaseService
+    from app.services.write_behind import WriteBehindQueue
+    schedules = [
+        Schedule(id=f"s{i}", lecture_id=f"lec_{i}", time_slot_id="monday_morning", classroom_id="R1", professor="Prof")
+        for i in range(50)
+    ]
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        # A long delay keeps everything pending until flushed
+        schedule_writes = WriteBehindQueue(database_service, flush_delay=60)
+        assert schedule_writes.save_schedules(schedules)
+        
+        # Later writes to the same items replace the pending ones; the queue keeps its own copies
+        schedules[0].classroom_id = "R2"
+        schedule_writes.save_schedule(schedules[0])
+        schedules[0].classroom_id = "R3"
+        schedule_writes.delete_schedule("s1")
+        assert schedule_writes.get_pending_count() == 50
+        assert database_service.get_schedule("s0") is None
+        
+        assert schedule_writes.flush(timeout=10)
+        assert schedule_writes.batches_written == 1
+        assert schedule_writes.get_pending_count() == 0
+        assert database_service.get_schedule("s0").classroom_id == "R2"
+        assert database_service.get_schedule("s1") is None
+        assert len(database_service.get_all_schedules()) == 49
+        
+        # Closing writes what is still pending; later writes go straight to the database
+        schedule_writes.delete_schedules(["s2", "s3"])
+        schedule_writes.close()
+        assert len(database_service.get_all_schedules()) == 47
+        assert schedule_writes.save_schedule(schedules[1])
+        assert database_service.get_schedule("s1") is not None
+        assert schedule_writes.flush(timeout=1)
+        
+        # A batch that keeps failing is dropped after its retries, and flushes report it
+        schedule_writes = WriteBehindQueue(database_service, flush_delay=60, retry_delay=0.01, max_retries=2)
+        database_service.get_connection().execute('DROP TABLE schedules')
+        schedule_writes.save_schedules(schedules[:5])
+        assert not schedule_writes.flush(timeout=10)
+        assert schedule_writes.batches_dropped == 1 and schedule_writes.last_error
+        assert schedule_writes.get_pending_count() == 0
+        database_service.init_database()
+        schedule_writes.save_schedules(schedules[:5])
+        assert schedule_writes.flush(timeout=10)
+        assert len(database_service.get_all_schedules()) == 5
+        assert schedule_writes.close(timeout=10)
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Write-behind persistence tests passed\n")
+
+def test_state_restore():
+    """Test restoring classrooms, time slots, configuration and the schedule at startup"""
+    print("Testing startup state restore...")
+    
+    import os
+    import tempfile
+    from app.models.time_slot import TimeSlotConfiguration
+    from app.services.database_service import DatabaseService
+    from app.services.state_loader import StateLoader
+    from app.services.conflict_index import ConflictIndex
+    from app.services.score_tracker import ScoreTracker
+    
+    def make_loader(database_service):
+        classroom_service = ClassroomService()
+        time_slot_service = TimeSlotService()
+        optimizer = ScheduleOptimizer(classroom_service, time_slot_service)
+        index = ConflictIndex(ConflictDetector(time_slot_service, classroom_service))
+        loader = StateLoader(database_service, classroom_service, time_slot_service, index, ScoreTracker(optimizer))
+        return loader, classroom_service, time_slot_service, index
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        # A fresh database gets the standard time slots, saved for the next start
+        database_service = DatabaseService(db_file.name)
+        loader, classroom_service, time_slot_service, _ = make_loader(database_service)
+        restored = loader.restore()
+        standard_ids = [time_slot.id for time_slot in time_slot_service.get_all_time_slots()]
+        assert restored["report"]["time_slots"] == 15 and not restored["schedules"]
+        assert len(database_service.get_time_slots()) == 15
+        
+        database_service.save_classrooms([Classroom(id=f"R{i}", name=f"Room {i}", capacity=30 + i) for i in range(3)])
+        database_service.delete_time_slot("friday_evening")
+        database_service.save_time_slot_configuration(TimeSlotConfiguration(standard_slot=60))
+        database_service.save_schedules([
+            Schedule(id=f"s{i}", lecture_id=f"lec_{i}", time_slot_id="monday_morning", classroom_id="R1", professor="Prof")
+            for i in range(2)
+        ])
+        
+        # A restart restores all of it, time slots in week order, and indexes the schedule
+        loader, classroom_service, time_slot_service, index = make_loader(database_service)
+        restored = loader.restore()
+        assert sorted(classroom.id for classroom in classroom_service.get_all_classrooms()) == ["R0", "R1", "R2"]
+        assert [time_slot.id for time_slot in time_slot_service.get_all_time_slots()] == standard_ids[:-1]
+        assert time_slot_service.get_configuration().standard_slot == 60
+        assert sorted(schedule.id for schedule in restored["schedules"]) == ["s0", "s1"]
+        assert set(index.schedules) == {"s0", "s1"}
+        assert len(index.get_conflicts()["classroom_conflicts"]) == 1
+        report = restored["report"]
+        assert (report["classrooms"], report["time_slots"], report["schedules"]) == (3, 14, 2)
+        assert set(report["timings_ms"]) == {"classrooms", "time_slots", "configuration", "schedules", "indexes", "total"}
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Startup state restore tests passed\n")
+
+def test_async_database():
+    """Test the async database layer"""
+    print("Testing async database access...")
+    
+    import asyncio
+    import os
+    import tempfile
+    import threading
+    import time
+    from app.services.database_service import DatabaseService
+    from app.services.async_database import AsyncDatabaseService
+    
+    def slow_save(database_service, classroom):
+        time.sleep(0.5)
+        return database_service.save_classroom(classroom)
+    
+    async def scenario(database_service, async_database):
+        finished = []
+        
+        async def track(name, call):
+            result = await call
+            finished.append(name)
+            return result
+        
+        async def ticker():
+            ticks = 0
+            while "slow_write" not in finished:
+                ticks += 1
+                await asyncio.sleep(0.01)
+            return ticks
+        
+        # The slow write is queued first; the reads and the event loop keep going meanwhile
+        slow_write = asyncio.create_task(track(
+            "slow_write", async_database.run_write(slow_save, database_service, Classroom(id="R9", name="Late", capacity=9))
+        ))
+        await asyncio.sleep(0.05)
+        reads = [track(f"read_{i}", async_database.get_classrooms()) for i in range(3)]
+        written_after, *read_results, ticks = await asyncio.gather(
+            track("write", async_database.save_classroom(Classroom(id="R8", name="Next", capacity=8))),
+            *reads, slow_write, ticker()
+        )
+        assert all(name.startswith("read") for name in finished[:3])
+        # Writes run in submission order on the single writer thread
+        assert finished.index("slow_write") < finished.index("write") and written_after
+        assert all(len(classrooms) == 2 for classrooms in read_results[:3])
+        assert ticks > 20
+        
+        # Reads and writes run on their own threads, never the event loop's
+        thread_names = await asyncio.gather(
+            async_database.run_read(lambda: threading.current_thread().name),
+            async_database.run_write(lambda: threading.current_thread().name)
+        )
+        assert thread_names[0].startswith("db-reader") and thread_names[1].startswith("db-writer")
+        assert (await async_database.get_classroom("R8")).name == "Next"
+    
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    db_file.close()
+    try:
+        database_service = DatabaseService(db_file.name)
+        database_service.save_classrooms([Classroom(id=f"R{i}", name=f"Room {i}", capacity=30) for i in range(2)])
+        async_database = AsyncDatabaseService(database_service)
+        asyncio.run(scenario(database_service, async_database))
+        
+        # Connection handling stays synchronous, and so does the wrapped service
+        for name in ("transaction", "get_connection", "_execute_chunked"):
+            assert not hasattr(async_database, name), f"{name} should not be async"
+        async_database.close()
+        assert len(database_service.get_classrooms()) == 4
+        database_service.close()
+    finally:
+        os.remove(db_file.name)
+    print("✓ Async database tests passed\n")
+
 def main():
     """Main test function"""
     print("Lecture Schedule Preparation System - Test Suite")
@@ -171,6 +1659,32 @@ def main():
         test_data_models()
         test_services()
         test_integration()
+        test_classroom_utilization_optimization()
+        test_daily_distribution_rebalancing()
+        test_parallel_tempering()
+        test_pareto_archive()
+        test_pareto_endpoints()
+        test_batch_scoring()
+        test_fused_conflict_detection()
+        test_conflict_index()
+        test_overlap_detection()
+        test_capacity_conflicts()
+        test_conflict_result_cache()
+        test_what_if_moves()
+        test_placement_suggestions()
+        test_manual_edits()
+        test_partial_resolve()
+        test_warm_start()
+        test_database_connection_pool()
+        test_bulk_persistence()
+        test_relational_schema()
+        test_delta_versions()
+        test_snapshot_encoding()
+        test_version_diff()
+        test_paginated_queries()
+        test_write_behind()
+        test_state_restore()
+        test_async_database()
         
         print("🎉 All tests passed! The system is ready for use.")
         return 0